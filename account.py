@@ -1,8 +1,217 @@
+import heapq
+from collections import deque
 from datetime import datetime
-from orders import Order, _BUY, _SHORT, _MARKET, _STOP
+import numpy as np
+import pandas as pd
+from utility.structures import GrowableRecords
+from orders import Order, _BUY, _SHORT, _COVER, _MARKET, _LIMIT, _STOP
+
+
+class OrderBook:
+    '''
+    OrderBook
+
+    Resting LIMIT and STOP orders of one ticker, kept in four heaps sorted by trigger price:
+
+        buy limits:  fill once the low reaches the limit, highest limit first
+        sell limits: fill once the high reaches the limit, lowest limit first
+        buy stops:   trigger once the high reaches the stop, lowest stop first
+        sell stops:  trigger once the low reaches the stop, highest stop first
+
+    so matching a bar only looks at the orders that actually trigger: O(log n) per fill.
+    '''
+    def __init__(self):
+        self._buy_limits = []
+        self._sell_limits = []
+        self._buy_stops = []
+        self._sell_stops = []
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._buy_limits) + len(self._sell_limits) + len(self._buy_stops) + len(self._sell_stops)
+
+    def add(self, order:Order):
+        '''
+        add(order)
+
+        Rests a LIMIT or STOP order in the book.
+        '''
+        self._push(self._sequence, order)
+        self._sequence += 1
+
+    def _push(self, sequence:int, order:Order):
+        buy_side = order.direction in (_BUY, _COVER)
+        price = float(order.price)
+
+        # Heap entries are (key, sequence, order): the sequence keeps equal prices first-in first-out
+        if order.order_type == _LIMIT:
+            heap, key = (self._buy_limits, -price) if buy_side else (self._sell_limits, price)
+        elif order.order_type == _STOP:
+            heap, key = (self._buy_stops, price) if buy_side else (self._sell_stops, -price)
+        else:
+            raise ValueError('Only limit and stop orders can rest in the order book.')
+
+        heapq.heappush(heap, (key, sequence, order))
+
+    def _restore(self, sequence:int, order:Order):
+        # Puts a triggered order that could not be filled back, in its original place in time
+        self._push(sequence, order)
+
+    def match(self, high:float, low:float, bar_open:float=None) -> list:
+        '''
+        match(high, low, bar_open)
+
+        Removes every order triggered by a bar with the given high and low and returns a list of
+        (order, fill price) tuples, in the order the orders were added.
+
+        Orders fill at their limit or stop price, or at 'bar_open' when the bar opens beyond it.
+        '''
+        return [(order, price) for _, order, price in self._match(high, low, bar_open)]
+
+    def _match(self, high:float, low:float, bar_open:float=None) -> list:
+        # Same as match(), with the sequence number of every order first (see _restore)
+        triggered = []
+
+        # Buy limits: limit >= low
+        while self._buy_limits and -self._buy_limits[0][0] >= low:
+            triggered.append(heapq.heappop(self._buy_limits))
+        # Sell limits: limit <= high
+        while self._sell_limits and self._sell_limits[0][0] <= high:
+            triggered.append(heapq.heappop(self._sell_limits))
+        # Buy stops: stop <= high
+        while self._buy_stops and self._buy_stops[0][0] <= high:
+            triggered.append(heapq.heappop(self._buy_stops))
+        # Sell stops: stop >= low
+        while self._sell_stops and -self._sell_stops[0][0] >= low:
+            triggered.append(heapq.heappop(self._sell_stops))
+
+        if len(triggered) > 1:
+            triggered.sort(key=lambda entry: entry[1])
+
+        fills = []
+        for _, sequence, order in triggered:
+            price = float(order.price)
+            if bar_open is not None:
+                buy_side = order.direction in (_BUY, _COVER)
+                # A limit fills at the open when it is better; a stop when it gapped through
+                if (order.order_type == _LIMIT) == buy_side:
+                    price = min(price, bar_open)
+                else:
+                    price = max(price, bar_open)
+            fills.append((sequence, order, price))
+
+        return fills
+
+    def orders(self) -> list:
+        '''
+        orders
+
+        Returns the resting orders, in the order they were added.
+        '''
+        entries = self._buy_limits + self._sell_limits + self._buy_stops + self._sell_stops
+        return [order for _, _, order in sorted(entries, key=lambda entry: entry[1])]
+
+
+# Columns of the trade ledger and of the equity curve
+_TRADE_DTYPE = np.dtype([('bar', np.int64), ('id', np.int64), ('ticker', object), ('direction', object),
+                         ('order_type', object), ('shares', np.int64), ('price', np.float64),
+                         ('amount', np.float64), ('balance', np.float64)])
+_EQUITY_DTYPE = np.dtype([('bar', np.int64), ('balance', np.float64), ('holdings', np.float64)])
+
+
+class Recorder:
+    '''
+    Recorder
+
+    Trade ledger and equity curve of an Account, kept in growable NumPy structured arrays
+    (see GrowableRecords). Every fill is one row of the ledger, and every bar one row of the
+    equity curve: the balance and the market value of the positions held at the end of the bar.
+    '''
+    def __init__(self, capacity:int=1024):
+        self._trades = GrowableRecords(_TRADE_DTYPE, capacity)
+        self._equity = GrowableRecords(_EQUITY_DTYPE, capacity)
+
+    def record_fill(self, bar:int, order:Order, price:float, amount:float, balance:float):
+        order_id = order.id if order.id is not None else -1
+        self._trades.append((bar, order_id, order.ticker, order.direction, order.order_type,
+                             order.shares, price, amount, balance))
+
+    def record_equity(self, bar:int, balance:float, holdings:float):
+        self._equity.append((bar, balance, holdings))
+
+    @property
+    def trade_records(self) -> GrowableRecords:
+        return self._trades
+
+    @property
+    def equity_records(self) -> GrowableRecords:
+        return self._equity
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        '''
+        trades
+
+        The trade ledger as a DataFrame, one row per fill.
+        '''
+        return self._trades.to_frame()
+
+    @property
+    def equity(self) -> pd.DataFrame:
+        '''
+        equity
+
+        The equity curve as a DataFrame, one row per bar: balance, holdings and their sum, equity.
+        '''
+        df = self._equity.to_frame()
+        df['equity'] = df['balance'] + df['holdings']
+        return df
+
+    def clear(self):
+        self._trades.clear()
+        self._equity.clear()
+
+
+# Default number of executed orders an Account keeps
+_EXECUTED_ORDERS_KEPT = 10000
+
+
+def _saturating_positions(steps:np.ndarray, start:int, limit:int) -> np.ndarray:
+    '''
+    _saturating_positions(steps, start, limit)
+
+    Position count after each of 'steps' (+1 = buy, -1 = short), starting at 'start', when a
+    buy at 'limit' positions and a short at 0 positions are ignored.
+
+    Every step is the map x -> clip(x + step, 0, limit). Maps of the form
+    x -> clip(x + a, lo, hi) are closed under composition, so the prefix compositions are
+    computed with a parallel (Hillis-Steele) scan: log2(n) vectorized passes instead of a
+    Python loop over the steps.
+    '''
+    a = steps.astype(np.int32)
+    lo = np.zeros(len(a), dtype=np.int32)
+    hi = np.full(len(a), limit, dtype=np.int32)
+
+    d = 1
+    while d < len(a):
+        # The composition ending d steps earlier is applied first, then the one ending here
+        then_a, then_lo, then_hi = a[d:], lo[d:], hi[d:]
+        new_lo = lo[:-d] + then_a
+        np.maximum(new_lo, then_lo, out=new_lo)
+        np.minimum(new_lo, then_hi, out=new_lo)
+        new_hi = hi[:-d] + then_a
+        np.maximum(new_hi, then_lo, out=new_hi)
+        np.minimum(new_hi, then_hi, out=new_hi)
+
+        then_a += a[:-d]
+        lo[d:] = new_lo
+        hi[d:] = new_hi
+        d *= 2
+
+    return np.clip(start + a, lo, hi)
 
 class Account:
-    def __init__(self, initial_balance=1000000.00):
+    def __init__(self, initial_balance=1000000.00, executed_orders_kept:int=_EXECUTED_ORDERS_KEPT):
         # Account Balance
         self._balance = initial_balance
 
@@ -10,10 +219,25 @@ class Account:
         self._maxPositions = 1          # Max number of allowable positions
         self._inPosition = False        # Currently in a position
         self._numPositions = 0          # Number of positions currently in
+        self._positions = {}            # Ticker -> shares currently held
+        self._tickerPositions = {}      # Ticker -> number of positions currently in
+
+        # Resting limit and stop orders
+        self._books = {}                # Ticker -> OrderBook
 
-        self._submission_order_list = {}
+        # Submitted orders waiting to be executed, first in first out. Orders are looked up by
+        # id in the side index; cancelled orders are only dropped from the queue when reached.
+        self._submission_queue = deque()
+        self._submitted = {}            # Order id -> submitted order
+        self._next_order_id = 0
 
-        self._executed_orders_list = []
+        # The most recently executed orders. None keeps every order.
+        self._executed_orders_list = deque(maxlen=executed_orders_kept)
+
+        # Trade ledger and equity curve, and the number of the current bar
+        self._recorder = Recorder()
+        self._equity_records = self._recorder.equity_records
+        self._bar = 0
     
     @property
     def balance(self):
@@ -27,6 +251,44 @@ class Account:
     def numPositions(self):
         return self._numPositions
     
+    @property
+    def positions(self) -> dict:
+        '''
+        positions
+
+        Shares currently held per ticker. Tickers without an open position are left out.
+        '''
+        return dict(self._positions)
+
+    def position(self, ticker:str="") -> int:
+        '''
+        position(ticker)
+
+        Shares currently held of 'ticker'.
+        '''
+        return self._positions.get(ticker, 0)
+
+    def _open_position(self, ticker:str, shares:int):
+        self._positions[ticker] = self._positions.get(ticker, 0) + shares
+        self._tickerPositions[ticker] = self._tickerPositions.get(ticker, 0) + 1
+
+    def _close_position(self, ticker:str, shares:int):
+        count = self._tickerPositions.get(ticker, 0) - 1
+        if count <= 0:
+            self._positions.pop(ticker, None)
+            self._tickerPositions.pop(ticker, None)
+        else:
+            self._positions[ticker] -= shares
+            self._tickerPositions[ticker] = count
+
+    def _sync_position(self, ticker:str, count:int, shares:int):
+        if count <= 0:
+            self._positions.pop(ticker, None)
+            self._tickerPositions.pop(ticker, None)
+        else:
+            self._positions[ticker] = count * int(shares)
+            self._tickerPositions[ticker] = count
+
     @maxPositions.setter
     def maxPositions(self, n):
         if n <= 0:
@@ -35,20 +297,63 @@ class Account:
             self._maxPositions = n
     
     @property
-    def submission_order_list(self):
-        return self._submission_order_list
+    def submission_order_list(self) -> dict:
+        '''
+        submission_order_list
+
+        The orders waiting to be executed as a dict of order id -> Order, earliest submitted first.
+        '''
+        return {order.id: order for order in self._submission_queue if order.id in self._submitted}
     
     @property
-    def executed_orders_list(self):
-        return self._executed_orders_list
-    
+    def executed_orders_list(self) -> list:
+        '''
+        executed_orders_list
+
+        The most recently executed orders, oldest first.
+        '''
+        return list(self._executed_orders_list)
+
+    @property
+    def recorder(self) -> Recorder:
+        return self._recorder
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        return self._recorder.trades
 
+    @property
+    def equity(self) -> pd.DataFrame:
+        return self._recorder.equity
+
+    @property
+    def bar(self) -> int:
+        return self._bar
+
+    def end_bar(self, price:float=None, holdings_value:float=None):
+        '''
+        end_bar(price, holdings_value)
+
+        Records the equity at the end of the current bar and moves on to the next bar.
+        The positions held are valued at 'price', or at 'holdings_value' in total when given
+        (e.g. for positions in several tickers).
+        '''
+        if holdings_value is None:
+            holdings_value = sum(self._positions.values()) * float(price) if self._positions else 0.0
+        # Appended directly, this runs once per bar
+        self._equity_records.append((self._bar, self._balance, holdings_value))
+        self._bar += 1
+
+    @property
+    def num_submitted(self) -> int:
+        return len(self._submitted)
     
-    def submit_order(self, order:Order, submission_time:datetime=None, hasSubmissionTime:bool=True):
+    def submit_order(self, order:Order, submission_time:datetime=None, hasSubmissionTime:bool=True) -> int:
         '''
         submit_order
 
-        All orders are added to an internal order submission list.
+        All orders are added to the back of an internal order submission queue.
+        Returns the order's id, which is unique within this account.
         '''
 
         if submission_time is not None and type(submission_time) != datetime:
@@ -59,39 +364,85 @@ class Account:
             submission_time = datetime.now()
 
         order.submitted = submission_time
+        order.id = self._next_order_id
+        self._next_order_id += 1
 
-        # Register the submitted order into the submission order list
-        self._submission_order_list[len(self._submission_order_list)] = order
+        # Register the submitted order into the submission queue
+        self._submission_queue.append(order)
+        self._submitted[order.id] = order
 
-    
-    def execute_order(self, order:Order) -> dict:
+        return order.id
+
+    def cancel_order(self, order_id:int) -> bool:
         '''
-        Executes the next Order in the Order Submission list.
+        cancel_order(order_id)
 
-        - Returns a dict object representing the executed order.
+        Removes a submitted order before it is executed.
+        Returns False if no order with that id is waiting to be executed.
         '''
+        if self._submitted.pop(order_id, None) is None:
+            return False
 
-        if order == None:
-            raise ValueError('None-type passed as Order.')
+        # Only drop cancelled orders from the front; the rest are skipped once they get there,
+        # unless they come to outnumber the orders still waiting
+        self._drop_cancelled()
+        if len(self._submission_queue) > 2 * len(self._submitted) + 64:
+            self._submission_queue = deque(o for o in self._submission_queue if o.id in self._submitted)
+        return True
 
-        if len(self._submission_order_list) == 0:
-            return None
+    def _drop_cancelled(self):
+        queue = self._submission_queue
+        while queue and queue[0].id not in self._submitted:
+            queue.popleft()
 
-        # Get most current order
-        order_to_execute = self._submission_order_list[0]
+    def next_order(self) -> Order:
+        '''
+        next_order
 
+        Removes and returns the earliest submitted order, or None if no order is waiting.
         '''
-        Account balance calculation is based on order type and order direction.
+        self._drop_cancelled()
+        if not self._submission_queue:
+            return None
+
+        order = self._submission_queue.popleft()
+        del self._submitted[order.id]
+        return order
+
+    def execute_order(self, order:Order=None, processed_time:datetime=None) -> dict:
         '''
-        # execute order account balance calculation
-        
+        execute_order(order, processed_time)
+
+        Executes 'order', or the next Order in the submission queue if no order is given.
+        A submitted order is removed from the submission queue.
 
-        # Add executed order to executed orders list
-        self._executed_orders_list.append(order)
+        A LIMIT or STOP order only rests in the order book (see process_order): it is not
+        processed yet, and is added to the executed orders once process_bar fills it.
 
+        - Returns a dict object representing the order, including the order 'amount'
+          (see process_order) and whether it is 'resting', or None if there was no order to execute.
+        '''
+        if order is None:
+            order = self.next_order()
+            if order is None:
+                return None
+        elif order.id is not None and self._submitted.get(order.id) is order:
+            del self._submitted[order.id]
+            self._drop_cancelled()
 
+        # Account balance calculation is based on order type and order direction.
+        amount = self.process_order(order)
 
+        resting = order.order_type == _LIMIT or order.order_type == _STOP
+        if not resting:
+            order.processed = processed_time if processed_time is not None else datetime.now()
+            # Add executed order to executed orders list
+            self._executed_orders_list.append(order)
 
+        executed = order.order_dict()
+        executed['amount'] = amount
+        executed['resting'] = resting
+        return executed
 
 
     def process_order(self, order:Order):
@@ -101,56 +452,251 @@ class Account:
         Takes in an order, updates account balance, registers stop and limit values, etc.
         Returns the total cost of the order. If the order was a BUY order, the cost is
         negative. If the order is a sell order, the cost is positive.
+
+        LIMIT and STOP orders are not filled right away: they rest in the order book of their
+        ticker until a bar reaches their price (see process_bar), and 0 is returned. Only BUY
+        and SHORT orders can rest, since those are the only orders the account fills.
         '''
 
         if order == None:
             return 0
         
         order_type = order.order_type
-        order_direction = order.direction
 
-        # Price x Shares = Total Order Amount
-        order_price = float(order.price)
-        order_shares = int(order.shares)
-        order_total = order_price * order_shares
-
-        
         # MARKET ORDERS
         #
         # If the order is a buy-at-market order, just buy at the given price.
         # If the order is a sell-at-market order, just sell at the given price.
         #
         if order_type == _MARKET:
-            # If Max Positions is limited to 1 position at a time,
-            # only sell if you previously bought and only buy if you
-            # previously sold.
-            if self._maxPositions == 1:
-                if order_direction == _BUY:
-                    if self._inPosition == False:
-                        self._inPosition = True
-                        self._balance = self._balance - order_total
-                        return -1 * order_total
-                elif order_direction == _SHORT:
-                    if self._inPosition == True:
+            return self._fill(order, float(order.price))
+
+        # LIMIT AND STOP ORDERS
+        #
+        # Rest in the order book until matched against a bar's high and low.
+        #
+        if order_type == _LIMIT or order_type == _STOP:
+            if order.direction != _BUY and order.direction != _SHORT:
+                raise ValueError(f"Only BUY and SHORT orders can be {order_type} orders.")
+            book = self._books.get(order.ticker)
+            if book is None:
+                book = self._books[order.ticker] = OrderBook()
+            book.add(order)
+
+        return 0
+
+    def process_bar(self, high:float, low:float, bar_open:float=None, ticker:str="") -> list:
+        '''
+        process_bar(high, low, bar_open, ticker)
+
+        Matches the resting LIMIT and STOP orders of 'ticker' against a bar's high and low and
+        fills the triggered ones (see OrderBook.match). Returns a list of (order, amount) tuples,
+        the amounts being the same as process_order() returns for a MARKET order.
+
+        A triggered order that cannot be filled within the position limits (amount 0) keeps
+        resting in the book, where it can fill on a later bar. Filled orders that were submitted
+        (see execute_order) are added to the executed orders.
+        '''
+        book = self._books.get(ticker)
+        if book is None or len(book) == 0:
+            return []
+
+        fills = []
+        for sequence, order, price in book._match(high, low, bar_open):
+            amount = self._fill(order, price)
+            if amount == 0:
+                book._restore(sequence, order)
+            elif order.id is not None:
+                order.processed = datetime.now()
+                self._executed_orders_list.append(order)
+            fills.append((order, amount))
+        return fills
+
+    @property
+    def has_pending(self) -> bool:
+        return any(len(book) > 0 for book in self._books.values())
+
+    def pending_tickers(self) -> list:
+        '''
+        pending_tickers
+
+        Returns the tickers that have resting LIMIT or STOP orders.
+        '''
+        return [ticker for ticker, book in self._books.items() if len(book) > 0]
+
+    def pending_orders(self, ticker:str=None) -> list:
+        '''
+        pending_orders(ticker)
+
+        Returns the resting LIMIT and STOP orders, of every ticker or only of 'ticker'.
+        '''
+        if ticker is not None:
+            book = self._books.get(ticker)
+            return book.orders() if book is not None else []
+        return [order for book in self._books.values() for order in book.orders()]
+
+    def _fill(self, order:Order, order_price:float) -> float:
+        '''
+        _fill(order, order_price)
+
+        Fills 'order' at 'order_price', within the position limits, and records the fill.
+        Returns the order amount, or 0 if the order could not be filled.
+        '''
+        amount = self._apply_fill(order, order_price)
+        if amount != 0:
+            self._recorder.record_fill(self._bar, order, order_price, amount, self._balance)
+        return amount
+
+    def _apply_fill(self, order:Order, order_price:float) -> float:
+        order_direction = order.direction
+
+        # Price x Shares = Total Order Amount
+        order_shares = int(order.shares)
+        order_total = order_price * order_shares
+
+        # If Max Positions is limited to 1 position at a time,
+        # only sell if you previously bought (the same ticker) and
+        # only buy if you previously sold.
+        if self._maxPositions == 1:
+            if order_direction == _BUY:
+                if self._inPosition == False:
+                    self._inPosition = True
+                    self._open_position(order.ticker, order_shares)
+                    self._balance = self._balance - order_total
+                    return -1 * order_total
+            elif order_direction == _SHORT:
+                if self._inPosition == True and self._tickerPositions.get(order.ticker, 0) > 0:
+                    self._inPosition = False
+                    self._close_position(order.ticker, order_shares)
+                    self._balance = self._balance + order_total
+                    return order_total
+        
+        # If Max Positions is limited by some finite number, then
+        # buy or sell as you wish, within limits. A position can only
+        # be sold in a ticker that is currently held.
+        elif self._maxPositions > 1:
+            if order_direction == _BUY:
+                if self._numPositions < self._maxPositions:
+                    self._numPositions += 1
+                    self._inPosition = True
+                    self._open_position(order.ticker, order_shares)
+                    self._balance = self._balance - order_total
+                    return -1 * order_total
+            elif order_direction == _SHORT:
+                if self._tickerPositions.get(order.ticker, 0) > 0:
+                    self._numPositions -= 1
+                    if self._numPositions == 0:
                         self._inPosition = False
-                        self._balance = self._balance + order_total
-                        return order_total
-            
-            # If Max Positions is limited by some finite number, then
-            # buy or sell as you wish, within limits.
-            elif self._maxPositions > 1:
-                if order_direction == _BUY:
-                    if self._numPositions < self._maxPositions:
-                        self._numPositions += 1
-                        self._inPosition = True
-                        self._balance = self._balance - order_total
-                        return -1 * order_total
-                elif order_direction == _SHORT:
-                    if self._numPositions != 0:
-                        self._numPositions -= 1
-                        if self._numPositions == 0:
-                            self._inPosition = False
-                        self._balance = self._balance + order_total
-                        return order_total
-
-        return 0
\ No newline at end of file
+                    self._close_position(order.ticker, order_shares)
+                    self._balance = self._balance + order_total
+                    return order_total
+
+        return 0
+
+
+
+    def process_signals(self, entries, exits, entry_prices, exit_prices, shares:int=1, mark_prices=None):
+        '''
+        process_signals(entries, exits, entry_prices, exit_prices, shares, mark_prices)
+
+        Vectorized counterpart of process_order() for MARKET orders. Takes whole boolean
+        entry/exit arrays (one value per bar) and the matching fill prices, and applies
+        them in one pass. An entry on a bar takes precedence over an exit on the same bar,
+        just like a strategy that returns a single order per bar.
+
+        Returns a tuple (amounts, balances):
+            amounts: the per-bar order amounts, exactly as process_order() would return them.
+            balances: the account balance after each bar.
+
+        The fills are recorded in the trade ledger. When 'mark_prices' (e.g. the close of each
+        bar) is given, the equity curve is recorded as well, with the positions valued at those prices.
+        '''
+        entries = np.asarray(entries, dtype=bool)
+        exits = np.asarray(exits, dtype=bool)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        exit_prices = np.asarray(exit_prices, dtype=np.float64)
+        n = len(entries)
+
+        if len(exits) != n or len(entry_prices) != n or len(exit_prices) != n:
+            raise ValueError("Signal and price arrays must have the same length.")
+
+        # +1 = buy signal, -1 = short signal, 0 = no order on this bar
+        signal = np.zeros(n, dtype=np.int8)
+        signal[exits] = -1
+        signal[entries] = 1
+
+        buys = np.zeros(n, dtype=bool)
+        sells = np.zeros(n, dtype=bool)
+        start_positions = self._numPositions if self._maxPositions > 1 else int(self._inPosition)
+
+        if self._maxPositions == 1:
+            # Only buy when flat and only sell when in a position, so the position after
+            # each bar is simply the direction of the last signal seen so far.
+            last = np.where(signal != 0, np.arange(n), -1)
+            np.maximum.accumulate(last, out=last)
+            held = np.where(last >= 0, signal[last] > 0, self._inPosition)
+
+            previously_held = np.empty(n, dtype=bool)
+            previously_held[:1] = self._inPosition
+            previously_held[1:] = held[:-1]
+
+            buys = held & ~previously_held
+            sells = previously_held & ~held
+
+            if n > 0:
+                self._inPosition = bool(held[-1])
+                self._sync_position("", int(self._inPosition), shares)
+
+        elif self._maxPositions > 1:
+            # The position count saturates at both ends, which makes it path dependent.
+            # Only bars that carry a signal can change it.
+            signalled = np.flatnonzero(signal)
+            positions = _saturating_positions(signal[signalled], self._numPositions, self._maxPositions)
+            previous = np.concatenate(([self._numPositions], positions[:-1]))
+            buys[signalled] = positions > previous
+            sells[signalled] = positions < previous
+
+            num_positions = int(positions[-1]) if len(positions) > 0 else self._numPositions
+            self._numPositions = num_positions
+            self._inPosition = num_positions > 0
+            self._sync_position("", num_positions, shares)
+
+        amounts = np.zeros(n, dtype=np.float64)
+        amounts[buys] = -1 * (entry_prices[buys] * int(shares))
+        amounts[sells] = exit_prices[sells] * int(shares)
+
+        # Accumulate sequentially from the current balance so the balance path is
+        # identical to applying process_order() one bar at a time.
+        balances = np.cumsum(np.concatenate(([self._balance], amounts)))[1:]
+
+        if n > 0:
+            self._balance = float(balances[-1])
+
+        self._record_signals(buys, sells, amounts, balances, entry_prices, exit_prices, int(shares),
+                             start_positions, mark_prices)
+
+        return amounts, balances
+
+    def _record_signals(self, buys, sells, amounts, balances, entry_prices, exit_prices, shares:int,
+                        start_positions:int, mark_prices):
+        n = len(amounts)
+        bars = self._bar + np.arange(n)
+
+        filled = np.flatnonzero(buys | sells)
+        if len(filled) > 0:
+            is_buy = buys[filled]
+            self._recorder.trade_records.extend(
+                bar=bars[filled], id=-1, ticker="",
+                direction=np.where(is_buy, _BUY, _SHORT).astype(object), order_type=_MARKET,
+                shares=shares, price=np.where(is_buy, entry_prices[filled], exit_prices[filled]),
+                amount=amounts[filled], balance=balances[filled])
+
+        if mark_prices is not None:
+            mark_prices = np.asarray(mark_prices, dtype=np.float64)
+            positions = start_positions + np.cumsum(buys.astype(np.int64) - sells.astype(np.int64))
+            holdings = positions * shares * mark_prices
+            # No value without a price
+            holdings[positions == 0] = 0.0
+            self._recorder.equity_records.extend(bar=bars, balance=balances, holdings=holdings)
+
+        self._bar += n
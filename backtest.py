@@ -1,9 +1,27 @@
 from abc import ABCMeta, abstractmethod
+from itertools import chain
+from time import perf_counter_ns
 from typing import Type
+import numpy as np
 import pandas as pd
 from account import Account
+from log import logger, flush, SUMMARY, VERBOSE
+from profiling import PhaseTimer, apply_profiler
+import stats
+from cache import IndicatorCache
+from pipeline import IndicatorGraph
+import resample
+from resample import Timeframe
+from utility.structures import BarRecord, LookbackWindow, RingBuffer, make_record_type, readonly
 
 class Indicator(metaclass=ABCMeta):
+    def __new__(cls, *args, **kwargs):
+        # Keep the constructor arguments; they identify the indicator's result in an IndicatorCache.
+        self = super().__new__(cls)
+        self._args = args
+        self._kwargs = kwargs
+        return self
+
     def __init__(self, name:str):
         self._name = name
     
@@ -24,6 +42,64 @@ class Indicator(metaclass=ABCMeta):
         """
         pass
 
+    @property
+    def incremental(self) -> bool:
+        """
+        incremental
+
+        True if the indicator implements update(), i.e. can be computed one row at a time.
+        """
+        return type(self).update is not Indicator.update
+
+    @property
+    def inputs(self) -> list:
+        """
+        inputs
+
+        Indicators this indicator is computed from: the Indicator objects among its constructor
+        arguments. When evaluated in a Backtest (see pipeline.IndicatorGraph), it is constructed
+        again with the result of each input in its place, so f() only ever sees Series.
+        """
+        return [a for a in chain(self._args, self._kwargs.values()) if isinstance(a, Indicator)]
+
+    @property
+    def warmup(self):
+        """
+        warmup
+
+        Number of rows before a row that f() needs to give the same value at that row as over the
+        whole data, or None if unknown (or unbounded, as for recursive averages). Streamed
+        backtests keep that many rows from previous chunks (see Backtest's 'warmup').
+        """
+        return None
+
+    def _bind_inputs(self, results:dict):
+        # Copy constructed with every input replaced by its result, given by id of the input
+        def swap(arg):
+            return results[id(arg)] if isinstance(arg, Indicator) else arg
+
+        args = [swap(a) for a in self._args]
+        kwargs = {k: swap(v) for k, v in self._kwargs.items()}
+        return type(self)(*args, **kwargs)
+
+    def update(self, bar):
+        """
+        update(bar)
+
+        Optional incremental counterpart of f(). Takes the next row of data and returns the
+        indicator's value at that row, which must equal the value f() gives for the same row.
+        Implementations should keep O(1) state between calls.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not define update().")
+
+    def reset(self):
+        """
+        reset()
+
+        Clears the state kept by update(), so the next update() call starts from the first row.
+        """
+        pass
+
 class Strategy(metaclass=ABCMeta):
     """
     Strategy Abstract Class
@@ -32,7 +108,10 @@ class Strategy(metaclass=ABCMeta):
         self._name: str = ""
         self._data: pd.DataFrame = None
         self._indicators = {}
+        self._timeframes = {}
+        self._requires = None
         self._lookback = 0
+        self._shares = 1
     
     @abstractmethod
     def init(self):
@@ -63,6 +142,28 @@ class Strategy(metaclass=ABCMeta):
             l.append(k)
         return l
     
+    @property
+    def requires(self) -> list:
+        """
+        requires
+
+        Names of the indicators the Strategy reads, or None (default) for all of them. Indicators
+        that are neither listed nor inputs of listed ones are not computed and get no column.
+        """
+        return self._requires
+
+    @requires.setter
+    def requires(self, names:list):
+        self._requires = list(names) if names is not None else None
+
+    def _required_indicators(self) -> dict:
+        if self._requires is None:
+            return dict(self._indicators)
+        unknown = [name for name in self._requires if name not in self._indicators]
+        if unknown:
+            raise ValueError(f"No indicator named {', '.join(unknown)}.")
+        return {name: i for name, i in self._indicators.items() if name in self._requires}
+
     @property
     def lookback(self) -> int:
         """
@@ -81,6 +182,36 @@ class Strategy(metaclass=ABCMeta):
         """
         self._lookback = k
 
+    @property
+    def shares(self) -> int:
+        """
+        shares
+
+        Number of shares traded per signal when the Strategy is run in vectorized mode.
+        """
+        return self._shares
+
+    @shares.setter
+    def shares(self, n:int):
+        if type(n) != int:
+            raise TypeError("Shares must be int type.")
+        if n <= 0:
+            raise ValueError("Shares must be positive.")
+        self._shares = n
+
+    def signals(self, data:pd.DataFrame):
+        """
+        signals(data)
+
+        Optional vectorized counterpart of apply(), used by Backtest.run(vectorized=True).
+        'data' is the full dataframe, including the indicator columns.
+
+        Must return a tuple (entries, exits, entry_prices, exit_prices) of equal-length
+        arrays or Series: boolean entry (buy) and exit (short) signals for every row, and
+        the prices the corresponding MARKET orders are filled at.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not define signals().")
+
     def __str__(self) -> str:
         return self._name
 
@@ -93,15 +224,43 @@ class Strategy(metaclass=ABCMeta):
 
         Adds indicator 'i' to the indicator dictionary of the Strategy
         '''
-        self._indicators[i.name] = i.f
+        self._indicators[i.name] = i
     
-    def run_indicator(self, name:str):
+    def run_indicator(self, name:str, cache:IndicatorCache=None):
         '''
         run_indicator
 
-        Runs the given indicator.
+        Runs the given indicator. If a cache is given, a previously computed result for
+        the same indicator and input data is reused.
+        '''
+        if cache is None:
+            return self._indicators[name].f()
+        return cache.get(self._indicators[name])
+
+    @property
+    def timeframes(self) -> list:
+        """
+        timeframes
+
+        Returns a list of the rules of the higher timeframes added with add_timeframe().
+        """
+        return list(self._timeframes.keys())
+
+    def add_timeframe(self, rule) -> Timeframe:
+        '''
+        add_timeframe(rule)
+
+        Resamples the Strategy's data into bars of 'rule' (e.g. '5min', '1h', '1D', 'W', see
+        resample.bin_starts) and returns them as a Timeframe, also available from timeframe(rule).
+        Call it in init(). During a backtest, timeframe(rule)['close'] is the close of the latest
+        complete bar at the current row.
         '''
-        return self._indicators[name]()
+        timeframe = resample.timeframe(self._data, rule)
+        self._timeframes[rule] = timeframe
+        return timeframe
+
+    def timeframe(self, rule) -> Timeframe:
+        return self._timeframes[rule]
 
 
 
@@ -111,9 +270,87 @@ class Data:
             raise ValueError("Empty data passed to backtest.")
         self._data = data
         self._data_len = len(data)
+
+        # Read-only column arrays backing the lookback window views
+        self._arrays = {name: readonly(data[name].to_numpy()) for name in data.columns}
+        self._window = LookbackWindow(self._arrays)
+
+        # Compact row records, built by _init(records=True)
+        self._record_type = None
+        self._records = None
+
+        # Writable buffers of the columns filled in row by row (see add_live_column)
+        self._live = {}
     
     def add_column(self, name: str, column: pd.Series):
         self._data[name] = column
+        self._arrays[name] = readonly(self._data[name].to_numpy())
+
+    def add_columns(self, columns: dict):
+        '''
+        add_columns(columns)
+
+        Adds every column of the dict {name: Series, array or scalar} in one concat, instead of
+        inserting them one at a time into the dataframe. Existing columns of the same names are
+        replaced. The data is a new dataframe afterwards.
+        '''
+        if len(columns) == 0:
+            return
+        block = pd.DataFrame(columns, index=self._data.index)
+        replaced = [name for name in block.columns if name in self._data.columns]
+        self._data = pd.concat([self._data.drop(columns=replaced), block], axis=1)
+        for name in block.columns:
+            self._arrays[name] = readonly(self._data[name].to_numpy())
+
+    def add_live_column(self, name: str):
+        '''
+        add_live_column(name)
+
+        Adds a float column whose values only become known as the iteration reaches each row,
+        such as the output of an incremental indicator. They are filled in by _update_live().
+        Values already in an existing column of that name are kept.
+        '''
+        if name in self._data.columns:
+            buffer = self._data[name].to_numpy(dtype=np.float64, copy=True)
+        else:
+            buffer = np.full(len(self._data), np.nan)
+            # Placeholder, so that rows and records have the column
+            self._data[name] = buffer
+
+        self._live[name] = buffer
+        self._arrays[name] = readonly(buffer)
+
+    def _update_live(self, row, indicators:list):
+        '''
+        _update_live(row, indicators)
+
+        Updates every incremental indicator with the current row, stores their values in the
+        live columns and returns the row with those values filled in.
+        '''
+        i = self._data_len - 1
+        values = [indicator.update(row) for indicator in indicators]
+
+        for indicator, value in zip(indicators, values):
+            self._live[indicator.name][i] = value
+
+        if isinstance(row, BarRecord):
+            items = list(row)
+            for indicator, value in zip(indicators, values):
+                items[row._index[indicator.name]] = value
+            return row._make(items)
+
+        for indicator, value in zip(indicators, values):
+            row[indicator.name] = value
+        return row
+
+    def _commit_live(self):
+        '''
+        _commit_live
+
+        Copies the live column values into the dataframe.
+        '''
+        for name, buffer in self._live.items():
+            self._data[name] = buffer
     
     def data(self, lookback:int=-1):
         '''
@@ -127,13 +364,48 @@ class Data:
         if lookback < -1:
             raise ValueError("Lookback cannot be less than zero.")
         else:
-            start = self._data_len - lookback
+            start = max(0, self._data_len - lookback)
+
+        rows = self._data.iloc[ start:end ]
+
+        # Live columns are only up to date in their buffers while iterating
+        for name, buffer in self._live.items():
+            rows[name] = buffer[ start:end ]
+
+        return rows
+
+    def window(self, lookback:int=0) -> LookbackWindow:
+        '''
+        window()
+
+        Zero-copy alternative to data(). Returns a LookbackWindow over the previous 'lookback'
+        rows up to self._data_len, whose columns are read-only NumPy views. As for data(), a
+        lookback of 0 gives an empty window.
+
+        The same window object is returned (and moved) on every call, so no allocation is made per row.
+        '''
+        if lookback < 0:
+            raise ValueError("Lookback cannot be less than zero.")
+
+        end = self._data_len
+        self._window._move(max(0, end - lookback), end)
 
-        return self._data.iloc[ start:end ]
+        return self._window
 
     
-    def _init(self):
-        self._data_len = 0
+    def _init(self, records:bool=False, start:int=0):
+        # Rows before 'start' are only there as history for the lookback data
+        self._data_len = start
+
+        if records:
+            # Generate the record type from the current columns and dtypes, and convert
+            # every column to plain Python values once instead of on every row.
+            self._record_type = make_record_type(self._data.columns, self._data.dtypes)
+            self._records = zip(*[self._data[name].iloc[start:].tolist() for name in self._data.columns])
+
+    @property
+    def record_type(self):
+        return self._record_type
     
     def _next(self):
         if self._data_len > len(self._data):
@@ -141,6 +413,19 @@ class Data:
 
         self._data_len += 1
         return self._data.iloc[self._data_len-1]
+
+    def _next_record(self):
+        '''
+        _next_record
+
+        Same as _next(), but returns the row as a compact record (see make_record_type)
+        instead of a pandas Series. Requires _init(records=True).
+        '''
+        if self._data_len >= len(self._data):
+            raise IndexError("Last data row reached. Run _init to start over.")
+
+        self._data_len += 1
+        return self._record_type._make(next(self._records))
     
     def _has_next(self):
         return (self._data_len) < len(self._data)
@@ -149,13 +434,187 @@ class Data:
         return self._data_len
 
 
+class StreamData:
+    '''
+    StreamData
+
+    Feeds a backtest from an iterable of DataFrame chunks (for example the generator returned
+    by Database.iter_dataframes) instead of one DataFrame holding all of the data.
+
+    Only the last 'history' rows seen are kept, in a RingBuffer, and are prepended to the next
+    chunk. Peak memory is therefore bounded by the chunk size plus 'history'.
+    The chunks can only be iterated over once.
+    '''
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._first = next(self._chunks, None)
+        if self._first is None or self._first.empty:
+            raise ValueError("Empty data passed to backtest.")
+        self._history = 0
+
+    @property
+    def first(self) -> pd.DataFrame:
+        return self._first
+
+    @property
+    def history(self) -> int:
+        return self._history
+
+    @history.setter
+    def history(self, n:int):
+        if n < 0:
+            raise ValueError("History cannot be less than zero.")
+        self._history = n
+
+    def frames(self):
+        '''
+        frames()
+
+        Yields (frame, start) for every chunk, where 'frame' is the chunk with up to 'history'
+        previous rows in front of it, and 'start' is the position of the chunk's first row in 'frame'.
+        '''
+        if self._first is None:
+            raise ValueError("Streamed data can only be iterated over once.")
+
+        ring = RingBuffer(self._history)
+        first, self._first = self._first, None
+
+        for chunk in chain([first], self._chunks):
+            if chunk.empty:
+                continue
+
+            if len(ring) == 0:
+                frame = chunk.reset_index(drop=True)
+            else:
+                frame = pd.concat([ring.to_frame(), chunk], ignore_index=True)
+
+            start = len(frame) - len(chunk)
+            yield frame, start
+
+            # The frame now also holds the indicator columns added by the backtest
+            ring.extend(frame.iloc[start:])
+
+
+def _is_column(series:pd.Series, frame:pd.DataFrame) -> bool:
+    # The column itself rather than a Series computed from it, which may still carry its name
+    if series.name not in frame.columns or not series.index.equals(frame.index):
+        return False
+    values, column = series.to_numpy(), frame[series.name].to_numpy()
+    return (values.__array_interface__['data'][0] == column.__array_interface__['data'][0]
+            and values.strides == column.strides)
+
+
+def _check_rebindable(indicator:Indicator, frame:pd.DataFrame):
+    '''
+    _check_rebindable(indicator, frame)
+
+    Raises a ValueError unless every Series argument of 'indicator' and of its inputs is a
+    column of 'frame' itself, the only Series _rebind can swap for the same data of later chunks.
+    '''
+    for arg in chain(indicator._args, indicator._kwargs.values()):
+        if isinstance(arg, Indicator):
+            _check_rebindable(arg, frame)
+        elif isinstance(arg, pd.Series) and not _is_column(arg, frame):
+            raise ValueError(f"Indicator {indicator.name} is passed a Series that is not a column of the data, "
+                             f"which cannot be streamed. Compute it in an Indicator and pass that instead.")
+
+
+def _rebind(indicator:Indicator, frame:pd.DataFrame, rebound:dict=None) -> Indicator:
+    '''
+    _rebind(indicator, frame, rebound=None)
+
+    Returns a copy of 'indicator' constructed with the same arguments, except that any Series
+    argument (a column of the data, see _check_rebindable) is replaced by the column of 'frame'
+    with its name, and any input indicator by its own copy. 'rebound' maps the id of every
+    indicator rebound so far to its copy, so that an input shared by several indicators stays shared.
+    '''
+    if rebound is None:
+        rebound = {}
+    if id(indicator) in rebound:
+        return rebound[id(indicator)]
+
+    def swap(arg):
+        if isinstance(arg, Indicator):
+            return _rebind(arg, frame, rebound)
+        if isinstance(arg, pd.Series) and arg.name in frame.columns:
+            return frame[arg.name]
+        return arg
+
+    args = [swap(a) for a in indicator._args]
+    kwargs = {k: swap(v) for k, v in indicator._kwargs.items()}
+    rebound[id(indicator)] = type(indicator)(*args, **kwargs)
+    return rebound[id(indicator)]
+
+
 class Backtest:
-    def __init__(self, data, strategy:Type[Strategy]):
+    def __init__(self, data, strategy:Type[Strategy], lookback_view:bool=False, bar_records:bool=False,
+                 indicator_cache:IndicatorCache=None, warmup:int=None, incremental:bool=False,
+                 verbosity:int=VERBOSE, profile:bool=False, profile_apply=None, indicator_workers:int=None):
+        '''
+        Backtest(data, strategy, lookback_view=False, bar_records=False, indicator_cache=None,
+                 warmup=None, incremental=False, verbosity=VERBOSE, profile=False, profile_apply=None,
+                 indicator_workers=None)
+
+        data: A DataFrame, or an iterable of DataFrame chunks to stream through the backtest
+              (see StreamData). In streaming mode the indicators are recomputed for every chunk
+              over the chunk and the rows kept from previous chunks.
+
+        lookback_view: When True, the Strategy's apply() receives a zero-copy LookbackWindow
+                       (see Data.window) as lookback data instead of a DataFrame slice.
+        bar_records: When True, the Strategy's apply() receives each row as a compact record
+                     (see Data._next_record) instead of a pandas Series. Records can be indexed
+                     by column name just like a Series row.
+        indicator_cache: IndicatorCache used to reuse indicator results between runs, e.g.
+                         cache.default_cache, the cache shared by the whole process. Default = None
+                         to always recompute the indicators. Only pass a cache for indicators whose
+                         f() depends on nothing but their constructor arguments.
+        warmup: Streaming mode only. Number of rows kept from previous chunks in addition to the
+                Strategy's lookback, so that indicators are warmed up at the start of each chunk
+                (e.g. 99 for a 100-period SMA). Default = None for the largest Indicator.warmup of
+                the indicators computed per chunk; a ValueError is raised if one of them does not
+                know its warmup, rather than have it start over from NaN at every chunk.
+        incremental: When True, indicators that implement update() are computed one row at a time
+                     as the backtest reaches each row, instead of over the whole data up front.
+                     Their state carries over from one streamed chunk to the next. Indicators
+                     computed from other indicators are still computed up front.
+        verbosity: Output written to the 'backtester' logger (see log.py) during the run:
+                   log.QUIET for none, log.SUMMARY for the strategy, indicators and final balance,
+                   and log.VERBOSE (default) for every filled order amount as well.
+        profile: When True, the wall time and number of calls of every phase of the run (indicators,
+                 next row, lookback data, apply, process_order, ...) are accumulated in a PhaseTimer
+                 (see the 'profile' property) and a breakdown table is output at the end of the run.
+                 Profiling uses a separate row loop, so it costs nothing when disabled.
+        profile_apply: 'cprofile' to run a cProfile.Profile on the Strategy's apply() calls only, or any
+                       profiler object with enable() and disable() methods. Implies profile=True.
+                       The profiler is available through the 'apply_profiler' property.
+        indicator_workers: Number of threads computing independent indicators at the same time
+                           (see pipeline.IndicatorGraph). Default = None for one per CPU; 1 computes
+                           them one after another.
+        '''
+        self._lookback_view = lookback_view
+        self._verbosity = verbosity
+        self._apply_profiler = apply_profiler(profile_apply)
+        self._timer = PhaseTimer() if profile or self._apply_profiler is not None else None
+        self._incremental = incremental
+        self._bar_records = bar_records
+        self._indicator_cache = indicator_cache
+        self._indicator_workers = indicator_workers
+
         # Create Account object
         self._account = Account()
 
-        # Create iterable data object containing dataframe
-        self._data_test = Data(data)
+        self._stream = None
+        self._data_test = None
+        if not isinstance(data, pd.DataFrame):
+            # Streaming mode: the strategy is initialized on the first chunk
+            self._stream = StreamData(data)
+            data = self._stream.first
+        else:
+            # Create iterable data object containing dataframe
+            self._data_test = Data(data)
+
+        # Columns of the data before any indicator columns are added
+        self._base_columns = list(data.columns)
 
         # Store Strategy for backtest to operate on
         self._strategy = strategy
@@ -166,36 +625,384 @@ class Backtest:
         # This function is to be used to set up the Strategy
         # variables, extraneous sources, etc.
         self._strategy.init()
+
+        if self._stream is not None:
+            for indicator in self._strategy._required_indicators().values():
+                if not self._is_live(indicator):
+                    _check_rebindable(indicator, data)
+            if warmup is None:
+                warmup = self._stream_warmup()
+            self._stream.history = self._strategy.lookback + warmup
+
+    def _is_live(self, indicator:Indicator) -> bool:
+        # Updated row by row in incremental mode; indicators of indicators are computed up front
+        return self._incremental and indicator.incremental and not indicator.inputs
+
+    def _stream_warmup(self) -> int:
+        # Rows the indicators recomputed for every chunk need from the chunks before it
+        needed = [0]
+        for indicator in self._strategy._required_indicators().values():
+            if self._is_live(indicator):
+                # Carries its state across chunks
+                continue
+            if indicator.warmup is None:
+                raise ValueError(f"Indicator {indicator.name} does not know its warmup: pass warmup= to stream "
+                                 f"it, or incremental=True if it implements update().")
+            needed.append(indicator.warmup)
+        return max(needed)
+
+    @property
+    def account(self) -> Account:
+        return self._account
+
+    @property
+    def strategy(self) -> Strategy:
+        return self._strategy
+
+    @property
+    def verbosity(self) -> int:
+        return self._verbosity
+
+    @property
+    def profile(self) -> PhaseTimer:
+        '''
+        profile
+
+        The PhaseTimer of a profiled run (see PhaseTimer.report), or None if profiling is off.
+        '''
+        return self._timer
+
+    @property
+    def apply_profiler(self):
+        '''
+        apply_profiler
+
+        The profiler attached to the Strategy's apply(), e.g. for pstats.Stats(backtest.apply_profiler).
+        '''
+        return self._apply_profiler
+
+    @verbosity.setter
+    def verbosity(self, level:int):
+        self._verbosity = level
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        '''
+        trades
+
+        The trade ledger of the run, one row per fill (see account.Recorder).
+        'bar' is the position of the row the order was filled on.
+        '''
+        return self._with_datetime(self._account.trades)
+
+    @property
+    def equity(self) -> pd.DataFrame:
+        '''
+        equity
+
+        The equity curve of the run, one row per bar (see account.Recorder).
+        '''
+        return self._with_datetime(self._account.equity)
+
+    def stats(self, periods_per_year:int=252, risk_free:float=0.0) -> pd.Series:
+        '''
+        stats(periods_per_year=252, risk_free=0.0)
+
+        Performance statistics of the run, computed from its equity curve and trade ledger.
+        See stats.summary.
+        '''
+        equity = self._account.equity
+        table = stats.summary(equity['equity'], holdings=equity['holdings'], trades=self._account.trades,
+                              periods_per_year=periods_per_year, risk_free=risk_free)
+        return table.iloc[0].rename(self._strategy.name)
+
+    def _with_datetime(self, df:pd.DataFrame) -> pd.DataFrame:
+        # Streamed data is not kept, so those results only have bar positions
+        if self._data_test is None or 'datetime' not in self._data_test._data.columns:
+            return df
+        df.insert(1, 'datetime', self._data_test._data['datetime'].to_numpy()[df['bar'].to_numpy()])
+        return df
     
-    def run(self):
-        print(f"BACKTESTING STRATEGY: {self._strategy.name}...")
+    def run(self, vectorized:bool=False):
+        '''
+        run(vectorized=False)
+
+        Runs the backtest. By default the Strategy's apply() is called on every row.
+        When 'vectorized' is True, the Strategy's signals() is called once instead and
+        all MARKET orders are filled in a single pass over the signal arrays.
+        '''
+        try:
+            self._run(vectorized)
+            if self._timer is not None:
+                self._summary("%s", self._timer)
+        finally:
+            # Output is buffered during the run
+            flush()
+
+    def _summary(self, message:str, *args):
+        if self._verbosity >= SUMMARY:
+            logger.info(message, *args)
+
+    def _timed(self, phase:str, f, *args, **kwargs):
+        if self._timer is None:
+            return f(*args, **kwargs)
+        return self._timer.time(phase, f, *args, **kwargs)
+
+    def _evaluate(self, graph:IndicatorGraph, cache:IndicatorCache) -> dict:
+        # Evaluates every indicator of the graph; profiled as one 'indicators' call per node
+        if self._timer is None:
+            return graph.evaluate(cache=cache, max_workers=self._indicator_workers)
+
+        start = perf_counter_ns()
+        results = graph.evaluate(cache=cache, max_workers=self._indicator_workers)
+        if len(graph) > 0:
+            self._timer.add('indicators', perf_counter_ns() - start, len(graph))
+        return results
+
+    def _run(self, vectorized:bool):
+        self._summary("BACKTESTING STRATEGY: %s...", self._strategy.name)
+
+        if self._stream is not None:
+            if vectorized:
+                raise ValueError("Vectorized mode is not available for streamed data.")
+            if self._strategy._timeframes:
+                raise ValueError("Higher timeframes are not available for streamed data.")
+            self._run_stream()
+            return
+
+        # The higher-timeframe bars follow the rows as they are reached
+        for timeframe in self._strategy._timeframes.values():
+            timeframe._bind(self._data_test)
+
+        # The indicators the strategy reads are evaluated as a dependency graph (see
+        # pipeline.IndicatorGraph) and added to the dataframe as one block of columns.
+        # Incremental indicators are instead computed row by row, as the rows are reached.
+        indicators = self._strategy._required_indicators()
+        # Indicators computed from other indicators are always computed up front
+        live = []
+        if self._incremental and not vectorized:
+            live = [i for i in indicators.values() if i.incremental and not i.inputs]
+
+        batch = [i for i in indicators.values() if i not in live]
+        results = self._evaluate(IndicatorGraph(batch), self._indicator_cache)
+        self._data_test.add_columns({name: results.get(name, np.nan) for name in indicators})
+        self._strategy.data = self._data_test._data
+
+        for indicator in live:
+            indicator.reset()
+            self._data_test.add_live_column(indicator.name)
+        for name in indicators:
+            self._summary("     INDICATOR ADDED: %s", name)
+
+        if vectorized:
+            self._run_vectorized()
+            return
 
-        # Each indicator has an 'f' function defined by the Indicator implementation
-        # that defines how the Series is built. This cycles through each indicator, runs
-        # it's 'f' function, and adds it to the dataframe as a column.
-        for i in self._strategy.indicators:
-            self._data_test.add_column(i, self._strategy.run_indicator(i))
-            print(f"     INDICATOR ADDED: {i}")
-        
         # Iterate through the data one at a time.
-        self._data_test._init()
+        self._data_test._init(records=self._bar_records)
+        self._run_rows(self._data_test, live)
+        self._data_test._commit_live()
         
-        while(self._data_test._has_next()):
+        self._summary("%s", self._account.balance)
+
+    def _run_rows(self, data:Data, live:list):
+        '''
+        _run_rows(data, live)
+
+        Applies the strategy to every remaining row of 'data', updating the incremental
+        indicators in 'live' first.
+        '''
+        if self._timer is not None:
+            self._run_rows_profiled(data, live)
+            return
+
+        # _run_rows_profiled() is a timed copy of this loop: any change here must go into both
+
+        next_data = data._next_record if self._bar_records else data._next
+        lookback_data = data.window if self._lookback_view else data.data
+        # Open positions are valued at the close of each bar in the equity curve
+        has_close = 'close' in data._data.columns
+        account = self._account
+        # Decided once, so a quiet run does no logging work per row
+        report = self._verbosity >= VERBOSE
+        
+        while(data._has_next()):
             # Obtain the current data value
-            current_data = self._data_test._next()
+            current_data = next_data()
+
+            if live:
+                current_data = data._update_live(current_data, live)
+
+            # Fill the resting limit and stop orders reached by this bar
+            if self._account.has_pending:
+                self._process_bar(current_data)
 
             # Obtain the 'lookback' number of past values for Strategy
-            past_k_data = self._data_test.data(lookback = self._strategy.lookback)
+            past_k_data = lookback_data(lookback = self._strategy.lookback)
 
             # Apply the strategy at this point in the data
             # obtain the Order type produced by the strategy
             order = self._strategy.apply(current_data, past_k_data)
 
             # Send order to brokerage account for processing
-            order_amount = self._account.process_order(order)
+            order_amount = account.process_order(order)
             
-            if order_amount != 0:
-                print(order_amount)
-        
-        print(self._account.balance)
-        
\ No newline at end of file
+            if order_amount != 0 and report:
+                logger.info("%s", order_amount)
+
+            account.end_bar(current_data['close'] if has_close else np.nan)
+
+    def _run_rows_profiled(self, data:Data, live:list):
+        '''
+        _run_rows_profiled(data, live)
+
+        Same as _run_rows(), timing every phase of every row with the run's PhaseTimer.
+        Any change to the loop must go into both.
+        '''
+        next_data = data._next_record if self._bar_records else data._next
+        lookback_data = data.window if self._lookback_view else data.data
+        has_close = 'close' in data._data.columns
+        account = self._account
+        report = self._verbosity >= VERBOSE
+        profiler = self._apply_profiler
+
+        # Phase -> total nanoseconds; added to the timer once the loop is done
+        phases = ['next', 'live', 'pending', 'lookback', 'apply', 'process_order', 'log', 'record']
+        ns = dict.fromkeys(phases, 0)
+        rows = 0
+        pending = 0
+        logged = 0
+
+        while(data._has_next()):
+            t0 = perf_counter_ns()
+            current_data = next_data()
+            t1 = perf_counter_ns()
+            ns['next'] += t1 - t0
+
+            if live:
+                current_data = data._update_live(current_data, live)
+                t0 = perf_counter_ns()
+                ns['live'] += t0 - t1
+
+            if account.has_pending:
+                t0 = perf_counter_ns()
+                self._process_bar(current_data)
+                ns['pending'] += perf_counter_ns() - t0
+                pending += 1
+
+            t0 = perf_counter_ns()
+            past_k_data = lookback_data(lookback = self._strategy.lookback)
+            t1 = perf_counter_ns()
+            ns['lookback'] += t1 - t0
+
+            if profiler is not None:
+                profiler.enable()
+                try:
+                    order = self._strategy.apply(current_data, past_k_data)
+                finally:
+                    # Never leave the profiler installed in the process
+                    profiler.disable()
+            else:
+                order = self._strategy.apply(current_data, past_k_data)
+            t0 = perf_counter_ns()
+            ns['apply'] += t0 - t1
+
+            order_amount = account.process_order(order)
+            t1 = perf_counter_ns()
+            ns['process_order'] += t1 - t0
+
+            if order_amount != 0 and report:
+                logger.info("%s", order_amount)
+                t0 = perf_counter_ns()
+                ns['log'] += t0 - t1
+                t1 = t0
+                logged += 1
+
+            account.end_bar(current_data['close'] if has_close else np.nan)
+            ns['record'] += perf_counter_ns() - t1
+            rows += 1
+
+        calls = {'live': rows if live else 0, 'pending': pending, 'log': logged}
+        for phase in phases:
+            n = calls.get(phase, rows)
+            if n > 0:
+                self._timer.add(phase, ns[phase], n)
+
+    def _process_bar(self, bar):
+        '''
+        _process_bar(bar)
+
+        Matches the account's resting orders against the bar's high and low.
+        Requires the data to have 'high' and 'low' columns.
+        '''
+        fills = self._account.process_bar(float(bar['high']), float(bar['low']), float(bar['open']))
+        if self._verbosity >= VERBOSE:
+            for _, order_amount in fills:
+                if order_amount != 0:
+                    logger.info("%s", order_amount)
+
+    def _run_stream(self):
+        indicators = self._strategy._required_indicators()
+        live = [i for i in indicators.values() if self._is_live(i)]
+        batch = [i for i in indicators.values() if i not in live]
+
+        for name in indicators:
+            self._summary("     INDICATOR ADDED: %s", name)
+        for indicator in live:
+            indicator.reset()
+
+        for frame, start in self._stream.frames():
+            data = Data(frame)
+
+            # Batch indicators are bound to the series they were constructed with, so they are
+            # rebuilt on the new frame. Chunks are not worth caching.
+            rebound = {}
+            graph = IndicatorGraph([_rebind(indicator, frame, rebound) for indicator in batch])
+            results = self._evaluate(graph, None)
+            data.add_columns({name: results.get(name, np.nan) for name in indicators})
+            self._strategy.data = data._data
+            for indicator in live:
+                data.add_live_column(indicator.name)
+
+            data._init(records=self._bar_records, start=start)
+            self._run_rows(data, live)
+            data._commit_live()
+
+        self._summary("%s", self._account.balance)
+
+    def _run_vectorized(self):
+        # The strategy's dataframe now holds the indicator columns as well.
+        entries, exits, entry_prices, exit_prices = self._timed('signals', self._strategy.signals, self._strategy.data)
+
+        data = self._strategy.data
+        mark_prices = data['close'] if 'close' in data.columns else None
+        amounts, _ = self._timed('process_signals', self._account.process_signals, entries, exits,
+                                 entry_prices, exit_prices, shares=self._strategy.shares, mark_prices=mark_prices)
+
+        if self._verbosity >= VERBOSE:
+            for order_amount in amounts[amounts != 0].tolist():
+                logger.info("%s", order_amount)
+
+        self._summary("%s", self._account.balance)
+
+    def optimize(self, param_grid:dict, metric='balance', n_jobs:int=None, maximize:bool=True,
+                 vectorized:bool=False) -> pd.DataFrame:
+        '''
+        optimize(param_grid, metric='balance', n_jobs=None, maximize=True, vectorized=False)
+
+        Runs a fresh copy of this backtest's Strategy for every combination of parameters in
+        'param_grid' (name -> list of values) across a pool of 'n_jobs' processes, and returns
+        the results as a DataFrame ranked by 'metric'. See optimizer.optimize for details.
+
+        The price data is shared with the worker processes through memory-mapped files.
+        '''
+        import optimizer
+
+        if self._stream is not None:
+            raise ValueError("Optimization is not available for streamed data.")
+
+        data = self._data_test._data[self._base_columns]
+
+        return optimizer.optimize(data, type(self._strategy), param_grid, metric=metric, n_jobs=n_jobs,
+                                  maximize=maximize, vectorized=vectorized,
+                                  lookback_view=self._lookback_view, bar_records=self._bar_records)
@@ -0,0 +1,398 @@
+import os
+import json
+from time import perf_counter
+from argparse import ArgumentParser
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import constants as consts
+from database import Database, table_name, typed_dataframe
+from utility.structures import Panel
+
+# On-disk layout of a table: one raw little-endian file per column and a header describing them
+_FORMAT_VERSION = 1
+_HEADER = "header.json"
+_DATETIME_DTYPE = np.dtype('<i8')       # Nanoseconds since the epoch
+_VALUE_DTYPE = np.dtype('<f8')
+_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class BarStore:
+    """
+    BarStore
+
+    Storage backend keeping every <ticker>_1<timeframe> table as fixed-width column files: the
+    datetimes as int64 nanoseconds and each OHLCV column as float64, plus a small JSON header with
+    the row count, columns and datetime range. Tables are opened with np.memmap, so loading one
+    copies nothing: the dataframes are views of the files, paged in by the OS on first access and
+    shared by every process that opens the same table.
+
+    The read API follows Database (connect, get_dataframe, get_dataframes, iter_dataframes,
+    get_panel) and returns typed dataframes, like Database.get_dataframe with cache=True.
+    Tables are written with write() or converted from a Database with convert().
+    """
+    def __init__(self, path=consts._BARSTORE_PATH):
+        self._path = Path(path)
+        self._connected = False
+        # Table -> (header, datetimes, {column: values}) of the tables opened so far
+        self._tables = {}
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def is_connected(self):
+        return self._connected
+
+    def connect(self):
+        """
+        Opens the store, creating its directory if needed.
+        """
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._connected = True
+
+    def disconnect(self):
+        if self._connected:
+            # The maps are closed once the last dataframe viewing them is gone
+            self._tables = {}
+            self._connected = False
+            return 0
+        return -1
+
+    def _check_connected(self):
+        if not self._connected:
+            raise Exception("Connect to the bar store before performing this action.")
+
+    def _table_path(self, table:str) -> Path:
+        return self._path / table.upper()
+
+    def tables(self) -> list:
+        """
+        Returns the names of the tables in the store, e.g. ['QQQ_1DAY', 'SPY_1MIN'].
+        """
+        self._check_connected()
+        return sorted(p.name for p in self._path.iterdir() if (p / _HEADER).exists())
+
+    def has_table(self, ticker:str, timeframe:str=consts._DAY) -> bool:
+        self._check_connected()
+        return (self._table_path(table_name(ticker, timeframe)) / _HEADER).exists()
+
+    def header(self, ticker:str, timeframe:str=consts._DAY) -> dict:
+        """
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+
+        Returns the header of the ticker's table: format version, rows, columns and the first
+        and last datetimes. Raises ValueError if the store has no such table.
+        """
+        return self._open(ticker, timeframe)[0]
+
+    def table_columns(self, ticker:str, timeframe:str=consts._DAY) -> list:
+        return ['datetime'] + self.header(ticker, timeframe)['columns']
+
+    def _read_header(self, table:str) -> dict:
+        try:
+            with open(self._table_path(table) / _HEADER) as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"No table {table} in {self._path}.") from None
+        if header.get('version') != _FORMAT_VERSION:
+            raise ValueError(f"Table {table} has format version {header.get('version')}, expected {_FORMAT_VERSION}.")
+        return header
+
+    def _map(self, path:Path, dtype:np.dtype, rows:int) -> np.ndarray:
+        if rows == 0:
+            # Empty files cannot be memory-mapped
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+    def _open(self, ticker:str, timeframe:str):
+        self._check_connected()
+        table = table_name(ticker, timeframe).upper()
+        header = self._read_header(table)
+
+        opened = self._tables.get(table)
+        if opened is not None and opened[0] == header:
+            return opened
+
+        # Either not opened yet or rewritten since: map the current files
+        path = self._table_path(table)
+        rows = header['rows']
+        datetimes = self._map(path / "datetime.bin", _DATETIME_DTYPE, rows).view('datetime64[ns]')
+        columns = {column: self._map(path / f"{column}.bin", _VALUE_DTYPE, rows) for column in header['columns']}
+
+        opened = (header, datetimes, columns)
+        self._tables[table] = opened
+        return opened
+
+    def _slice(self, datetimes:np.ndarray, start, end, limit:int) -> slice:
+        # The datetimes are sorted, so date ranges are two binary searches
+        lo = 0 if start is None else int(np.searchsorted(datetimes, np.datetime64(pd.Timestamp(start), 'ns'), side='left'))
+        hi = len(datetimes) if end is None else int(np.searchsorted(datetimes, np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return slice(lo, max(lo, hi))
+
+    def get_dataframe(self, params={}, ticker="", timeframe=consts._DAY, columns=[], start=None, end=None,
+                      limit:int=None) -> pd.DataFrame:
+        """
+        params: dict with 'ticker', 'timeframe' and 'columns' keys (and optionally 'start', 'end' and
+                'limit'), used instead of the arguments below.
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        columns: Specify the column names you wish to extract. Default = [] for all columns.
+        start: Only load rows at or after this datetime (anything pd.Timestamp accepts).
+        end: Only load rows at or before this datetime.
+        limit: Load at most this many rows, starting from the earliest.
+
+        Returns float64 columns indexed by a datetime64 'datetime' index, all of them read-only
+        views of the memory-mapped files.
+        """
+        if len(params) > 0:
+            ticker = params['ticker']
+            timeframe = params['timeframe']
+            columns = params['columns']
+            start = params.get('start', start)
+            end = params.get('end', end)
+            limit = params.get('limit', limit)
+
+        header, datetimes, values = self._open(ticker, timeframe)
+        for column in columns:
+            if column != 'datetime' and column not in values:
+                raise ValueError(f"No column {column} in table {header['table']}.")
+
+        rows = self._slice(datetimes, start, end, limit)
+        names = [c for c in columns if c != 'datetime'] if len(columns) > 0 else header['columns']
+        index = pd.DatetimeIndex(datetimes[rows], name='datetime', copy=False)
+
+        return pd.DataFrame({name: values[name][rows] for name in names}, index=index, copy=False)
+
+    def get_dataframes(self, tickers:list, timeframe=consts._DAY, columns=[], start=None, end=None,
+                       limit:int=None, panel:bool=False):
+        """
+        tickers: Tickers of the stocks to load.
+        panel: When True, returns a Panel of the tables (see get_panel) instead of a dict.
+        The other arguments are those of get_dataframe, applied to every table.
+
+        Returns a dict of ticker -> dataframe, in the order of 'tickers'. Opening a table only maps
+        its files, so there is nothing to gain from loading them in parallel.
+        """
+        if len(tickers) == 0:
+            raise ValueError("No tickers given.")
+
+        if panel:
+            return self.get_panel(tickers, timeframe, fields=[c for c in columns if c != 'datetime'] or None,
+                                  start=start, end=end, limit=limit)
+
+        return {ticker: self.get_dataframe(ticker=ticker, timeframe=timeframe, columns=columns, start=start,
+                                           end=end, limit=limit)
+                for ticker in dict.fromkeys(tickers)}
+
+    def iter_dataframes(self, params={}, ticker="", timeframe=consts._DAY, columns=[], start=None, end=None,
+                        limit:int=None, chunksize:int=100000):
+        """
+        Same arguments as get_dataframe, plus:
+        chunksize: Number of rows per dataframe.
+
+        Returns a generator of dataframes of at most 'chunksize' rows each, in datetime order.
+        The chunks are views of the mapped files, so only the pages they touch are read.
+        """
+        if type(chunksize) != int or chunksize <= 0:
+            raise ValueError("Chunk size must be a positive int.")
+
+        df = self.get_dataframe(params, ticker, timeframe, columns, start, end, limit)
+        return (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+
+    def get_panel(self, tickers:list, timeframe=consts._DAY, fields=['open', 'high', 'low', 'close', 'volume'],
+                  start=None, end=None, limit:int=None) -> Panel:
+        """
+        tickers: Tickers of the stocks to load.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        fields: Columns to load for every ticker. Default = open, high, low, close and volume.
+        start: Only load rows at or after this datetime.
+        end: Only load rows at or before this datetime.
+        limit: Load at most this many rows of each ticker, starting from its earliest.
+
+        Returns a Panel of the tickers aligned on the union of their datetimes, with NaN where
+        a ticker has no row for a datetime.
+        """
+        if fields is None:
+            fields = list(_COLUMNS)
+        fields = [f for f in fields if f != 'datetime']
+        frames = self.get_dataframes(tickers, timeframe, columns=fields, start=start, end=end, limit=limit)
+        return Panel.from_frames(frames, fields=fields)
+
+    def write(self, ticker:str, timeframe:str, df:pd.DataFrame) -> dict:
+        """
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data.
+        df: Bars with a 'datetime' column or a datetime index, and any of the open, high, low,
+            close and volume columns.
+
+        Writes the bars as the ticker's table, replacing any existing one, sorted by datetime and
+        without duplicate datetimes (the last row of a datetime is kept). Returns a report with
+        the table, rows, seconds and rows_per_second.
+        """
+        self._check_connected()
+        started = perf_counter()
+
+        if 'datetime' in df.columns:
+            df = typed_dataframe(df)
+        elif isinstance(df.index, pd.DatetimeIndex):
+            df = typed_dataframe(df.reset_index(names='datetime'))
+        else:
+            raise ValueError("Bars need a 'datetime' column or a datetime index.")
+
+        if not df.index.is_monotonic_increasing or not df.index.is_unique:
+            df = df[~df.index.duplicated(keep='last')].sort_index(kind='stable')
+
+        table = table_name(ticker, timeframe).upper()
+        with _TableWriter(self._table_path(table), table, [c for c in _COLUMNS if c in df.columns]) as writer:
+            writer.append(df)
+
+        return self._report(table, writer.rows, started)
+
+    def convert(self, database:Database, ticker:str, timeframe:str=consts._DAY, chunksize:int=1000000) -> dict:
+        """
+        database: Connected Database holding the table.
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        chunksize: Rows read from SQLite at a time, which bounds the memory used.
+
+        Copies the ticker's table (TEXT or typed layout) from the database into the store,
+        replacing any existing copy. As with write(), the last row of a duplicate datetime is
+        kept, whatever the chunksize. Returns a report like write().
+        """
+        self._check_connected()
+        started = perf_counter()
+
+        available = database.table_columns(ticker, timeframe)
+        if 'datetime' not in available:
+            raise ValueError(f"Table {table_name(ticker, timeframe)} has no datetime column.")
+        columns = [c for c in _COLUMNS if c in available]
+
+        table = table_name(ticker, timeframe).upper()
+        chunks = database.iter_dataframes(ticker=ticker, timeframe=timeframe, columns=['datetime'] + columns,
+                                          chunksize=chunksize)
+        with _TableWriter(self._table_path(table), table, columns) as writer:
+            # Rows come in datetime order, so duplicates are next to each other. The last row of
+            # every chunk is held back until the next chunk shows whether its datetime repeats.
+            held = None
+            for chunk in chunks:
+                df = typed_dataframe(chunk)
+                if held is not None:
+                    df = pd.concat([held, df])
+                df = df[~df.index.duplicated(keep='last')]
+                writer.append(df.iloc[:-1])
+                held = df.iloc[-1:]
+            if held is not None:
+                writer.append(held)
+
+        return self._report(table, writer.rows, started)
+
+    def _report(self, table:str, rows:int, started:float) -> dict:
+        # Rewritten tables are mapped again on their next load
+        self._tables.pop(table, None)
+        seconds = perf_counter() - started
+        return {'table': table, 'rows': rows, 'seconds': seconds,
+                'rows_per_second': rows / seconds if seconds > 0 else float('inf')}
+
+
+class _TableWriter:
+    """
+    Writes the column files of one table next to their final names and moves them into place,
+    header last, when closed without error. Readers still mapping the previous files keep them.
+    """
+    def __init__(self, path:Path, table:str, columns:list):
+        self._path = path
+        self._table = table
+        self._columns = columns
+        self._files = {}
+        self._first = None
+        self._last = None
+        self.rows = 0
+
+    def __enter__(self):
+        self._path.mkdir(parents=True, exist_ok=True)
+        for name in ['datetime'] + self._columns:
+            self._files[name] = open(self._path / f"{name}.tmp.bin", 'wb')
+        return self
+
+    def append(self, df:pd.DataFrame):
+        if len(df) == 0:
+            return
+        datetimes = df.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        if (self._last is not None and datetimes[0] <= self._last) or (np.diff(datetimes) <= 0).any():
+            raise ValueError(f"Rows of {self._table} are not in datetime order.")
+
+        self._files['datetime'].write(datetimes.astype(_DATETIME_DTYPE, copy=False).tobytes())
+        for column in self._columns:
+            self._files[column].write(df[column].to_numpy(dtype=_VALUE_DTYPE).tobytes())
+
+        if self._first is None:
+            self._first = int(datetimes[0])
+        self._last = int(datetimes[-1])
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        for f in self._files.values():
+            f.close()
+
+        if exc_type is not None:
+            for name in self._files:
+                os.remove(self._path / f"{name}.tmp.bin")
+            return False
+
+        # Files of columns the new version does not have are left behind unreferenced
+        for name in self._files:
+            os.replace(self._path / f"{name}.tmp.bin", self._path / f"{name}.bin")
+
+        def isoformat(ns):
+            return None if ns is None else pd.Timestamp(ns).isoformat()
+
+        header = {
+            'version': _FORMAT_VERSION,
+            'table': self._table,
+            'rows': self.rows,
+            'columns': self._columns,
+            'datetime_dtype': _DATETIME_DTYPE.str,
+            'value_dtype': _VALUE_DTYPE.str,
+            'first': isoformat(self._first),
+            'last': isoformat(self._last),
+        }
+        tmp = self._path / f"{_HEADER}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp, self._path / _HEADER)
+        return False
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Convert tables of the backtester's SQLite database into the bar store.")
+    parser.add_argument('--db-name', default='stock_database.db')
+    parser.add_argument('--db-path', default=str(consts._DATABASE_PATH))
+    parser.add_argument('--store-path', default=str(consts._BARSTORE_PATH))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="Copy a table from the database into the bar store.")
+    convert.add_argument('ticker')
+    convert.add_argument('timeframe', choices=[consts._DAY, consts._MIN], type=str.upper)
+
+    args = parser.parse_args(argv)
+
+    database = Database(db_name=args.db_name, db_path=Path(args.db_path))
+    store = BarStore(Path(args.store_path))
+    database.connect()
+    store.connect()
+    try:
+        report = store.convert(database, args.ticker, args.timeframe)
+    finally:
+        store.disconnect()
+        database.disconnect()
+
+    print(f"{report['table']}: {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+'''
+Database.get_dataframe from SQLite and from the columnar cache vs BarStore.get_dataframe from
+the memory-mapped column files.
+
+Usage: python benchmarks/bench_barstore.py [rows]
+'''
+import sys
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from barstore import BarStore
+from database import Database
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+def timed(f):
+    start = perf_counter()
+    result = f()
+    return perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        conn = sqlite3.connect(directory / 'stock_database.db')
+        write_sqlite_table(conn, 'SPY', 'MIN', generate_ohlcv(rows, freq='min'))
+        conn.close()
+
+        database = Database(db_path=directory, cache_path=directory / 'cache')
+        store = BarStore(directory / 'bars')
+        database.connect()
+        store.connect()
+
+        sql, _ = timed(lambda: database.get_dataframe(ticker='SPY', timeframe='MIN'))
+        database.get_dataframe(ticker='SPY', timeframe='MIN', cache=True)
+        cached, _ = timed(lambda: database.get_dataframe(ticker='SPY', timeframe='MIN', cache=True))
+        converted, report = timed(lambda: store.convert(database, 'SPY', 'MIN'))
+        mapped, df = timed(lambda: store.get_dataframe(ticker='SPY', timeframe='MIN'))
+        summed, _ = timed(lambda: df['close'].sum())
+
+        store.disconnect()
+        database.disconnect()
+
+    print(f"rows: {rows}")
+    print(f"SQLite (TEXT columns):      {sql * 1000:9.1f} ms")
+    print(f"columnar cache, warm:       {cached * 1000:9.1f} ms")
+    print(f"convert to bar store:       {converted * 1000:9.1f} ms  ({report['rows_per_second']:,.0f} rows/s)")
+    print(f"bar store load:             {mapped * 1000:9.3f} ms  ({sql / mapped:,.0f}x faster than SQLite)")
+    print(f"touch close column:         {summed * 1000:9.1f} ms")
@@ -0,0 +1,49 @@
+'''
+Database.get_dataframe from SQLite vs the on-disk columnar cache.
+
+Usage: python benchmarks/bench_database_cache.py [rows]
+'''
+import sys
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from database import Database
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+def timed(f):
+    start = perf_counter()
+    result = f()
+    return perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        conn = sqlite3.connect(directory / 'stock_database.db')
+        write_sqlite_table(conn, 'SPY', 'MIN', generate_ohlcv(rows, freq='min'))
+        conn.close()
+
+        database = Database(db_path=directory, cache_path=directory / 'cache')
+        database.connect()
+
+        sql, _ = timed(lambda: database.get_dataframe(ticker='SPY', timeframe='MIN'))
+        cold, _ = timed(lambda: database.get_dataframe(ticker='SPY', timeframe='MIN', cache=True))
+        warm, df = timed(lambda: database.get_dataframe(ticker='SPY', timeframe='MIN', cache=True))
+        summed, _ = timed(lambda: df['close'].sum())
+
+        database.disconnect()
+
+    print(f"rows: {rows}")
+    print(f"SQLite (TEXT columns):      {sql * 1000:9.1f} ms")
+    print(f"cache build (first load):   {cold * 1000:9.1f} ms")
+    print(f"cache warm load:            {warm * 1000:9.1f} ms")
+    print(f"touch close column:         {summed * 1000:9.1f} ms")
@@ -0,0 +1,53 @@
+'''
+Database.get_dataframe one ticker after another vs Database.get_dataframes loading them
+concurrently through the read-only connection pool.
+
+The reads release the GIL inside SQLite, so the speedup grows with the number of cores.
+
+Usage: python benchmarks/bench_database_pool.py [tickers] [rows]
+'''
+import sys
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from database import Database
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+def timed(f):
+    start = perf_counter()
+    result = f()
+    return perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    tickers = [f"T{i:03d}" for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        conn = sqlite3.connect(directory / 'stock_database.db')
+        for seed, ticker in enumerate(tickers):
+            write_sqlite_table(conn, ticker, 'MIN', generate_ohlcv(rows, freq='min', seed=seed))
+        conn.close()
+
+        database = Database(db_path=directory, cache_path=directory / 'cache')
+        database.connect()
+
+        sequential, _ = timed(lambda: {t: database.get_dataframe(ticker=t, timeframe='MIN') for t in tickers})
+        pooled, _ = timed(lambda: database.get_dataframes(tickers, timeframe='MIN'))
+        connections = len(database.pool)
+
+        database.disconnect()
+
+    print(f"tickers: {n}, rows each: {rows}, cpus: {os.cpu_count()}")
+    print(f"get_dataframe, sequential:  {sequential * 1000:9.1f} ms")
+    print(f"get_dataframes, pooled:     {pooled * 1000:9.1f} ms  ({connections} connections)")
+    print(f"speedup:                    {sequential / pooled:9.2f}x")
@@ -0,0 +1,77 @@
+'''
+Indicator kernels of kernels.py vs pandas: its rolling and ewm builtins, and rolling().apply with
+a Python function per window, which is what custom indicators fall back to. Runs on one series
+and on a bars x tickers frame.
+
+Usage: python benchmarks/bench_kernels.py [rows] [tickers] [window]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+import kernels
+
+
+def timed(f, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def cases(df, k):
+    x = df.to_numpy()
+    alpha = 2.0 / (k + 1)
+    return [
+        ("rolling max", lambda: df.rolling(k).max(), lambda: kernels.rolling_max(x, k)),
+        ("rolling min", lambda: df.rolling(k).min(), lambda: kernels.rolling_min(x, k)),
+        ("rolling mean", lambda: df.rolling(k).mean(), lambda: kernels.rolling_mean(x, k)),
+        ("rolling std", lambda: df.rolling(k).std(), lambda: kernels.rolling_std(x, k)),
+        ("ema", lambda: df.ewm(alpha=alpha, adjust=False).mean(), lambda: kernels.ema(x, alpha)),
+        ("rsi", lambda: rsi(df, k), lambda: kernels.rsi(x, k)),
+        ("bollinger", lambda: bollinger(df, k), lambda: kernels.bollinger(x, k)),
+    ]
+
+
+def rsi(df, k):
+    change = df.diff()
+    gain = change.clip(lower=0).ewm(alpha=1.0 / k, adjust=False, min_periods=k).mean()
+    loss = (-change.clip(upper=0)).ewm(alpha=1.0 / k, adjust=False, min_periods=k).mean()
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def bollinger(df, k):
+    mean = df.rolling(k).mean()
+    std = df.rolling(k).std(ddof=0)
+    return mean, mean + 2 * std, mean - 2 * std
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    tickers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    rng = np.random.default_rng(0)
+    series = pd.DataFrame(100.0 + rng.standard_normal((rows, 1)).cumsum(axis=0))
+    panel = pd.DataFrame(100.0 + rng.standard_normal((rows // tickers, tickers)).cumsum(axis=0))
+
+    for label, df in ((f"1 series x {rows} rows", series), (f"{tickers} tickers x {rows // tickers} rows", panel)):
+        print(f"{label}, window {k}:")
+        for name, naive, kernel in cases(df, k):
+            builtin = timed(naive)
+            vectorized = timed(kernel)
+            print(f"  {name:13s} pandas {builtin * 1000:8.1f} ms   kernel {vectorized * 1000:8.1f} ms  ({builtin / vectorized:.2f}x)")
+
+    # Python per window, as a custom rolling indicator would be written without a kernel
+    small = series.iloc[:rows // 20, 0]
+    apply = timed(lambda: small.rolling(k).apply(np.max, raw=True), repeat=1)
+    vectorized = timed(lambda: kernels.rolling_max(small.to_numpy(), k))
+    print(f"rolling().apply(np.max), {len(small)} rows: {apply * 1000:.1f} ms vs kernel {vectorized * 1000:.1f} ms "
+          f"({apply / vectorized:.0f}x)")
@@ -0,0 +1,47 @@
+'''
+Throughput of a backtest with frequent fills, quiet (log.QUIET) vs verbose (log.VERBOSE,
+every fill logged). Verbose output is written to os.devnull.
+
+Usage: python benchmarks/bench_logging.py [rows]
+'''
+import sys
+import os
+import contextlib
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from log import QUIET, VERBOSE
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+class FastCrossover(SMACrossover):
+    # Short periods, so that orders are filled every few bars
+    fast = 2
+    slow = 5
+
+
+def measure(data, verbosity):
+    backtest = bt.Backtest(data.copy(), FastCrossover(), bar_records=True, lookback_view=True,
+                           indicator_cache=None, verbosity=verbosity)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = perf_counter()
+        backtest.run()
+        elapsed = perf_counter() - start
+    return elapsed, len(backtest.trades)
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    data = generate_ohlcv(rows, freq='min')
+
+    verbose_time, fills = measure(data, VERBOSE)
+    quiet_time, _ = measure(data, QUIET)
+
+    print(f"rows: {rows}, fills: {fills}")
+    print(f"verbose: {verbose_time:.2f}s ({rows / verbose_time:,.0f} rows/s)")
+    print(f"quiet:   {quiet_time:.2f}s ({rows / quiet_time:,.0f} rows/s)")
+    print(f"speedup: {verbose_time / quiet_time:.2f}x")
@@ -0,0 +1,32 @@
+'''
+Per-row cost of Data.data() (DataFrame slices) vs Data.window() (zero-copy views)
+as the dataset grows. The window cost should stay flat.
+
+Usage: python benchmarks/bench_lookback.py
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from utility.synthetic import generate_ohlcv
+
+CALLS = 5000
+
+
+def per_call(f, lookback):
+    start = perf_counter()
+    for _ in range(CALLS):
+        f(lookback=lookback)['close']
+    return (perf_counter() - start) / CALLS * 1e6
+
+
+if __name__ == '__main__':
+    print(f"{'rows':>10} {'lookback':>9} {'data() us':>10} {'window() us':>12}")
+    for rows in (10000, 100000, 1000000):
+        data = bt.Data(generate_ohlcv(rows, freq='min'))
+        for lookback in (0, 50):
+            print(f"{rows:>10} {lookback:>9} {per_call(data.data, lookback):>10.2f} {per_call(data.window, lookback):>12.3f}")
@@ -0,0 +1,71 @@
+'''
+Many strategies over the same data: one Backtest per strategy vs a MultiBacktest running them
+all in a single pass. The strategies are SMA crossovers over a grid of periods, so most of their
+indicators are shared. Also times a MultiBacktest of strategies whose apply() does nothing, as
+the floor of one data pass.
+
+Usage: python benchmarks/bench_multi.py [rows] [strategies]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from log import QUIET
+from multi import MultiBacktest
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+class Idle(bt.Strategy):
+    def init(self):
+        self._name = "Idle"
+
+    def apply(self, current_data, lookback_data):
+        return None
+
+
+def make_strategies(n):
+    strategies = []
+    fasts = (5, 10, 20, 30)
+    for i in range(n):
+        strategy = SMACrossover()
+        strategy.fast = fasts[i % len(fasts)]
+        strategy.slow = 50 + 25 * (i // len(fasts))
+        strategies.append(strategy)
+    return strategies
+
+
+def timed(f):
+    start = perf_counter()
+    f()
+    return perf_counter() - start
+
+
+def separate(df, n):
+    for strategy in make_strategies(n):
+        bt.Backtest(df, strategy, bar_records=True, lookback_view=True, indicator_cache=None, verbosity=QUIET).run()
+
+
+def single_pass(df, n):
+    MultiBacktest(df, make_strategies(n), bar_records=True, lookback_view=True, indicator_cache=None, verbosity=QUIET).run()
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    df = generate_ohlcv(rows)
+
+    backtests = timed(lambda: separate(df, n))
+    multi = timed(lambda: single_pass(df, n))
+    floor = timed(lambda: MultiBacktest(df, [Idle()], bar_records=True, lookback_view=True, verbosity=QUIET).run())
+    idle = timed(lambda: MultiBacktest(df, [Idle() for _ in range(n)], bar_records=True, lookback_view=True, verbosity=QUIET).run())
+
+    print(f"rows: {rows}, strategies: {n}")
+    print(f"one Backtest per strategy:     {backtests * 1000:9.1f} ms")
+    print(f"MultiBacktest, single pass:    {multi * 1000:9.1f} ms  ({backtests / multi:.2f}x)")
+    print(f"one data pass, 1 idle apply:   {floor * 1000:9.1f} ms")
+    print(f"one data pass, {n} idle applies: {idle * 1000:9.1f} ms")
@@ -0,0 +1,37 @@
+'''
+Scaling of Backtest.optimize across worker processes.
+
+Usage: python benchmarks/bench_optimize.py [rows] [max_jobs]
+'''
+import sys
+import os
+import io
+import contextlib
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+GRID = {'fast': [5, 10, 15, 20, 25, 30, 35, 40], 'slow': [50, 100, 150, 200]}
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    backtest = bt.Backtest(generate_ohlcv(rows), SMACrossover())
+
+    print(f"rows: {rows}, variants: {len(GRID['fast']) * len(GRID['slow'])}, cpus: {os.cpu_count()}")
+    baseline = None
+    n_jobs = 1
+    while n_jobs <= max_jobs:
+        start = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            backtest.optimize(GRID, n_jobs=n_jobs)
+        elapsed = perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"n_jobs={n_jobs:>3}: {elapsed:.2f}s, speedup {baseline / elapsed:.2f}x, efficiency {baseline / elapsed / n_jobs:.0%}")
+        n_jobs *= 2
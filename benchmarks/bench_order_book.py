@@ -0,0 +1,70 @@
+'''
+Matching bars against 100k resting limit/stop orders: the price-sorted OrderBook vs
+scanning every open order on every bar.
+
+Usage: python benchmarks/bench_order_book.py [orders] [bars]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+from account import OrderBook
+from orders import buy, short, _LIMIT, _STOP, _BUY, _COVER
+from utility.synthetic import generate_ohlcv
+
+
+def make_orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(1.0, 300.0, n)
+    makers = [(buy, _LIMIT), (short, _LIMIT), (buy, _STOP), (short, _STOP)]
+    return [makers[i % 4][0](makers[i % 4][1], shares=1, price=float(p)) for i, p in enumerate(prices)]
+
+
+def scan(orders, high, low):
+    # Reference: check every open order against the bar
+    fills, resting = [], []
+    for order in orders:
+        buy_side = order.direction in (_BUY, _COVER)
+        if order.order_type == _LIMIT:
+            hit = order.price >= low if buy_side else order.price <= high
+        else:
+            hit = order.price <= high if buy_side else order.price >= low
+        (fills if hit else resting).append(order)
+    return fills, resting
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    data = generate_ohlcv(bars, seed=1)
+    highs, lows = data['high'].to_numpy(), data['low'].to_numpy()
+    orders = make_orders(n)
+
+    book = OrderBook()
+    start = perf_counter()
+    for order in orders:
+        book.add(order)
+    add_time = perf_counter() - start
+
+    start = perf_counter()
+    book_fills = sum(len(book.match(h, l)) for h, l in zip(highs.tolist(), lows.tolist()))
+    book_time = perf_counter() - start
+
+    resting = list(orders)
+    start = perf_counter()
+    scan_fills = 0
+    for h, l in zip(highs.tolist(), lows.tolist()):
+        fills, resting = scan(resting, h, l)
+        scan_fills += len(fills)
+    scan_time = perf_counter() - start
+
+    assert book_fills == scan_fills
+    print(f"resting orders: {n}, bars: {bars}, fills: {book_fills}")
+    print(f"order book: add {add_time:.3f}s, match {book_time * 1e6 / bars:.1f} us/bar")
+    print(f"full scan:  match {scan_time * 1e6 / bars:.1f} us/bar")
+    print(f"speedup: {scan_time / book_time:.0f}x")
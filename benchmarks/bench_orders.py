@@ -0,0 +1,61 @@
+'''
+Per-order construction cost: the previous Order (no __slots__, list membership checks), the
+validating Order() and buy() helper, and the unvalidated Order.trusted() constructor.
+
+Usage: python benchmarks/bench_orders.py [orders]
+'''
+import sys
+import os
+from timeit import timeit
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import orders as o
+
+
+class LegacyOrder:
+    # Order.__init__ as it was before __slots__ and the frozenset checks
+    def __init__(self, direction, order_type, shares:int, price:float, ticker:str=""):
+        if direction not in [o._BUY, o._SELL, o._SHORT, o._COVER]:
+            raise ValueError('Direction must be valid direction value as specified in orders file.')
+        if order_type not in [o._MARKET, o._LIMIT, o._STOP]:
+            raise ValueError('Order type must be market, limit, or stop')
+        if type(shares) != int:
+            raise TypeError('Shares must be int type.')
+        if shares <= 0:
+            raise ValueError('Shares must be positive')
+        if type(price) != float:
+            raise TypeError('Price must be float type.')
+        if price <= 0.00:
+            raise ValueError('Price must be a positive float value.')
+        self._ticker = ticker
+        self._direction = direction
+        self._order_type = order_type
+        self._shares = shares
+        self._price = price
+        self._submitted = None
+        self._processed = None
+
+
+def legacy_buy(order_type=o._MARKET, shares=1, price=1.00, ticker=""):
+    return LegacyOrder(direction=o._BUY, order_type=order_type, shares=shares, price=price, ticker=ticker)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    cases = {
+        'previous buy()': lambda: legacy_buy(o._MARKET, shares=1, price=10.0),
+        'buy()': lambda: o.buy(o._MARKET, shares=1, price=10.0),
+        'Order()': lambda: o.Order(o._BUY, o._MARKET, 1, 10.0),
+        'Order.trusted()': lambda: o.Order.trusted(o._BUY, o._MARKET, 1, 10.0),
+    }
+
+    print(f"orders: {n}")
+    for name, make in cases.items():
+        print(f"{name:>16}: {timeit(make, number=n) * 1e9 / n:.0f} ns/order")
+
+    legacy = LegacyOrder(o._BUY, o._MARKET, 1, 10.0)
+    print(f"{'memory':>16}: {sys.getsizeof(legacy) + sys.getsizeof(legacy.__dict__)} -> "
+          f"{sys.getsizeof(o.buy())} bytes/order")
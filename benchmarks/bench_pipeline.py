@@ -0,0 +1,75 @@
+'''
+Indicators computed one at a time and inserted column by column (the previous Backtest
+behaviour) vs an IndicatorGraph evaluated on a thread pool and added in one concat.
+
+The set of indicators repeats some of them under other names, which the graph computes once.
+Thread pool speedups need more than one core.
+
+Usage: python benchmarks/bench_pipeline.py [rows] [workers]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import indicators as ind
+from backtest import Data
+from pipeline import IndicatorGraph
+from utility.synthetic import generate_ohlcv
+
+
+def make_indicators(df):
+    close = df['close']
+    indicators = []
+    for period in (5, 10, 20, 50, 100, 200):
+        indicators.append(ind.SMA(f"SMA {period}", period, close))
+        indicators.append(ind.EMA(f"EMA {period}", period, close))
+        indicators.append(ind.RollingStd(f"STD {period}", period, close))
+    # Duplicates of the above, as strategies combining signals tend to have
+    for period in (20, 50):
+        indicators.append(ind.SMA(f"trend {period}", period, close))
+    rsi = ind.RSI("RSI", 14, close)
+    indicators += [rsi, ind.SMA("RSI smoothed", 5, rsi)]
+    return indicators
+
+
+def one_at_a_time(df):
+    data = Data(df.copy())
+    for indicator in make_indicators(df):
+        # Inputs computed by hand, as strategies had to before
+        if indicator.inputs:
+            indicator = indicator._bind_inputs({id(i): i.f() for i in indicator.inputs})
+        data.add_column(indicator.name, indicator.f())
+    return data
+
+
+def graph(df, workers):
+    data = Data(df.copy())
+    data.add_columns(IndicatorGraph(make_indicators(df)).evaluate(max_workers=workers))
+    return data
+
+
+def timed(f):
+    best = float('inf')
+    for _ in range(3):
+        start = perf_counter()
+        f()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    df = generate_ohlcv(rows, freq='min')
+
+    sequential = timed(lambda: one_at_a_time(df))
+    single = timed(lambda: graph(df, 1))
+    pooled = timed(lambda: graph(df, workers))
+
+    print(f"rows: {rows}, indicators: {len(make_indicators(df))}, cpus: {os.cpu_count()}")
+    print(f"one at a time, add_column:    {sequential * 1000:9.1f} ms")
+    print(f"graph, 1 worker, one concat:  {single * 1000:9.1f} ms  ({sequential / single:.2f}x)")
+    print(f"graph, {workers} workers:            {pooled * 1000:9.1f} ms  ({sequential / pooled:.2f}x)")
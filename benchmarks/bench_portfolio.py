@@ -0,0 +1,50 @@
+'''
+Portfolio backtest of many tickers over one aligned Panel vs one Backtest per ticker.
+The per-ticker loops are timed on a sample of the tickers and scaled up to the whole universe.
+
+Usage: python benchmarks/bench_portfolio.py [tickers] [bars] [sample]
+'''
+import sys
+import os
+import io
+import contextlib
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from portfolio import PortfolioBacktest
+from utility.structures import Panel
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover, PortfolioCrossover
+
+
+if __name__ == '__main__':
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 2520
+    sample = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+
+    frames = {f"T{i:03d}": generate_ohlcv(bars, seed=i) for i in range(tickers)}
+
+    start = perf_counter()
+    panel = Panel.from_frames(frames)
+    build_time = perf_counter() - start
+
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        PortfolioBacktest(panel, PortfolioCrossover(), indicator_cache=None).run()
+    panel_time = perf_counter() - start
+
+    options = {'bar_records': True, 'lookback_view': True, 'indicator_cache': None}
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for df in list(frames.values())[:sample]:
+            bt.Backtest(df.copy(), SMACrossover(), **options).run()
+    loop_time = (perf_counter() - start) * tickers / min(sample, tickers)
+
+    print(f"tickers: {tickers}, bars: {bars}")
+    print(f"panel build:          {build_time:.2f}s")
+    print(f"portfolio backtest:   {panel_time:.2f}s")
+    print(f"per-ticker backtests: {loop_time:.2f}s (estimated from {min(sample, tickers)} tickers)")
+    print(f"speedup: {loop_time / panel_time:.1f}x")
@@ -0,0 +1,41 @@
+'''
+Per-bar cost of recording the equity curve, and per-fill cost of the trade ledger.
+
+Usage: python benchmarks/bench_recorder.py [bars]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from account import Account
+from orders import buy, short, _MARKET
+
+
+if __name__ == '__main__':
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    account = Account()
+    start = perf_counter()
+    for _ in range(bars):
+        pass
+    empty = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(bars):
+        account.end_bar(100.0)
+    equity_time = perf_counter() - start - empty
+
+    orders = [buy(_MARKET, shares=1, price=100.0), short(_MARKET, shares=1, price=101.0)]
+    fills = bars // 10
+    start = perf_counter()
+    for i in range(fills):
+        account.process_order(orders[i % 2])
+    fill_time = perf_counter() - start
+
+    account.equity, account.trades
+    print(f"bars: {bars}")
+    print(f"equity curve: {equity_time * 1e9 / bars:.0f} ns/bar")
+    print(f"process_order + trade ledger: {fill_time * 1e9 / fills:.0f} ns/fill")
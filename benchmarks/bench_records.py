@@ -0,0 +1,36 @@
+'''
+Backtest.run throughput with pandas Series rows vs compact bar records.
+
+Usage: python benchmarks/bench_records.py [rows]
+'''
+import sys
+import os
+import io
+import contextlib
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+def time_run(data, **options):
+    backtest = bt.Backtest(data.copy(), SMACrossover(), **options)
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtest.run()
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data = generate_ohlcv(rows, freq='min')
+
+    for label, options in (("series rows", {}),
+                           ("bar records", {'bar_records': True}),
+                           ("bar records + lookback view", {'bar_records': True, 'lookback_view': True})):
+        elapsed = time_run(data, **options)
+        print(f"{label:>28}: {elapsed:.3f}s ({rows / elapsed:,.0f} bars/s)")
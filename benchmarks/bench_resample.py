@@ -0,0 +1,43 @@
+'''
+resample.resample_ohlcv vs DataFrame.resample().agg() on minute bars, the higher-timeframe
+index map, and a cache hit.
+
+Usage: python benchmarks/bench_resample.py [rows]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+from resample import ResampleCache, completed_bars, resample_ohlcv
+from utility.synthetic import generate_ohlcv
+
+_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def best_of(repeat, f):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    df = generate_ohlcv(rows, start="2000-01-03 09:30", freq='min')
+    indexed = df.set_index('datetime')
+    cache = ResampleCache()
+
+    print(f"rows: {rows}")
+    for rule in ['5min', '1h', '1D']:
+        pandas = best_of(3, lambda: indexed.resample(rule).agg(_AGG).dropna())
+        numpy = best_of(3, lambda: resample_ohlcv(indexed, rule))
+        mapped = best_of(3, lambda: completed_bars(df['datetime'].to_numpy(), rule))
+        cache.get('SPY', lambda: indexed, rule)
+        cached = best_of(3, lambda: cache.get('SPY', lambda: indexed, rule))
+        print(f"{rule:>5}: pandas {pandas * 1000:8.1f} ms   resample_ohlcv {numpy * 1000:8.1f} ms "
+              f"({pandas / numpy:4.1f}x)   index map {mapped * 1000:6.1f} ms   cached {cached * 1e6:6.1f} us")
@@ -0,0 +1,37 @@
+'''
+Statistics of many equity curves at once (one (bars x runs) matrix) vs one curve at a time.
+
+Usage: python benchmarks/bench_stats.py [bars] [runs]
+'''
+import sys
+import os
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import stats
+
+
+if __name__ == '__main__':
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 2520
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    rng = np.random.default_rng(0)
+    equity = 1e6 * np.cumprod(1.0 + rng.normal(0.0003, 0.01, (bars, runs)), axis=0)
+
+    start = perf_counter()
+    table = stats.summary(equity)
+    matrix_time = perf_counter() - start
+
+    sample = min(runs, 200)
+    start = perf_counter()
+    for j in range(sample):
+        stats.summary(equity[:, j])
+    loop_time = (perf_counter() - start) * runs / sample
+
+    print(f"bars: {bars}, runs: {runs}")
+    print(f"matrix:   {matrix_time:.2f}s")
+    print(f"per run:  {loop_time:.2f}s (estimated from {sample} runs)")
+    print(table.describe().loc[['mean', 'min', 'max'], ['cagr', 'sharpe', 'max_drawdown']])
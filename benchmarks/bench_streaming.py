@@ -0,0 +1,51 @@
+'''
+Peak traced memory of a full in-memory backtest vs a streamed (chunked) one.
+Streamed peak memory should depend on the chunk size, not on the number of rows.
+
+Usage: python benchmarks/bench_streaming.py [rows] [chunksize]
+'''
+import sys
+import os
+import io
+import contextlib
+import tracemalloc
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+def chunks(rows, chunksize):
+    # Generated lazily, like Database.iter_dataframes reading from SQLite
+    for i, start in enumerate(range(0, rows, chunksize)):
+        chunk = generate_ohlcv(min(chunksize, rows - start), seed=i)
+        chunk['datetime'] += (chunk['datetime'].iloc[1] - chunk['datetime'].iloc[0]) * start
+        yield chunk
+
+
+def measure(make_backtest):
+    tracemalloc.start()
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        make_backtest().run()
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    options = {'bar_records': True, 'lookback_view': True, 'indicator_cache': None}
+
+    full_time, full_peak = measure(lambda: bt.Backtest(generate_ohlcv(rows), SMACrossover(), **options))
+    stream_time, stream_peak = measure(lambda: bt.Backtest(chunks(rows, chunksize), SMACrossover(), warmup=99, **options))
+
+    print(f"rows: {rows}, chunksize: {chunksize}")
+    print(f"in memory: {full_time:.2f}s, peak {full_peak:.1f} MiB")
+    print(f"streamed:  {stream_time:.2f}s, peak {stream_peak:.1f} MiB")
@@ -0,0 +1,38 @@
+'''
+Event loop vs vectorized signal mode for the SMA crossover strategy.
+
+Usage: python benchmarks/bench_vectorized.py [rows]
+'''
+import sys
+import os
+import io
+import contextlib
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import backtest as bt
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+def time_run(data, vectorized):
+    backtest = bt.Backtest(data.copy(), SMACrossover())
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtest.run(vectorized=vectorized)
+    return perf_counter() - start, backtest._account.balance
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = generate_ohlcv(rows, freq='min')
+
+    loop_time, loop_balance = time_run(data, vectorized=False)
+    vec_time, vec_balance = time_run(data, vectorized=True)
+
+    print(f"rows: {rows}")
+    print(f"event loop: {loop_time:.3f}s ({rows / loop_time:,.0f} bars/s)")
+    print(f"vectorized: {vec_time:.4f}s ({rows / vec_time:,.0f} bars/s)")
+    print(f"speedup: {loop_time / vec_time:.0f}x, balances equal: {loop_balance == vec_balance}")
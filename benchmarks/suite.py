@@ -0,0 +1,210 @@
+'''
+Benchmark suite of the backtest engine on synthetic data.
+
+Times Database.get_dataframe (SQLite and cached), the built-in indicators, Backtest.run in its
+row, record and vectorized modes, and Account.process_order, for every requested table size.
+Results are written as JSON, so that runs of two commits can be compared:
+
+    python benchmarks/suite.py --sizes 10000 100000 --output before.json
+    python benchmarks/suite.py --sizes 10000 100000 --output after.json --compare before.json
+
+Usage: python benchmarks/suite.py [--sizes N ...] [--repeat R] [--output FILE] [--compare FILE]
+'''
+import sys
+import os
+import json
+import sqlite3
+import platform
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+import backtest as bt
+import indicators as ind
+from account import Account
+from database import Database
+from log import QUIET
+from orders import Order, _BUY, _SHORT, _MARKET
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+from utility.strategies import SMACrossover
+
+# The row-by-row modes are slow on large tables; they are only timed up to these sizes
+_MAX_SERIES_ROWS = 100000
+_MAX_RECORD_ROWS = 2000000
+_MAX_ORDERS = 1000000
+
+
+def best_of(repeat:int, f) -> float:
+    '''
+    best_of(repeat, f)
+
+    Runs f() 'repeat' times and returns the fastest time in seconds.
+    '''
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def bench_database(rows:int, repeat:int, directory:Path) -> dict:
+    # Daily dates run out of range past a few hundred thousand rows, so large tables are minutes
+    timeframe = 'DAY' if rows <= 50000 else 'MIN'
+    df = generate_ohlcv(rows, freq='B' if timeframe == 'DAY' else 'min')
+
+    conn = sqlite3.connect(directory / 'stock_database.db')
+    write_sqlite_table(conn, 'SPY', timeframe, df)
+    conn.close()
+
+    database = Database(db_path=directory, cache_path=directory / 'cache')
+    database.connect()
+    try:
+        results = {
+            'database.get_dataframe': best_of(repeat, lambda: database.get_dataframe(ticker='SPY', timeframe=timeframe)),
+        }
+        # The first load builds the cache
+        database.get_dataframe(ticker='SPY', timeframe=timeframe, cache=True)
+        results['database.get_dataframe(cache=True)'] = best_of(
+            repeat, lambda: database.get_dataframe(ticker='SPY', timeframe=timeframe, cache=True))
+    finally:
+        database.disconnect()
+
+    return results
+
+
+def bench_indicators(df:pd.DataFrame, repeat:int) -> dict:
+    close = df['close']
+    indicators = [ind.SMA('SMA', 50, close), ind.EMA('EMA', 50, close), ind.RollingStd('STD', 50, close),
+                  ind.RSI('RSI', 14, close)]
+    return {f"indicator.{type(i).__name__}": best_of(repeat, i.f) for i in indicators}
+
+
+def bench_backtest(df:pd.DataFrame, repeat:int) -> dict:
+    def run(vectorized=False, **options):
+        backtest = bt.Backtest(df.copy(), SMACrossover(), indicator_cache=None, verbosity=QUIET, **options)
+        backtest.run(vectorized=vectorized)
+
+    rows = len(df)
+    results = {'backtest.run(vectorized=True)': best_of(repeat, lambda: run(vectorized=True))}
+    if rows <= _MAX_RECORD_ROWS:
+        results['backtest.run(bar_records=True)'] = best_of(repeat, lambda: run(bar_records=True, lookback_view=True))
+    if rows <= _MAX_SERIES_ROWS:
+        # A single run: this mode takes long enough to time reliably
+        results['backtest.run'] = best_of(1, run)
+    return results
+
+
+def bench_process_order(n:int, repeat:int) -> dict:
+    orders = [Order.trusted(_BUY, _MARKET, 1, 100.0), Order.trusted(_SHORT, _MARKET, 1, 101.0)]
+
+    def run():
+        account = Account()
+        process_order = account.process_order
+        for i in range(n):
+            process_order(orders[i & 1])
+
+    return {'account.process_order': best_of(repeat, run)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=parent, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes:list, repeat:int) -> dict:
+    results = {}
+
+    def record(rows:int, timings:dict):
+        for name, seconds in timings.items():
+            # 'rows' counts orders for the order benchmarks
+            results[f"{name}@{rows}"] = {'name': name, 'rows': rows, 'seconds': seconds,
+                                         'per_second': rows / seconds if seconds > 0 else None}
+            print(f"{name:>40} {rows:>10}: {seconds * 1000:10.1f} ms  {rows / seconds:>14,.0f} /s")
+
+    for rows in sizes:
+        df = generate_ohlcv(rows, freq='min')
+        with tempfile.TemporaryDirectory(prefix="backtester-bench-") as directory:
+            record(rows, bench_database(rows, repeat, Path(directory)))
+        record(rows, bench_indicators(df, repeat))
+        record(rows, bench_backtest(df, repeat))
+        n = min(rows, _MAX_ORDERS)
+        record(n, bench_process_order(n, repeat))
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'sizes': sizes,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline:dict, current:dict, threshold:float) -> list:
+    '''
+    compare(baseline, current, threshold)
+
+    Prints the change in time of every benchmark found in both result sets and returns the keys
+    of those that got slower by more than 'threshold' (e.g. 0.1 for 10%).
+    '''
+    regressions = []
+    print(f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('time')}):")
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        change = result['seconds'] / before['seconds'] - 1.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f"{result['name']:>40} {result['rows']:>10}: {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(description="Benchmark suite of the backtest engine on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="Table sizes in rows (10k to 10M).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark; the fastest is kept.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare with.")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Slowdown reported as a regression when comparing. Default = 0.10.")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
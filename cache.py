@@ -0,0 +1,214 @@
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Default memory cap of an IndicatorCache, in bytes
+_DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _digest(values:np.ndarray) -> str:
+    dtype = str(values.dtype)
+    if values.dtype.kind == 'O':
+        values = pd.util.hash_pandas_object(pd.Series(values.ravel()), index=False).to_numpy()
+    elif values.dtype.kind in 'mM':
+        # Datetimes cannot be exported as a buffer, their integer view can; the unit stays in 'dtype'
+        values = np.ascontiguousarray(values).view(np.int64)
+    h = hashlib.sha1(usedforsecurity=False)
+    h.update(dtype.encode())
+    h.update(str(values.shape).encode())
+    h.update(np.ascontiguousarray(values).data)
+    return h.hexdigest()
+
+
+def _index_fingerprint(index:pd.Index):
+    if isinstance(index, pd.RangeIndex):
+        return ('range', index.start, index.stop, index.step)
+    return ('index', _digest(np.asarray(index)))
+
+
+def fingerprint(value):
+    '''
+    fingerprint(value)
+
+    Returns a hashable fingerprint of an indicator argument. Series, DataFrames and arrays
+    are fingerprinted by a hash of their contents, so equal data gives equal fingerprints
+    no matter which object holds it.
+
+    Returns None when the value cannot be fingerprinted reliably.
+    '''
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return value
+    if isinstance(value, pd.Series):
+        return ('series', value.name, _index_fingerprint(value.index), _digest(value.to_numpy()))
+    if isinstance(value, pd.DataFrame):
+        columns = tuple(fingerprint(value[c]) for c in value.columns)
+        if any(c is None for c in columns):
+            return None
+        return ('frame', tuple(value.columns), columns)
+    if isinstance(value, np.ndarray):
+        return ('array', _digest(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        items = tuple(fingerprint(v) for v in value)
+        if any(i is None and v is not None for i, v in zip(items, value)):
+            return None
+        return (type(value).__name__, items)
+    if isinstance(value, dict):
+        items = tuple((k, fingerprint(v)) for k, v in sorted(value.items(), key=lambda kv: repr(kv[0])))
+        if any(i is None and value[k] is not None for k, i in items):
+            return None
+        return ('dict', items)
+
+    return None
+
+
+def _size_of(result) -> int:
+    if isinstance(result, (pd.Series, pd.DataFrame)):
+        return int(np.sum(result.memory_usage(index=True, deep=False)))
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return sys.getsizeof(result)
+
+
+class IndicatorCache:
+    '''
+    IndicatorCache
+
+    Memoizes Indicator.f() results. Entries are keyed on the indicator's class, its
+    constructor arguments and a hash of any Series/array arguments, and are evicted least
+    recently used first once the cached results take up more than 'max_bytes'.
+
+    Indicators are assumed to be deterministic: the same arguments give the same result.
+    Cached results are shared between callers and must not be modified in place.
+    The cache can be used from several threads at once.
+    '''
+    def __init__(self, max_bytes:int=_DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("Cache size cannot be less than zero.")
+
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, n:int):
+        if n < 0:
+            raise ValueError("Cache size cannot be less than zero.")
+        self._max_bytes = n
+        self._evict()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self) -> dict:
+        '''
+        info
+
+        Returns the cache counters as a dict.
+        '''
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self._max_bytes,
+        }
+
+    def clear(self):
+        '''
+        clear
+
+        Removes every cached result and resets the counters.
+        '''
+        self._entries.clear()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, indicator):
+        '''
+        key(indicator)
+
+        Returns the cache key of 'indicator', or None if its arguments cannot be fingerprinted.
+        '''
+        args = fingerprint(getattr(indicator, '_args', ()))
+        kwargs = fingerprint(getattr(indicator, '_kwargs', {}))
+        if args is None or kwargs is None:
+            return None
+
+        cls = type(indicator)
+        return (cls.__module__, cls.__qualname__, args, kwargs)
+
+    def get(self, indicator, key=None):
+        '''
+        get(indicator, key=None)
+
+        Returns the result of indicator.f(), computing and storing it on a miss. 'key' replaces
+        the key of the indicator (see key()) when the caller already knows what identifies it.
+        '''
+        if key is None:
+            key = self.key(indicator)
+        if key is None:
+            with self._lock:
+                self._misses += 1
+            return indicator.f()
+
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self._misses += 1
+
+        # Computed outside the lock, so that other threads can use the cache meanwhile
+        result = indicator.f()
+        size = _size_of(result)
+
+        with self._lock:
+            if size <= self._max_bytes and key not in self._entries:
+                self._entries[key] = (result, size)
+                self._bytes += size
+                self._evict()
+
+        return result
+
+    def _evict(self):
+        while self._bytes > self._max_bytes and len(self._entries) > 0:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+
+
+# Cache shared by every Backtest in this process unless told otherwise
+default_cache = IndicatorCache()
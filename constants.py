@@ -4,3 +4,5 @@ from pathlib import Path as p
 _DATABASE_PATH = p.cwd().parent / "data"
 _MIN = "MIN"
 _DAY = "DAY"
+_CACHE_PATH = _DATABASE_PATH / "cache"
+_BARSTORE_PATH = _DATABASE_PATH / "bars"
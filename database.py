@@ -1,17 +1,38 @@
+import os
+import json
 import sqlite3
-from argparse import ArgumentError
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from argparse import ArgumentError, ArgumentParser
+from pathlib import Path
+import numpy as np
 import pandas as pd
 import constants as consts
+from resample import ResampleCache, default_resample_cache, resample_ohlcv
+from utility.structures import Panel
 
-def generate_query_select_string(ticker:str, timeframe:str=consts._DAY, columns:list=[]):
+def table_name(ticker:str, timeframe:str=consts._DAY) -> str:
     """
     ticker: Ticker of the stock.
     timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
-    columns: Specify the column names you wish to extract. Default = [] for all columns.
+
+    Returns the name of the table holding the ticker's data, e.g. SPY_1DAY.
     """
     if timeframe.upper() != consts._DAY and timeframe.upper() != consts._MIN:
         raise ArgumentError(None, "timeframe should be 'MIN' or 'DAY'")
 
+    return f"{ticker}_1{timeframe.upper()}"
+
+def generate_query_select_string(ticker:str, timeframe:str=consts._DAY, columns:list=[]):
+    """
+    ticker: Ticker of the stock.
+    timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+    columns: Specify the column names you wish to extract. Default = [] for all columns.
+    """
+    table = table_name(ticker, timeframe)
+
     query = ""
     if len(columns)>0:
         col_str = ""
@@ -19,21 +40,310 @@ def generate_query_select_string(ticker:str, timeframe:str=consts._DAY, columns:
             col_str += (column + ", ")
 
         col_str = col_str[:len(col_str)-2]
-        query = f"""SELECT {col_str} FROM {ticker}_1{timeframe.upper()}"""
+        query = f"""SELECT {col_str} FROM {table}"""
 
         return query
 
-    return f"""SELECT * FROM {ticker}_1{timeframe.upper()}"""
+    return f"""SELECT * FROM {table}"""
+
+def quote_identifier(name:str) -> str:
+    """
+    name: Table or column name.
+
+    Returns the name quoted for use in an SQL statement.
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+def generate_query_select(table:str, columns:list=[], start=None, end=None, limit:int=None):
+    """
+    table: Name of the table to select from.
+    columns: Specify the column names you wish to extract. Default = [] for all columns.
+    start: Only select rows with datetime >= start. Default = None for no lower bound.
+    end: Only select rows with datetime <= end. Default = None for no upper bound.
+    limit: Select at most this many rows. Default = None for no limit.
+
+    Returns a parameterized query and its parameters. The start and end values are bound
+    as given, so they must already be in the table's datetime format.
+    """
+    col_str = "*"
+    if len(columns) > 0:
+        col_str = ", ".join(quote_identifier(column) for column in columns)
+
+    query = f"SELECT {col_str} FROM {quote_identifier(table)}"
+    params = []
+
+    conditions = []
+    if start is not None:
+        conditions.append("datetime >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("datetime <= ?")
+        params.append(end)
+    if len(conditions) > 0:
+        query += " WHERE " + " AND ".join(conditions)
+
+    if start is not None or end is not None or limit is not None:
+        query += " ORDER BY datetime"
+    if limit is not None:
+        check_limit(limit)
+        query += " LIMIT ?"
+        params.append(limit)
+
+    return query, params
+
+def check_limit(limit:int):
+    """
+    limit: Row limit of a query, or None for no limit.
+
+    Raises ValueError unless the limit is None or a non-negative int.
+    """
+    if limit is not None and (type(limit) != int or limit < 0):
+        raise ValueError("Limit must be a non-negative int.")
+
+def to_datetime64(values) -> np.ndarray:
+    """
+    values: Datetimes as 'YYYY-MM-DD[ HH:MM]' strings (TEXT tables) or epoch seconds (typed tables).
+
+    Returns the values as a datetime64[ns] array.
+    """
+    values = pd.Series(values)
+    if values.dtype.kind in 'iuf':
+        return pd.to_datetime(values, unit='s').to_numpy(dtype='datetime64[ns]')
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+
+def to_epoch(values) -> np.ndarray:
+    """
+    values: Datetimes, as strings or datetime64 values.
+
+    Returns the values as int64 epoch seconds, the key of the typed tables.
+    """
+    return to_datetime64(values).astype('datetime64[s]').astype(np.int64)
+
+def typed_dataframe(df:pd.DataFrame) -> pd.DataFrame:
+    """
+    df: Dataframe as read from a database table.
+
+    Returns a copy of the dataframe with a datetime64 index built from the 'datetime'
+    column and every other column converted to float64.
+    """
+    columns = {}
+    for column in df.columns:
+        if column != 'datetime':
+            try:
+                # Exact conversion of the TEXT values, like float() would do
+                columns[column] = df[column].to_numpy(dtype=np.float64)
+            except (TypeError, ValueError):
+                columns[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+
+    index = None
+    if 'datetime' in df.columns:
+        index = pd.DatetimeIndex(to_datetime64(df['datetime']), name='datetime')
+
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+class ColumnarCache:
+    """
+    ColumnarCache
+
+    On-disk cache of database tables, stored as one typed .npy file per column (float64
+    values and a datetime64 index) that is memory-mapped when loaded. A cached table is
+    rebuilt whenever its row count or latest datetime in the database changes.
+    """
+    def __init__(self, path=consts._CACHE_PATH):
+        self._path = Path(path)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _table_path(self, table:str) -> Path:
+        return self._path / table.upper()
+
+    def _table_state(self, conn:sqlite3.Connection, table:str) -> list:
+        # Two separate queries: each one can be answered from the primary key index alone.
+        count = conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}").fetchone()[0]
+        latest = conn.execute(f"SELECT MAX(datetime) FROM {quote_identifier(table)}").fetchone()[0]
+        return [count, latest]
+
+    def _read_meta(self, table:str):
+        try:
+            with open(self._table_path(table) / "meta.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, conn:sqlite3.Connection, table:str) -> bool:
+        meta = self._read_meta(table)
+        return meta is not None and meta['state'] == self._table_state(conn, table)
+
+    def load(self, conn:sqlite3.Connection, table:str) -> pd.DataFrame:
+        """
+        conn: Open connection to the database holding the table.
+        table: Table name, e.g. SPY_1DAY.
+
+        Returns the whole table as a typed dataframe, from the cache when it is up to date
+        and from the database (refreshing the cache) otherwise.
+        """
+        state = self._table_state(conn, table)
+        meta = self._read_meta(table)
+
+        if meta is None or meta['state'] != state:
+            self.store(table, pd.read_sql_query(f"SELECT * FROM {quote_identifier(table)}", conn), state)
+            meta = self._read_meta(table)
+
+        path = self._table_path(table)
+        columns = {name: np.load(path / f"{i}.npy", mmap_mode='r') for i, name in enumerate(meta['columns'])}
+        index = None
+        if meta['index']:
+            index = pd.DatetimeIndex(np.load(path / "index.npy", mmap_mode='r'), name='datetime')
+
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def store(self, table:str, df:pd.DataFrame, state:list):
+        """
+        table: Table name, e.g. SPY_1DAY.
+        df: The table's rows as read from the database.
+        state: Row count and latest datetime the rows were read at.
+        """
+        path = self._table_path(table)
+        path.mkdir(parents=True, exist_ok=True)
+
+        typed = typed_dataframe(df)
+
+        # Files are written next to their final name and then moved into place, so readers
+        # that still have the previous version mapped are not affected.
+        def save(name:str, values:np.ndarray):
+            tmp = path / f"{name}.tmp.npy"
+            np.save(tmp, values)
+            os.replace(tmp, path / f"{name}.npy")
+
+        for i, column in enumerate(typed.columns):
+            save(str(i), typed[column].to_numpy())
+        if 'datetime' in df.columns:
+            save("index", typed.index.to_numpy())
+
+        meta = {'table': table, 'state': state, 'columns': list(typed.columns), 'index': 'datetime' in df.columns}
+        tmp = path / "meta.json.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path / "meta.json")
+
+    def invalidate(self, table:str):
+        try:
+            os.remove(self._table_path(table) / "meta.json")
+        except FileNotFoundError:
+            pass
+
+
+
+# Typed table layout: epoch-second integer key and numeric OHLCV columns
+_TYPED_COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+_TYPED_SCHEMA = "(datetime INTEGER PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume INTEGER)"
+
+
+def _typed_rows(df:pd.DataFrame):
+    """
+    df: Dataframe with a 'datetime' column and any of the open, high, low, close and volume columns.
+
+    Returns an iterator of row tuples in the typed table layout.
+    """
+    n = len(df)
+    columns = [to_epoch(df['datetime']).tolist()]
+    for column in _TYPED_COLUMNS[1:]:
+        if column not in df.columns:
+            columns.append([None] * n)
+            continue
+        values = pd.to_numeric(df[column], errors='coerce').astype(np.float64)
+        if column == 'volume':
+            missing = values.isna().to_numpy()
+            volume = values.fillna(0).round().astype(np.int64).tolist()
+            if missing.any():
+                volume = [None if m else v for v, m in zip(volume, missing.tolist())]
+            columns.append(volume)
+        else:
+            columns.append(values.tolist())
+
+    return zip(*columns)
+
+
+# Pragmas of the pooled read-only connections
+_MMAP_SIZE = 256 * 1024 * 1024      # Bytes of the database file memory-mapped per connection
+_CACHE_SIZE = -64 * 1024            # Page cache per connection; negative values are KiB
+
+class ConnectionPool:
+    """
+    path: Path of the SQLite database file.
+    mmap_size: Bytes of the file each connection memory-maps (PRAGMA mmap_size).
+    cache_size: Page cache size of each connection (PRAGMA cache_size; negative values are KiB).
+
+    Pool of read-only connections to one database, opened with the 'mode=ro' URI so they can
+    never write. A thread takes a connection for the duration of a read and gives it back, so
+    the pool holds as many connections as there were concurrent reads, and they are reused by
+    later reads from any thread.
+    """
+    def __init__(self, path, mmap_size:int=_MMAP_SIZE, cache_size:int=_CACHE_SIZE):
+        self._path = Path(path)
+        self._mmap_size = int(mmap_size)
+        self._cache_size = int(cache_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._connections = []
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __len__(self):
+        return len(self._connections)
+
+    def _open(self) -> sqlite3.Connection:
+        if not self._path.exists():
+            raise FileNotFoundError(f"No database file {self._path}.")
+        # Connections move between the threads of the pool, but are only used by one at a time
+        conn = sqlite3.connect(f"{self._path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size = {self._mmap_size}")
+        conn.execute(f"PRAGMA cache_size = {self._cache_size}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager lending the calling thread a read-only connection, opened if none is idle.
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+            with self._lock:
+                self._connections.append(conn)
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if conn in self._connections:
+                    self._idle.append(conn)
 
+    def close(self):
+        """
+        Closes every connection of the pool.
+        """
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._idle = []
 
 
 class Database:
-    def __init__(self, db_name='stock_database.db', db_path=consts._DATABASE_PATH):
+    def __init__(self, db_name='stock_database.db', db_path=consts._DATABASE_PATH, cache_path=consts._CACHE_PATH):
         self._name = db_name
         self._path = db_path / db_name
+        self._cache = ColumnarCache(Path(cache_path) / Path(db_name).stem)
         self._conn = None
         self._internalCursor = None
         self._cursors = {}
+        self._pool = None
     
     @property
     def is_connected(self):
@@ -50,11 +360,16 @@ class Database:
         return self._path
     
     def connect(self):
-        try:
-            self._conn = sqlite3.connect(self._path)
-            self._internalCursor = self._conn.cursor()
-        except Exception as e:
-            print(e.args)
+        """
+        Opens the connection to the database file. Raises sqlite3.Error if it cannot be opened.
+        """
+        self._conn = sqlite3.connect(self._path)
+        self._internalCursor = self._conn.cursor()
+        self._pool = ConnectionPool(self._path)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self._pool
     
     def get_connection(self):
         return self._conn
@@ -70,6 +385,8 @@ class Database:
         if self._conn != None:
             self._conn.close()
             self._conn = None
+            self._pool.close()
+            self._pool = None
             return 0
         return -1
     
@@ -77,20 +394,418 @@ class Database:
         self._internalCursor.execute(query)
         return self._internalCursor.fetchall()
     
-    def get_dataframe(self, params={}, ticker="", timeframe=consts._DAY, columns=[]):
+    @property
+    def cache(self) -> ColumnarCache:
+        return self._cache
+    
+    def table_columns(self, ticker:str, timeframe:str=consts._DAY) -> dict:
+        """
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+
+        Returns a dict of column name -> declared type of the ticker's table.
+        Raises ValueError if the database has no such table.
+        """
+        return self._resolve_table(ticker, timeframe)[1]
+
+    def _resolve_table(self, ticker:str, timeframe:str, conn:sqlite3.Connection=None):
+        # Only names of tables that actually exist ever make it into a query.
+        # Returns the table's name as stored in the database and its column types.
+        conn = conn if conn is not None else self._conn
+        name = table_name(ticker, timeframe)
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE", (name,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"No table {name} in {self._name}.")
+
+        info = conn.execute(f"PRAGMA table_info({quote_identifier(row[0])})").fetchall()
+        return row[0], {r[1]: r[2].upper() for r in info}
+
+    def _bound_timestamp(self, value, timeframe:str) -> pd.Timestamp:
+        # A start/end value at the resolution of the timeframe: the day or the minute.
+        # Every load path filters on it, so they all return the same rows.
+        if value is None:
+            return None
+        if timeframe.upper() == consts._DAY:
+            return pd.Timestamp(value).floor('D')
+        return pd.Timestamp(value).floor('min')
+
+    def _datetime_bound(self, value, timeframe:str, datetime_type:str):
+        # Converts a start/end value to the format of the table's datetime column
+        value = self._bound_timestamp(value, timeframe)
+        if value is None:
+            return None
+        if datetime_type.startswith('INT'):
+            return int(to_epoch([value])[0])
+        if timeframe.upper() == consts._DAY:
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %H:%M')
+    
+    def _check_columns(self, ticker:str, timeframe:str, columns:list, conn:sqlite3.Connection=None):
+        # Resolves the table and makes sure every requested column exists in it
+        table, table_columns = self._resolve_table(ticker, timeframe, conn)
+        for column in columns:
+            if column not in table_columns:
+                raise ValueError(f"No column {column} in table {table}.")
+        return table, table_columns
+
+    def _select_query(self, ticker:str, timeframe:str, columns:list, start, end, limit:int,
+                      conn:sqlite3.Connection=None):
+        table, table_columns = self._check_columns(ticker, timeframe, columns, conn)
+        datetime_type = table_columns.get('datetime', '')
+        return generate_query_select(table, columns,
+                                     start=self._datetime_bound(start, timeframe, datetime_type),
+                                     end=self._datetime_bound(end, timeframe, datetime_type),
+                                     limit=limit)
+
+    def _load_cached(self, table:str, timeframe:str, columns:list, start, end, limit:int,
+                     conn:sqlite3.Connection=None) -> pd.DataFrame:
+        df = self._cache.load(conn if conn is not None else self._conn, table)
+        start = self._bound_timestamp(start, timeframe)
+        end = self._bound_timestamp(end, timeframe)
+        if start is not None or end is not None:
+            lo = 0 if start is None else df.index.searchsorted(start, side='left')
+            hi = len(df) if end is None else df.index.searchsorted(end, side='right')
+            df = df.iloc[lo:hi]
+        if limit is not None:
+            df = df.iloc[:limit]
+        if len(columns) > 0:
+            df = df[[column for column in columns if column != 'datetime']]
+        return df
+    
+    def get_dataframe(self, params={}, ticker="", timeframe=consts._DAY, columns=[], cache=False,
+                      start=None, end=None, limit:int=None):
+        """
+        params: dict with 'ticker', 'timeframe' and 'columns' keys (and optionally 'cache', 'start',
+                'end' and 'limit'), used instead of the arguments below.
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        columns: Specify the column names you wish to extract. Default = [] for all columns.
+        cache: When True, the table is loaded through the on-disk columnar cache and returned
+               typed: float64 columns indexed by a datetime64 'datetime' index.
+        start: Only load rows at or after this datetime (anything pd.Timestamp accepts).
+        end: Only load rows at or before this datetime.
+        limit: Load at most this many rows, starting from the earliest.
+
+        The start, end and limit filters are applied by SQLite, so only the requested rows are read.
+        start and end are taken at the resolution of the timeframe, with or without the cache:
+        the day for 'Day' tables (so end='2020-01-31 10:00' includes all of January 31st), the
+        minute for 'Min' tables.
+        """
         if self._conn == None:
-            raise Exception(message="Connect to database before performing this action.")
+            raise Exception("Connect to database before performing this action.")
         
         if len(params) > 0:
             ticker = params['ticker']
             timeframe = params['timeframe']
             columns = params['columns']
+            cache = params.get('cache', cache)
+            start = params.get('start', start)
+            end = params.get('end', end)
+            limit = params.get('limit', limit)
+
+        return self._read_dataframe(self._conn, ticker, timeframe, columns, cache, start, end, limit)
 
-        query = generate_query_select_string(ticker, timeframe, columns)
-        df = pd.read_sql_query(query, self._conn)
+    def _read_dataframe(self, conn:sqlite3.Connection, ticker:str, timeframe:str, columns:list, cache:bool,
+                        start, end, limit:int) -> pd.DataFrame:
+        check_limit(limit)
+        if cache:
+            table = self._check_columns(ticker, timeframe, columns, conn)[0]
+            return self._load_cached(table, timeframe, columns, start, end, limit, conn)
+
+        query, query_params = self._select_query(ticker, timeframe, columns, start, end, limit, conn)
+        df = pd.read_sql_query(query, conn, params=query_params)
 
         return df
+
+    def get_dataframes(self, tickers:list, timeframe=consts._DAY, columns=[], cache=False, start=None, end=None,
+                       limit:int=None, max_workers:int=None, panel:bool=False):
+        """
+        tickers: Tickers of the stocks to load.
+        max_workers: Number of threads loading tables at the same time. Default = None for one
+                     per CPU, at most one per ticker.
+        panel: When True, returns a Panel of the tables (see get_panel) instead of a dict.
+        The other arguments are those of get_dataframe, applied to every table.
+
+        Loads the tables concurrently, each thread reading through a read-only connection from the
+        pool. Returns a dict of ticker -> dataframe, in the order of 'tickers'.
+        """
+        if self._conn == None:
+            raise Exception("Connect to database before performing this action.")
+
+        if len(tickers) == 0:
+            raise ValueError("No tickers given.")
+
+        if panel:
+            return self.get_panel(tickers, timeframe, fields=[c for c in columns if c != 'datetime'] or None,
+                                  cache=cache, start=start, end=end, limit=limit, max_workers=max_workers)
+
+        # Tables in the cache are built on first load; make sure that happens once per table
+        tickers = list(dict.fromkeys(tickers))
+        if max_workers is None:
+            # Building the dataframes holds the GIL, so more threads than cores only contend
+            max_workers = min(len(tickers), os.cpu_count() or 1)
+
+        def load(ticker):
+            with self._pool.connection() as conn:
+                return self._read_dataframe(conn, ticker, timeframe, columns, cache, start, end, limit)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backtester-db") as executor:
+            frames = list(executor.map(load, tickers))
+
+        return dict(zip(tickers, frames))
     
 
+    def iter_dataframes(self, params={}, ticker="", timeframe=consts._DAY, columns=[], cache=False,
+                        start=None, end=None, limit:int=None, chunksize:int=100000):
+        """
+        Same arguments as get_dataframe, plus:
+        chunksize: Number of rows per dataframe.
+
+        Returns a generator of dataframes of at most 'chunksize' rows each, in datetime order,
+        so a table can be processed without loading all of it into memory at once.
+        Use it as the data of a Backtest to stream through a table.
+        """
+        if self._conn == None:
+            raise Exception("Connect to database before performing this action.")
+
+        if type(chunksize) != int or chunksize <= 0:
+            raise ValueError("Chunk size must be a positive int.")
+
+        if len(params) > 0:
+            ticker = params['ticker']
+            timeframe = params['timeframe']
+            columns = params['columns']
+            cache = params.get('cache', cache)
+            start = params.get('start', start)
+            end = params.get('end', end)
+            limit = params.get('limit', limit)
+
+        check_limit(limit)
+        if cache:
+            # The cached table is memory-mapped, so chunks are just views of it
+            table = self._check_columns(ticker, timeframe, columns)[0]
+            df = self._load_cached(table, timeframe, columns, start, end, limit)
+            return (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+
+        query, query_params = self._select_query(ticker, timeframe, columns, start, end, limit)
+        if start is None and end is None and limit is None:
+            query += " ORDER BY datetime"
+
+        return pd.read_sql_query(query, self._conn, params=query_params, chunksize=chunksize)
+
+    def get_panel(self, tickers:list, timeframe=consts._DAY, fields=['open', 'high', 'low', 'close', 'volume'],
+                  cache=False, start=None, end=None, limit:int=None, max_workers:int=None) -> Panel:
+        """
+        tickers: Tickers of the stocks to load.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        fields: Columns to load for every ticker. Default = open, high, low, close and volume.
+        cache: Load each table through the on-disk columnar cache (see get_dataframe).
+        start: Only load rows at or after this datetime.
+        end: Only load rows at or before this datetime.
+        limit: Load at most this many rows of each ticker, starting from its earliest.
+        max_workers: Number of threads loading tables at the same time (see get_dataframes).
+
+        Returns a Panel of the tickers aligned on the union of their datetimes, with NaN where
+        a ticker has no row for a datetime.
+        """
+        if fields is None:
+            fields = ['open', 'high', 'low', 'close', 'volume']
+        columns = ['datetime'] + [f for f in fields if f != 'datetime']
+
+        frames = self.get_dataframes(tickers, timeframe, columns=columns, cache=cache, start=start, end=end,
+                                     limit=limit, max_workers=max_workers)
+        if not cache:
+            frames = {ticker: typed_dataframe(df) for ticker, df in frames.items()}
+
+        return Panel.from_frames(frames, fields=columns[1:])
+
+
+    def get_resampled(self, ticker:str, timeframe=consts._DAY, rule='1h', columns=[], cache=False, start=None,
+                      end=None, resample_cache:ResampleCache=default_resample_cache) -> pd.DataFrame:
+        """
+        ticker: Ticker of the stock.
+        timeframe: Timeframe of the table the bars are made from. Default = 'Day'.
+        rule: Bars to make, as a pandas frequency: e.g. '5min', '1h', '1D', 'W' or 'MS'
+              (see resample.bin_starts). Default = '1h'.
+        columns: Columns to load and aggregate. Default = [] for all columns.
+        cache: Load the table through the on-disk columnar cache (see get_dataframe).
+        start: Only use rows at or after this datetime.
+        end: Only use rows at or before this datetime.
+        resample_cache: ResampleCache keeping the bars of earlier calls. Default = the cache shared
+                        by the process; None to always resample.
+
+        Returns typed bars (see resample.resample_ohlcv) indexed by the start of each interval.
+        Cached bars are reused until the table gets new rows.
+        """
+        if self._conn == None:
+            raise Exception("Connect to database before performing this action.")
+
+        table = self._check_columns(ticker, timeframe, columns)[0]
+
+        def load():
+            df = self._read_dataframe(self._conn, ticker, timeframe, columns, cache, start, end, None)
+            return df if cache else typed_dataframe(df)
+
+        if resample_cache is None:
+            return resample_ohlcv(load(), rule)
+
+        # Same key as the table's state in the columnar cache: rows and latest datetime
+        key = (str(self._path), table, tuple(self._cache._table_state(self._conn, table)), tuple(columns),
+               str(start), str(end))
+        return resample_cache.get(key, load, rule)
+
+    def _bulk_insert(self, table:str, frames) -> dict:
+        """
+        table: Typed table to insert into.
+        frames: Iterable of dataframes to insert, in order.
+
+        Inserts every row in one transaction with the journal in WAL mode and synchronous
+        writes turned off, both restored afterwards, and returns a report with the number of
+        rows and rows per second.
+        """
+        conn = self._conn
+        conn.commit()
+        synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+
+        rows = 0
+        start = perf_counter()
+        try:
+            for frame in frames:
+                conn.executemany(f"INSERT OR REPLACE INTO {quote_identifier(table)} VALUES (?, ?, ?, ?, ?, ?)", _typed_rows(frame))
+                rows += len(frame)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute(f"PRAGMA synchronous={synchronous}")
+            conn.execute(f"PRAGMA journal_mode={journal_mode}")
+
+        seconds = perf_counter() - start
+        return {
+            'table': table,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds > 0 else float('inf'),
+        }
+
+    def ingest_csv(self, csv_path, ticker:str, timeframe:str=consts._DAY, batch_size:int=100000,
+                   replace:bool=False) -> dict:
+        """
+        csv_path: CSV file with a datetime column and open, high, low, close, volume columns
+                  (column names are matched case-insensitively).
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        batch_size: Number of CSV rows parsed and inserted at a time.
+        replace: Drop the existing table first. Otherwise rows are added to it, replacing
+                 rows with the same datetime.
+
+        Bulk-loads the CSV into a typed table (see create_typed_table) and returns a report
+        with the number of rows loaded and rows per second.
+        """
+        if self._conn == None:
+            raise Exception("Connect to database before performing this action.")
+
+        table = table_name(ticker, timeframe)
+        if replace:
+            self._conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+        self.create_typed_table(ticker, timeframe)
+
+        def frames():
+            for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+                chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+                yield chunk
+
+        report = self._bulk_insert(table, frames())
+        self._cache.invalidate(table)
+        return report
+
+    def create_typed_table(self, ticker:str, timeframe:str=consts._DAY):
+        """
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+
+        Creates the ticker's table, if it does not exist yet, with an INTEGER epoch-second
+        datetime primary key, REAL prices and an INTEGER volume.
+        """
+        table = table_name(ticker, timeframe)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(table)} {_TYPED_SCHEMA}")
+        self._conn.commit()
+
+    def migrate_table(self, ticker:str, timeframe:str=consts._DAY, batch_size:int=100000) -> dict:
+        """
+        ticker: Ticker of the stock.
+        timeframe: 'Min' for minute data, 'Day' for daily data. Default = 'Day'.
+        batch_size: Number of rows converted at a time.
+
+        Converts an existing all-TEXT table into the typed layout in place and returns the
+        same report as ingest_csv.
+        """
+        if self._conn == None:
+            raise Exception("Connect to database before performing this action.")
+
+        table = table_name(ticker, timeframe)
+        migrated = f"{table}__typed"
+
+        self._conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(migrated)}")
+        self._conn.execute(f"CREATE TABLE {quote_identifier(migrated)} {_TYPED_SCHEMA}")
+
+        # The query only starts once _bulk_insert has set up the connection for loading
+        def frames():
+            yield from pd.read_sql_query(f"SELECT * FROM {quote_identifier(table)}", self._conn, chunksize=batch_size)
+
+        report = self._bulk_insert(migrated, frames())
+
+        # The old table is only dropped along with the rename, so a failure keeps it
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute(f"DROP TABLE {quote_identifier(table)}")
+            self._conn.execute(f"ALTER TABLE {quote_identifier(migrated)} RENAME TO {quote_identifier(table)}")
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        self._cache.invalidate(table)
+
+        report['table'] = table
+        return report
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Load price data into the backtester's SQLite database.")
+    parser.add_argument('--db-name', default='stock_database.db')
+    parser.add_argument('--db-path', default=str(consts._DATABASE_PATH))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Bulk-load a CSV file into a typed table.")
+    ingest.add_argument('csv')
+    ingest.add_argument('ticker')
+    ingest.add_argument('timeframe', choices=[consts._DAY, consts._MIN], type=str.upper)
+    ingest.add_argument('--replace', action='store_true', help="Drop the existing table first.")
+
+    migrate = commands.add_parser('migrate', help="Convert an existing TEXT table into the typed layout.")
+    migrate.add_argument('ticker')
+    migrate.add_argument('timeframe', choices=[consts._DAY, consts._MIN], type=str.upper)
+
+    args = parser.parse_args(argv)
+
+    database = Database(db_name=args.db_name, db_path=Path(args.db_path))
+    database.connect()
+    try:
+        if args.command == 'ingest':
+            report = database.ingest_csv(args.csv, args.ticker, args.timeframe, replace=args.replace)
+        else:
+            report = database.migrate_table(args.ticker, args.timeframe)
+    finally:
+        database.disconnect()
+
+    print(f"{report['table']}: {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)")
 
 
+if __name__ == "__main__":
+    main()
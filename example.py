@@ -44,29 +44,52 @@ class SMA(bt.Indicator):
 
 class SimpleMovingAverage_Strategy(bt.Strategy):
 
+    # Strategy parameters. Declaring them as class attributes lets Backtest.optimize()
+    # try other values, e.g. optimize({'fast': [5, 10, 20], 'slow': [50, 100, 200]}).
+    fast = 10
+    slow = 100
+
     # This is used in the Backtest object to initialize your strategy.
     # Use this to define parameters and assign the indicators you want to base your strategy on.
     def init(self):
         # Name the strategy
         self._name = "SMA Crossover Strategy"
 
+        # Indicator names, e.g. "10-Period SMA" and "100-Period SMA"
+        self._fast_sma = f"{self.fast}-Period SMA"
+        self._slow_sma = f"{self.slow}-Period SMA"
+
         # Add the indicators to your strategy.
-        self.add_indicator(SMA("10-Period SMA", 10, self.data['close']))
-        self.add_indicator(SMA("100-Period SMA", 100, self.data['close']))
+        self.add_indicator(SMA(self._fast_sma, self.fast, self.data['close']))
+        self.add_indicator(SMA(self._slow_sma, self.slow, self.data['close']))
     
     # Define your strategy here. Backtest runs this function to apply your strategy.
     def apply(self, current_data:pd.DataFrame, lookback_data:pd.DataFrame):
-        above_10_period = float(current_data['close']) > current_data['10-Period SMA']
+        above_fast_sma = float(current_data['close']) > current_data[self._fast_sma]
 
-        sma10_above_sma100 = current_data['10-Period SMA'] > current_data['100-Period SMA']
+        fast_above_slow = current_data[self._fast_sma] > current_data[self._slow_sma]
         
-        if( above_10_period and sma10_above_sma100):
+        if( above_fast_sma and fast_above_slow):
             return buy(_MARKET, shares = 1, price=float(current_data['open']))
-        elif ( sma10_above_sma100 == False):
+        elif ( fast_above_slow == False):
             return short(_MARKET, shares = 1, price=float(current_data['close']))
         
         return None
 
+    # Optional: the same strategy expressed over whole columns at once.
+    # Backtest(...).run(vectorized=True) calls this instead of apply().
+    def signals(self, data:pd.DataFrame):
+        close = data['close'].astype(float)
+
+        above_fast_sma = close > data[self._fast_sma]
+
+        fast_above_slow = data[self._fast_sma] > data[self._slow_sma]
+
+        entries = above_fast_sma & fast_above_slow
+        exits = ~fast_above_slow
+
+        return entries, exits, data['open'].astype(float), close
+
 
 
 
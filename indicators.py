@@ -0,0 +1,401 @@
+from collections import deque
+import operator
+from math import isnan, nan, sqrt
+import numpy as np
+import pandas as pd
+import backtest as bt
+import kernels
+
+
+class _SeriesIndicator(bt.Indicator):
+    '''
+    _SeriesIndicator
+
+    Base class of the built-in indicators: a lookback 'period' applied to one price 'series'.
+    The series can also be another indicator, whose result it is then computed from (see
+    Indicator.inputs). For update(), the value is read from the bar's column named after the
+    series or indicator (or 'field').
+
+    'series' can also be a DataFrame or 2-D array with one column per ticker, all of which are
+    computed at once by the NumPy kernels of kernels.py (or pandas' own rolling reductions).
+    '''
+    # Recursive averages depend on every earlier row, so their warmup is unbounded
+    _recursive = False
+
+    def __init__(self, name:str, period:int, series:pd.Series, field:str=None):
+        super().__init__(name)
+
+        if type(period) != int:
+            raise ValueError("Period must be int type.")
+        if period <= 0:
+            raise ValueError("Period must be positive.")
+        if not isinstance(series, (pd.Series, pd.DataFrame, np.ndarray, bt.Indicator)):
+            raise ValueError("Data must be of type pd.Series, pd.DataFrame, np.ndarray or an Indicator")
+
+        self._k = period
+        self._series = series
+        self._field = field if field is not None else getattr(series, 'name', None)
+        self.reset()
+
+    @property
+    def period(self) -> int:
+        return self._k
+
+    @property
+    def field(self) -> str:
+        return self._field
+
+    @property
+    def warmup(self):
+        # A window needs the k - 1 rows before it, plus the rows its input needs
+        if self._recursive:
+            return None
+        own = self._k - 1
+        if isinstance(self._series, bt.Indicator):
+            inner = self._series.warmup
+            return None if inner is None else own + inner
+        return own
+
+    def _value(self, bar) -> float:
+        return float(bar[self._field])
+
+    def _wrap(self, values:np.ndarray):
+        # Kernel output labelled like the series it was computed from
+        return _labelled(self._series, values)
+
+
+def _labelled(like, values:np.ndarray):
+    if isinstance(like, pd.Series):
+        return pd.Series(values, index=like.index, name=like.name, copy=False)
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns, copy=False)
+    return values
+
+
+class SMA(_SeriesIndicator):
+    """
+    SMA(name, period, series)
+        name: str = Name of SMA indicator.
+        period: int = Length of SMA
+        series: pd.Series = Price series object.
+    """
+    def f(self) -> pd.Series:
+        # pandas' rolling sums already take a single pass; the kernel serves arrays
+        if isinstance(self._series, (pd.Series, pd.DataFrame)):
+            return self._series.rolling(self._k).mean()
+        return kernels.rolling_mean(self._series, self._k)
+
+    def reset(self):
+        self._window = deque()
+        self._sum = 0.0
+        self._nans = 0
+
+    def update(self, bar) -> float:
+        x = self._value(bar)
+        self._window.append(x)
+        if isnan(x):
+            self._nans += 1
+        else:
+            self._sum += x
+
+        if len(self._window) > self._k:
+            old = self._window.popleft()
+            if isnan(old):
+                self._nans -= 1
+            else:
+                self._sum -= old
+
+        if len(self._window) < self._k or self._nans > 0:
+            return nan
+        return self._sum / self._k
+
+
+class EMA(_SeriesIndicator):
+    """
+    EMA(name, period, series)
+        name: str = Name of EMA indicator.
+        period: int = Span of the EMA; the smoothing factor is 2 / (period + 1).
+        series: pd.Series = Price series object.
+
+    The EMA starts at the first value of the series and carries over NaN values.
+    """
+    _recursive = True
+
+    def f(self) -> pd.Series:
+        return self._wrap(kernels.ema(self._series, 2.0 / (self._k + 1)))
+
+    def reset(self):
+        self._ema = nan
+
+    def update(self, bar) -> float:
+        x = self._value(bar)
+        if not isnan(x):
+            if isnan(self._ema):
+                self._ema = x
+            else:
+                alpha = 2.0 / (self._k + 1)
+                self._ema = alpha * x + (1.0 - alpha) * self._ema
+        return self._ema
+
+
+class RollingStd(_SeriesIndicator):
+    """
+    RollingStd(name, period, series, ddof=1)
+        name: str = Name of the indicator.
+        period: int = Length of the rolling window.
+        series: pd.Series = Price series object.
+        ddof: int = Delta degrees of freedom. Default = 1 for the sample standard deviation.
+    """
+    def __init__(self, name:str, period:int, series:pd.Series, field:str=None, ddof:int=1):
+        self._ddof = ddof
+        super().__init__(name, period, series, field)
+
+    def f(self) -> pd.Series:
+        if isinstance(self._series, (pd.Series, pd.DataFrame)):
+            return self._series.rolling(self._k).std(ddof=self._ddof)
+        return kernels.rolling_std(self._series, self._k, self._ddof)
+
+    def reset(self):
+        self._window = deque()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._nans = 0
+
+    def _add(self, x:float):
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x:float):
+        self._n -= 1
+        if self._n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = x - self._mean
+        self._mean -= delta / self._n
+        self._m2 -= delta * (x - self._mean)
+
+    def update(self, bar) -> float:
+        x = self._value(bar)
+        self._window.append(x)
+        if isnan(x):
+            self._nans += 1
+        else:
+            self._add(x)
+
+        if len(self._window) > self._k:
+            old = self._window.popleft()
+            if isnan(old):
+                self._nans -= 1
+            else:
+                self._remove(old)
+
+        if len(self._window) < self._k or self._nans > 0 or self._n <= self._ddof:
+            return nan
+        return sqrt(max(self._m2, 0.0) / (self._n - self._ddof))
+
+
+class RSI(_SeriesIndicator):
+    """
+    RSI(name, period, series)
+        name: str = Name of RSI indicator.
+        period: int = Length of the RSI; gains and losses are smoothed with Wilder's
+                      moving average (smoothing factor 1 / period).
+        series: pd.Series = Price series object.
+
+    Values range from 0 to 100 and start once 'period' price changes have been seen.
+    Changes into or out of a NaN price are skipped.
+    """
+    _recursive = True
+
+    def f(self) -> pd.Series:
+        return self._wrap(kernels.rsi(self._series, self._k))
+
+    def reset(self):
+        self._previous = nan
+        self._changes = 0
+        self._avg_gain = nan
+        self._avg_loss = nan
+
+    def update(self, bar) -> float:
+        x = self._value(bar)
+        change = x - self._previous
+        self._previous = x
+
+        # Changes into or out of a NaN price are skipped: the averages carry over them
+        if not isnan(change):
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+
+            self._changes += 1
+            if self._changes == 1:
+                self._avg_gain = gain
+                self._avg_loss = loss
+            else:
+                alpha = 1.0 / self._k
+                self._avg_gain = alpha * gain + (1.0 - alpha) * self._avg_gain
+                self._avg_loss = alpha * loss + (1.0 - alpha) * self._avg_loss
+
+        if self._changes < self._k:
+            return nan
+        if self._avg_loss == 0:
+            return 100.0 if self._avg_gain > 0 else nan
+        return 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+
+class _RollingExtreme(_SeriesIndicator):
+    # Monotonic deque of (row, value): the front is the extreme of the window.
+    # _dominates(x, y) is True when a new value x makes an older value y irrelevant.
+    _dominates = None
+
+    def reset(self):
+        self._window = deque()
+        self._row = 0
+        self._last_nan = -1
+
+    def update(self, bar) -> float:
+        x = self._value(bar)
+        row = self._row
+        self._row += 1
+
+        if isnan(x):
+            self._last_nan = row
+        else:
+            while self._window and self._dominates(x, self._window[-1][1]):
+                self._window.pop()
+            self._window.append((row, x))
+        while self._window and self._window[0][0] <= row - self._k:
+            self._window.popleft()
+
+        if self._row < self._k or self._last_nan > row - self._k:
+            return nan
+        return self._window[0][1]
+
+
+class RollingMax(_RollingExtreme):
+    """
+    RollingMax(name, period, series)
+        name: str = Name of the indicator.
+        period: int = Length of the rolling window.
+        series: pd.Series = Price series object.
+
+    Highest value of the last 'period' rows, e.g. the upper Donchian channel of the highs.
+    """
+    _dominates = operator.ge
+
+    def f(self) -> pd.Series:
+        return self._wrap(kernels.rolling_max(self._series, self._k))
+
+
+class RollingMin(_RollingExtreme):
+    """
+    RollingMin(name, period, series)
+        name: str = Name of the indicator.
+        period: int = Length of the rolling window.
+        series: pd.Series = Price series object.
+
+    Lowest value of the last 'period' rows, e.g. the lower Donchian channel of the lows.
+    """
+    _dominates = operator.le
+
+    def f(self) -> pd.Series:
+        return self._wrap(kernels.rolling_min(self._series, self._k))
+
+
+class Bollinger(RollingStd):
+    """
+    Bollinger(name, period, series, width=2.0, band='middle')
+        name: str = Name of the indicator.
+        period: int = Length of the rolling window.
+        series: pd.Series = Price series object.
+        width: float = Distance of the upper and lower bands from the middle band, in
+                       (population) standard deviations. Default = 2.0.
+        band: str = Band returned: 'middle' (the rolling mean), 'upper' or 'lower'.
+    """
+    _bands = {'middle': 0.0, 'upper': 1.0, 'lower': -1.0}
+
+    def __init__(self, name:str, period:int, series:pd.Series, field:str=None, width:float=2.0, band:str='middle'):
+        if band not in self._bands:
+            raise ValueError("Band must be 'middle', 'upper' or 'lower'.")
+        self._width = width
+        self._band = band
+        super().__init__(name, period, series, field, ddof=0)
+
+    def f(self) -> pd.Series:
+        middle, upper, lower = kernels.bollinger(self._series, self._k, self._width)
+        return self._wrap({'middle': middle, 'upper': upper, 'lower': lower}[self._band])
+
+    def update(self, bar) -> float:
+        std = super().update(bar)
+        if isnan(std):
+            return nan
+        return self._mean + self._bands[self._band] * self._width * std
+
+
+class ATR(bt.Indicator):
+    """
+    ATR(name, period, high, low, close)
+        name: str = Name of ATR indicator.
+        period: int = Length of the ATR; the true range is smoothed with Wilder's moving
+                      average (smoothing factor 1 / period).
+        high, low, close: pd.Series = Price series objects. DataFrames or 2-D arrays with one
+                                      column per ticker compute every ticker at once.
+
+    The first bar's true range is its high minus its low. For update(), the values are read
+    from the bar's columns named after the series.
+    """
+    def __init__(self, name:str, period:int, high:pd.Series, low:pd.Series, close:pd.Series):
+        super().__init__(name)
+
+        if type(period) != int:
+            raise ValueError("Period must be int type.")
+        if period <= 0:
+            raise ValueError("Period must be positive.")
+        for series in (high, low, close):
+            if not isinstance(series, (pd.Series, pd.DataFrame, np.ndarray, bt.Indicator)):
+                raise ValueError("Data must be of type pd.Series, pd.DataFrame, np.ndarray or an Indicator")
+
+        self._k = period
+        self._high = high
+        self._low = low
+        self._close = close
+        self._fields = tuple(getattr(s, 'name', None) for s in (high, low, close))
+        self.reset()
+
+    @property
+    def period(self) -> int:
+        return self._k
+
+    def f(self) -> pd.Series:
+        values = kernels.atr(self._high, self._low, self._close, self._k)
+        if isinstance(self._close, pd.Series):
+            return pd.Series(values, index=self._close.index, copy=False)
+        return _labelled(self._close, values)
+
+    def reset(self):
+        self._previous = nan
+        self._bars = 0
+        self._atr = nan
+
+    def update(self, bar) -> float:
+        high, low, close = (float(bar[field]) for field in self._fields)
+
+        tr = high - low
+        if not isnan(self._previous):
+            tr = max(tr, abs(high - self._previous), abs(low - self._previous))
+        self._previous = close
+
+        if isnan(tr):
+            return self._atr if self._bars >= self._k else nan
+
+        self._bars += 1
+        if self._bars == 1:
+            self._atr = tr
+        else:
+            alpha = 1.0 / self._k
+            self._atr = alpha * tr + (1.0 - alpha) * self._atr
+
+        return self._atr if self._bars >= self._k else nan
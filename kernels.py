@@ -0,0 +1,339 @@
+import numpy as np
+
+# Largest factor the EMA weights grow by within one block (see ema)
+_EMA_GROWTH = 1e150
+
+
+def _as_float(x) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim not in (1, 2):
+        raise ValueError("Kernels take 1-D (bars) or 2-D (bars x tickers) arrays.")
+    return x
+
+
+def _check_window(k:int):
+    if type(k) != int:
+        raise ValueError("Window must be int type.")
+    if k <= 0:
+        raise ValueError("Window must be positive.")
+
+
+def _blocks(x:np.ndarray, size:int) -> np.ndarray:
+    # Rows of 'x' cut into blocks of 'size' rows, zero padded: shape (blocks, size, ...)
+    n = len(x)
+    blocks = -(-n // size)
+    pad = blocks * size - n
+    if pad > 0:
+        x = np.concatenate((x, np.zeros((pad,) + x.shape[1:])))
+    return x.reshape((blocks, size) + x.shape[1:])
+
+
+def _rolling_extreme(x, k:int, ufunc) -> np.ndarray:
+    '''
+    van Herk / Gil-Werman: with the rows cut into blocks of k, every window is the suffix of one
+    block followed by the prefix of the next, so its extreme is ufunc(suffix, prefix) of two
+    running extremes computed once per block. Three comparisons per row, whatever k is.
+    '''
+    x = _as_float(x)
+    _check_window(k)
+    n = len(x)
+    out = np.full(x.shape, np.nan)
+    if k > n:
+        return out
+
+    blocks = _blocks(x, k)
+    prefix = ufunc.accumulate(blocks, axis=1).reshape((-1,) + x.shape[1:])
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + x.shape[1:])
+    out[k - 1:] = ufunc(suffix[:n - k + 1], prefix[k - 1:n])
+    return out
+
+
+def rolling_max(x, k:int) -> np.ndarray:
+    '''
+    rolling_max(x, k)
+
+    Maximum of every window of k rows, NaN until k rows are seen and for windows holding a NaN.
+    'x' is 1-D (bars) or 2-D (bars x tickers); the result has the same shape.
+    '''
+    return _rolling_extreme(x, k, np.maximum)
+
+
+def rolling_min(x, k:int) -> np.ndarray:
+    '''
+    rolling_min(x, k)
+
+    Minimum of every window of k rows, like rolling_max.
+    '''
+    return _rolling_extreme(x, k, np.minimum)
+
+
+def _rolling_sums(x:np.ndarray, k:int, powers:int):
+    '''
+    Sums of (x - c) ** p over every window of k rows ending at row k - 1 onwards, for
+    p = 1..powers, and the shift c of each window (shape (blocks, k, ...), before trimming).
+
+    The rows are cut into blocks of k and summed as cumulative sums of deviations from the
+    first value of their block, which start over at every block instead of running over the
+    whole series. A window ending in block b is the prefix of block b up to its end and the
+    suffix of block b - 1 after it: the block b - 1 total less the same prefix of it, moved to
+    the shift of block b. The sums therefore stay as small as the price moves over two blocks,
+    neither drifting on long series nor cancelling out in the variance.
+    '''
+    blocks = _blocks(x, k)
+    first = blocks[:, :1]
+    deviation = blocks - first
+    extra = (1,) * (x.ndim - 1)
+    # Rows of block b - 1 after offset j, and shift from block b - 1 to block b
+    after = np.arange(k - 1, -1, -1, dtype=np.float64).reshape((1, k) + extra)
+    delta = first[:-1] - first[1:]
+
+    sums = []
+    prefix1 = np.cumsum(deviation, axis=1)
+    window = np.empty_like(prefix1)
+    window[0] = prefix1[0]
+    np.subtract(prefix1[1:], prefix1[:-1], out=window[1:])
+    total1 = prefix1[:-1, -1:]
+    window[1:] += total1 + after * delta
+    sums.append(window)
+
+    if powers > 1:
+        prefix2 = np.cumsum(deviation * deviation, axis=1)
+        window = np.empty_like(prefix2)
+        window[0] = prefix2[0]
+        np.subtract(prefix2[1:], prefix2[:-1], out=window[1:])
+        window[1:] += prefix2[:-1, -1:] + after * (delta * delta)
+        suffix1 = np.subtract(total1, prefix1[:-1])
+        suffix1 *= 2.0 * delta
+        window[1:] += suffix1
+        sums.append(window)
+
+    return sums, first
+
+
+def _without_nan(x:np.ndarray):
+    # 'x' with NaN zeroed for the window sums, and where the NaN were (None if there are none)
+    missing = np.isnan(x)
+    if not missing.any():
+        return x, None
+    return np.where(missing, 0.0, x), missing
+
+
+def _trim(window:np.ndarray, x:np.ndarray, k:int, missing:np.ndarray) -> np.ndarray:
+    # Window values of _rolling_sums as rows of 'x', NaN until k rows are seen and for windows with NaN
+    out = window.reshape((-1,) + x.shape[1:])[:len(x)]
+    out[:k - 1] = np.nan
+    if missing is not None:
+        count = np.cumsum(missing, axis=0)
+        count[k:] -= count[:-k].copy()
+        out[count > 0] = np.nan
+    return out
+
+
+def _moments(x, k:int, ddof:int, variance:bool):
+    # Rolling mean, and variance if asked, sharing the window sums
+    x = _as_float(x)
+    _check_window(k)
+    if k > len(x):
+        return np.full(x.shape, np.nan), np.full(x.shape, np.nan)
+
+    x, missing = _without_nan(x)
+    sums, shift = _rolling_sums(x, k, 2 if variance else 1)
+    s1 = sums[0]
+    s1 /= k
+
+    var = None
+    if variance:
+        if k > ddof:
+            s2 = sums[1]
+            s2 -= s1 * s1 * k
+            np.maximum(s2, 0.0, out=s2)
+            s2 /= k - ddof
+            var = _trim(s2, x, k, missing)
+        else:
+            var = np.full(x.shape, np.nan)
+
+    s1 += shift
+    return _trim(s1, x, k, missing), var
+
+
+def rolling_mean(x, k:int) -> np.ndarray:
+    '''
+    rolling_mean(x, k)
+
+    Mean of every window of k rows (a simple moving average), NaN until k rows are seen and for
+    windows holding a NaN. 'x' is 1-D (bars) or 2-D (bars x tickers).
+    '''
+    return _moments(x, k, 0, False)[0]
+
+
+def rolling_var(x, k:int, ddof:int=1) -> np.ndarray:
+    '''
+    rolling_var(x, k, ddof=1)
+
+    Variance of every window of k rows with 'ddof' delta degrees of freedom, like rolling_mean.
+    '''
+    return _moments(x, k, ddof, True)[1]
+
+
+def rolling_std(x, k:int, ddof:int=1) -> np.ndarray:
+    '''
+    rolling_std(x, k, ddof=1)
+
+    Standard deviation of every window of k rows, like rolling_var.
+    '''
+    return np.sqrt(rolling_var(x, k, ddof))
+
+
+def _ema_dense(x:np.ndarray, alpha:float) -> np.ndarray:
+    '''
+    EMA of a (bars x columns) array without NaN, starting at the first row. Within a block of B
+    rows starting after the value y, the EMA is
+        y[j] = beta^(j+1) y + alpha beta^j cumsum(x[m] beta^-m)[j]
+    which is one cumsum per block for all blocks at once. Only the block ends are then carried
+    from one block to the next, in a loop over blocks rather than rows. B is as long as the
+    weights beta^-m can grow without overflowing; the rounding error stays around eps / alpha.
+    '''
+    beta = 1.0 - alpha
+    if beta <= 0.0:
+        return x.copy()
+
+    n = len(x)
+    size = int(min(n, max(1, np.log(_EMA_GROWTH) // -np.log(beta))))
+    blocks = _blocks(x, size)
+
+    j = np.arange(size, dtype=np.float64)
+    extra = (1,) * (x.ndim - 1)
+    growth = (beta ** -j).reshape((1, size) + extra)
+    decay = (beta ** j).reshape((1, size) + extra)
+
+    # alpha beta^-j-weighted cumsums: beta^j times them is the EMA of each block started from zero
+    y = blocks * growth
+    np.cumsum(y, axis=1, out=y)
+    y *= alpha
+
+    # Value before each block: the first row for the first block (so that y[0] = x[0])
+    end = beta ** (size - 1)
+    carry = beta ** size
+    before = np.empty((len(blocks),) + x.shape[1:])
+    before[0] = x[0]
+    for b in range(1, len(blocks)):
+        before[b] = carry * before[b - 1] + end * y[b - 1, -1]
+
+    before *= beta
+    y += np.expand_dims(before, 1)
+    y *= decay
+    return y.reshape((-1,) + x.shape[1:])[:n]
+
+
+def ema(x, alpha:float, min_periods:int=0) -> np.ndarray:
+    '''
+    ema(x, alpha, min_periods=0)
+
+    Exponential moving average y[t] = alpha x[t] + (1 - alpha) y[t-1], starting at the first
+    non-NaN value of every column. NaN values are skipped: the average carries over them. Rows
+    before 'min_periods' non-NaN values have been seen are NaN. 'x' is 1-D (bars) or 2-D
+    (bars x tickers). Same as pandas' ewm(alpha=alpha, adjust=False, ignore_na=True).
+    '''
+    x = _as_float(x)
+    if not 0.0 < alpha <= 1.0:
+        raise ValueError("Smoothing factor must be in (0, 1].")
+
+    columns = x if x.ndim == 2 else x[:, np.newaxis]
+    valid = ~np.isnan(columns)
+    if valid.all():
+        out = _ema_dense(columns, alpha) if len(columns) > 0 else columns.copy()
+    else:
+        dense = valid.all(axis=0)
+        out = np.full(columns.shape, np.nan)
+        if dense.any():
+            out[:, dense] = _ema_dense(columns[:, dense], alpha)
+        for c in np.flatnonzero(~dense):
+            rows = np.flatnonzero(valid[:, c])
+            if len(rows) == 0:
+                continue
+            values = _ema_dense(columns[rows, c:c + 1], alpha)[:, 0]
+            # Carried over the NaN rows: position of the latest valid row, forward filled
+            latest = np.full(len(columns), -1)
+            latest[rows] = np.arange(len(rows))
+            np.maximum.accumulate(latest, out=latest)
+            out[:, c] = np.where(latest >= 0, values[np.maximum(latest, 0)], np.nan)
+
+    if min_periods > 1:
+        out[np.cumsum(valid, axis=0) < min_periods] = np.nan
+
+    return out if x.ndim == 2 else out[:, 0]
+
+
+def wilder(x, k:int) -> np.ndarray:
+    '''
+    wilder(x, k)
+
+    Wilder's moving average: an EMA with smoothing factor 1 / k, NaN until k values are seen.
+    '''
+    _check_window(k)
+    return ema(x, 1.0 / k, min_periods=k)
+
+
+def rsi(x, k:int) -> np.ndarray:
+    '''
+    rsi(x, k)
+
+    Relative strength index of prices 'x' from Wilder's averages of the gains and losses of
+    k price changes, from 0 to 100.
+    '''
+    x = _as_float(x)
+    _check_window(k)
+    out = np.full(x.shape, np.nan)
+    if len(x) < 2:
+        return out
+
+    # The first row has no change; NaN changes stay NaN (np.maximum propagates them)
+    change = x[1:] - x[:-1]
+    gain = wilder(np.maximum(change, 0.0), k)
+    loss = wilder(np.maximum(-change, 0.0), k)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain /= loss
+    gain += 1.0
+    np.divide(100.0, gain, out=gain)
+    np.subtract(100.0, gain, out=out[1:])
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    '''
+    true_range(high, low, close)
+
+    Largest of the bar's range and the gaps from the previous close to its high and low.
+    The first bar's true range is its range.
+    '''
+    high = _as_float(high)
+    low = _as_float(low)
+    close = _as_float(close)
+
+    tr = high - low
+    previous = close[:-1]
+    tr[1:] = np.fmax(tr[1:], np.fmax(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def atr(high, low, close, k:int) -> np.ndarray:
+    '''
+    atr(high, low, close, k)
+
+    Average true range: Wilder's moving average of the true range over k bars.
+    '''
+    return wilder(true_range(high, low, close), k)
+
+
+def bollinger(x, k:int, width:float=2.0, ddof:int=0) -> tuple:
+    '''
+    bollinger(x, k, width=2.0, ddof=0)
+
+    Bollinger bands of every window of k rows: returns (middle, upper, lower), where the middle
+    band is the rolling mean and the others are 'width' rolling standard deviations away from it.
+    '''
+    middle, var = _moments(x, k, ddof, True)
+    deviation = np.sqrt(var)
+    deviation *= width
+    return middle, middle + deviation, middle - deviation
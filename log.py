@@ -0,0 +1,64 @@
+import sys
+import logging
+from logging.handlers import BufferingHandler
+
+# Verbosity levels of a Backtest
+QUIET = 0       # No output at all
+SUMMARY = 1     # Strategy name, indicators and final balance
+VERBOSE = 2     # Also every filled order amount
+
+# Number of messages buffered before they are written out
+_BUFFER_CAPACITY = 4096
+
+
+class BufferedStreamHandler(BufferingHandler):
+    '''
+    BufferedStreamHandler
+
+    Logging handler that keeps formatted messages in memory and writes them to the stream in one
+    write() once 'capacity' messages are buffered, or when flushed (at the end of every run).
+    Without a stream, messages go to whatever sys.stdout is at the time of the flush.
+    '''
+    def __init__(self, stream=None, capacity:int=_BUFFER_CAPACITY):
+        super().__init__(capacity)
+        self._stream = stream
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def emit(self, record:logging.LogRecord):
+        self.buffer.append(self.format(record))
+        if len(self.buffer) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer:
+                stream = self.stream
+                stream.write("\n".join(self.buffer) + "\n")
+                stream.flush()
+                self.buffer.clear()
+        finally:
+            self.release()
+
+
+# Backtest output goes through this logger. By default it is written, buffered, to stdout;
+# replace or add handlers to send it elsewhere.
+logger = logging.getLogger('backtester')
+handler = BufferedStreamHandler()
+handler.setFormatter(logging.Formatter('%(message)s'))
+logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def flush():
+    '''
+    flush()
+
+    Writes out the messages buffered by the handlers of the backtester logger.
+    '''
+    for h in logger.handlers:
+        h.flush()
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+import stats
+from account import Account
+from backtest import Data, Strategy
+from cache import IndicatorCache
+from log import logger, flush, SUMMARY, VERBOSE
+from pipeline import IndicatorGraph
+
+
+class MultiBacktest:
+    def __init__(self, data:pd.DataFrame, strategies:list, lookback_view:bool=False, bar_records:bool=False,
+                 indicator_cache:IndicatorCache=None, incremental:bool=False, verbosity:int=VERBOSE,
+                 indicator_workers:int=None):
+        '''
+        MultiBacktest(data, strategies, lookback_view=False, bar_records=False, indicator_cache=None,
+                      incremental=False, verbosity=VERBOSE, indicator_workers=None)
+
+        Runs many strategies over the same data in a single pass, each with an Account of its own.
+        The indicators of all the strategies are evaluated as one dependency graph (see
+        pipeline.IndicatorGraph), so an indicator several strategies add is computed once and
+        added as one column. Every row is then read once and passed to the apply() of every
+        strategy in turn; the results are the same as running a Backtest for each of them.
+
+        data: DataFrame shared by the strategies, which must not modify it.
+        strategies: Strategy objects to run, each one a separate object.
+        lookback_view, bar_records, indicator_cache, incremental, verbosity, indicator_workers:
+            As for Backtest. Streaming, vectorized mode and profiling are not supported.
+
+        Strategies may add indicators under the same name only if they are the same indicator
+        (same class and arguments), since the name is the column they read.
+        '''
+        strategies = list(strategies)
+        if len(strategies) == 0:
+            raise ValueError("No strategies passed to backtest.")
+        if len({id(s) for s in strategies}) != len(strategies):
+            raise ValueError("Each strategy must be a separate Strategy object.")
+        for strategy in strategies:
+            if not isinstance(strategy, Strategy):
+                raise TypeError("Strategies must be of type Strategy.")
+
+        self._lookback_view = lookback_view
+        self._bar_records = bar_records
+        self._indicator_cache = indicator_cache
+        self._incremental = incremental
+        self._verbosity = verbosity
+        self._indicator_workers = indicator_workers
+
+        self._data = Data(data)
+        self._strategies = strategies
+        self._accounts = [Account() for _ in strategies]
+
+        for strategy in strategies:
+            strategy.data = data
+            strategy.init()
+
+    @property
+    def strategies(self) -> list:
+        return list(self._strategies)
+
+    @property
+    def accounts(self) -> list:
+        '''
+        accounts
+
+        The Account of every strategy, in the order of the strategies.
+        '''
+        return list(self._accounts)
+
+    @property
+    def verbosity(self) -> int:
+        return self._verbosity
+
+    @verbosity.setter
+    def verbosity(self, level:int):
+        self._verbosity = level
+
+    def trades(self, i:int) -> pd.DataFrame:
+        '''
+        trades(i)
+
+        The trade ledger of the i-th strategy, one row per fill (see account.Recorder).
+        '''
+        return self._with_datetime(self._accounts[i].trades)
+
+    def equity(self, i:int) -> pd.DataFrame:
+        '''
+        equity(i)
+
+        The equity curve of the i-th strategy, one row per bar (see account.Recorder).
+        '''
+        return self._with_datetime(self._accounts[i].equity)
+
+    def stats(self, periods_per_year:int=252, risk_free:float=0.0) -> pd.DataFrame:
+        '''
+        stats(periods_per_year=252, risk_free=0.0)
+
+        Performance statistics of every strategy, one row per strategy in their order.
+        See stats.summary.
+        '''
+        rows = []
+        for strategy, account in zip(self._strategies, self._accounts):
+            equity = account.equity
+            table = stats.summary(equity['equity'], holdings=equity['holdings'], trades=account.trades,
+                                  periods_per_year=periods_per_year, risk_free=risk_free)
+            rows.append(table.iloc[0].rename(strategy.name))
+        return pd.DataFrame(rows)
+
+    def _with_datetime(self, df:pd.DataFrame) -> pd.DataFrame:
+        if 'datetime' not in self._data._data.columns:
+            return df
+        df.insert(1, 'datetime', self._data._data['datetime'].to_numpy()[df['bar'].to_numpy()])
+        return df
+
+    def run(self):
+        '''
+        run()
+
+        Runs the backtest: adds the indicator columns of every strategy in one block, then
+        iterates over the rows once, calling every strategy's apply() on each row.
+        '''
+        try:
+            self._run()
+        finally:
+            # Output is buffered during the run
+            flush()
+
+    def _summary(self, message:str, *args):
+        if self._verbosity >= SUMMARY:
+            logger.info(message, *args)
+
+    def _indicators(self) -> dict:
+        # Name -> indicator over every strategy; a name may only ever mean one indicator
+        required = [s._required_indicators() for s in self._strategies]
+        graph = IndicatorGraph([i for indicators in required for i in indicators.values()])
+
+        indicators = {}
+        for indicators_of_strategy in required:
+            for name, indicator in indicators_of_strategy.items():
+                if name in indicators and graph.node(indicators[name]) is not graph.node(indicator):
+                    raise ValueError(f"Strategies add different indicators named {name}.")
+                indicators.setdefault(name, indicator)
+        return indicators
+
+    def _run(self):
+        self._summary("BACKTESTING STRATEGIES: %s...", ", ".join(s.name for s in self._strategies))
+
+        for strategy in self._strategies:
+            for timeframe in strategy._timeframes.values():
+                timeframe._bind(self._data)
+
+        indicators = self._indicators()
+        # Indicators computed from other indicators are always computed up front
+        live = []
+        if self._incremental:
+            live = [i for i in indicators.values() if i.incremental and not i.inputs]
+
+        batch = [i for i in indicators.values() if i not in live]
+        results = IndicatorGraph(batch).evaluate(cache=self._indicator_cache, max_workers=self._indicator_workers)
+        self._data.add_columns({name: results.get(name, np.nan) for name in indicators})
+        for strategy in self._strategies:
+            strategy.data = self._data._data
+
+        for indicator in live:
+            indicator.reset()
+            self._data.add_live_column(indicator.name)
+        for name in indicators:
+            self._summary("     INDICATOR ADDED: %s", name)
+
+        self._data._init(records=self._bar_records)
+        self._run_rows(self._data, live)
+        self._data._commit_live()
+
+        for strategy, account in zip(self._strategies, self._accounts):
+            self._summary("%s: %s", strategy.name, account.balance)
+
+    def _run_rows(self, data:Data, live:list):
+        '''
+        _run_rows(data, live)
+
+        Applies every strategy to every row of 'data', reading each row and each distinct
+        lookback of it only once.
+        '''
+        next_data = data._next_record if self._bar_records else data._next
+        lookback_data = data.window if self._lookback_view else data.data
+        has_close = 'close' in data._data.columns
+        report = self._verbosity >= VERBOSE
+
+        # Strategies grouped by lookback, so strategies with the same lookback share its data
+        groups = {}
+        for strategy, account in zip(self._strategies, self._accounts):
+            groups.setdefault(strategy.lookback, []).append((strategy, account))
+        groups = list(groups.items())
+
+        while(data._has_next()):
+            current_data = next_data()
+
+            if live:
+                current_data = data._update_live(current_data, live)
+
+            close = current_data['close'] if has_close else np.nan
+
+            for lookback, members in groups:
+                past_k_data = lookback_data(lookback = lookback)
+
+                for strategy, account in members:
+                    # Fill the resting limit and stop orders reached by this bar
+                    if account.has_pending:
+                        self._process_bar(strategy, account, current_data)
+
+                    order = strategy.apply(current_data, past_k_data)
+                    order_amount = account.process_order(order)
+
+                    if order_amount != 0 and report:
+                        logger.info("%s %s", strategy.name, order_amount)
+
+                    account.end_bar(close)
+
+    def _process_bar(self, strategy:Strategy, account:Account, bar):
+        fills = account.process_bar(float(bar['high']), float(bar['low']), float(bar['open']))
+        if self._verbosity >= VERBOSE:
+            for _, order_amount in fills:
+                if order_amount != 0:
+                    logger.info("%s %s", strategy.name, order_amount)
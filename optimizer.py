@@ -0,0 +1,156 @@
+import os
+import tempfile
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import stats
+from log import QUIET
+
+# Per-process state of the worker processes, set up once by _init_worker()
+_worker = {}
+
+
+def parameter_grid(param_grid:dict) -> list:
+    '''
+    parameter_grid(param_grid)
+
+    Expands a dict of parameter name -> list of values into a list of dicts,
+    one for every combination of values.
+    '''
+    if len(param_grid) == 0:
+        raise ValueError("Parameter grid cannot be empty.")
+
+    names = list(param_grid.keys())
+    values = []
+    for name in names:
+        v = param_grid[name]
+        if isinstance(v, (str, bytes)) or not hasattr(v, '__iter__'):
+            v = [v]
+        values.append(list(v))
+
+    return [dict(zip(names, combination)) for combination in product(*values)]
+
+
+def _map_frame(data:pd.DataFrame, directory:str) -> dict:
+    '''
+    _map_frame(data, directory)
+
+    Writes every fixed-width column of 'data' to a .npy file in 'directory' so that worker
+    processes can memory-map it instead of receiving a pickled copy per task.
+    Returns the spec used by _load_frame(). Columns of other dtypes (e.g. text) are kept in
+    the spec itself and are only sent to each worker once.
+    '''
+    spec = {'columns': list(data.columns), 'mapped': {}, 'inline': {}, 'index': data.index}
+
+    for i, name in enumerate(data.columns):
+        values = data[name].to_numpy()
+        if values.dtype.kind in 'biufcmM':
+            path = os.path.join(directory, f"{i}.npy")
+            np.save(path, np.ascontiguousarray(values))
+            spec['mapped'][name] = path
+        else:
+            spec['inline'][name] = values
+
+    return spec
+
+
+def _load_frame(spec:dict) -> pd.DataFrame:
+    columns = {}
+    for name in spec['columns']:
+        if name in spec['mapped']:
+            columns[name] = np.load(spec['mapped'][name], mmap_mode='r')
+        else:
+            columns[name] = spec['inline'][name]
+
+    return pd.DataFrame(columns, index=spec['index'], copy=False)
+
+
+def _init_worker(spec:dict, strategy_class, metric, options:dict):
+    _worker['data'] = _load_frame(spec)
+    _worker['strategy_class'] = strategy_class
+    _worker['metric'] = metric
+    _worker['options'] = options
+
+
+def _evaluate(data:pd.DataFrame, strategy_class, params:dict, metric, options:dict) -> float:
+    # Imported here since backtest.py imports this module lazily as well
+    from backtest import Backtest
+
+    strategy = strategy_class()
+    for name, value in params.items():
+        setattr(strategy, name, value)
+
+    vectorized = options.get('vectorized', False)
+    backtest_options = {k: v for k, v in options.items() if k != 'vectorized'}
+    # Variants run quietly unless asked otherwise
+    backtest_options.setdefault('verbosity', QUIET)
+
+    # Shallow copy: the backtest adds indicator columns to the frame it is given
+    backtest = Backtest(data.copy(deep=False), strategy, **backtest_options)
+    backtest.run(vectorized=vectorized)
+
+    if callable(metric):
+        return float(metric(backtest))
+    if metric == 'balance':
+        return float(backtest.account.balance)
+    if metric in stats.STATISTICS:
+        return float(backtest.stats()[metric])
+
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def _run_variant(params:dict) -> float:
+    return _evaluate(_worker['data'], _worker['strategy_class'], params, _worker['metric'], _worker['options'])
+
+
+def optimize(data:pd.DataFrame, strategy_class, param_grid:dict, metric='balance', n_jobs:int=None,
+             maximize:bool=True, **options) -> pd.DataFrame:
+    '''
+    optimize(data, strategy_class, param_grid, metric, n_jobs, maximize, **options)
+
+    Runs a Backtest of 'strategy_class' for every combination in 'param_grid' and returns a
+    DataFrame with one row per combination (parameters + metric), best first.
+
+        data: pd.DataFrame = Price data, without indicator columns.
+        strategy_class: The Strategy subclass. Parameters are set as attributes on each new
+                        instance before init() runs, so they should be declared as class
+                        attributes of the strategy.
+        param_grid: dict = Parameter name -> list of values.
+        metric: 'balance' (final account balance), one of stats.STATISTICS (e.g. 'sharpe' or
+                'max_drawdown'), or a callable taking the finished Backtest and returning a float.
+                Callables must be picklable (defined at module level).
+        n_jobs: int = Number of worker processes. Defaults to the number of CPUs.
+                      1 runs every variant in the current process.
+        maximize: bool = Rank higher metric values first.
+        options: Passed on to Backtest (lookback_view, bar_records, verbosity) and run (vectorized).
+                 The variants run with verbosity log.QUIET unless given.
+    '''
+    if not callable(metric) and metric != 'balance' and metric not in stats.STATISTICS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    variants = parameter_grid(param_grid)
+    for name in variants[0].keys():
+        if not hasattr(strategy_class, name):
+            raise AttributeError(f"{strategy_class.__name__} has no parameter '{name}'.")
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(1, min(n_jobs, len(variants)))
+
+    if n_jobs == 1:
+        results = [_evaluate(data, strategy_class, params, metric, options) for params in variants]
+    else:
+        with tempfile.TemporaryDirectory(prefix="backtester-") as directory:
+            spec = _map_frame(data, directory)
+            chunksize = max(1, len(variants) // (n_jobs * 4))
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(spec, strategy_class, metric, options)) as pool:
+                results = list(pool.map(_run_variant, variants, chunksize=chunksize))
+
+    metric_name = metric if isinstance(metric, str) else getattr(metric, '__name__', 'metric')
+
+    table = pd.DataFrame(variants)
+    table[metric_name] = results
+
+    return table.sort_values(metric_name, ascending=not maximize, kind='stable').reset_index(drop=True)
@@ -11,27 +11,33 @@ _MARKET = 'market'
 _LIMIT = 'limit'
 _STOP = 'stop'
 
+# Valid values, for the membership checks of Order()
+_DIRECTIONS = frozenset((_BUY, _SELL, _SHORT, _COVER))
+_ORDER_TYPES = frozenset((_MARKET, _LIMIT, _STOP))
+
 class Order:
     '''
     Order
 
     Represents an Order in backtesting framework.
     '''
+    __slots__ = ('_ticker', '_direction', '_order_type', '_shares', '_price', '_submitted', '_processed', '_id')
+
     def __init__(self, direction, order_type, shares:int, price:float, ticker:str=""): # ticker temporarily defaulted to ""
 
-        if direction not in [_BUY, _SELL, _SHORT, _COVER]:
+        if direction not in _DIRECTIONS:
             raise ValueError('Direction must be valid direction value as specified in orders file.')
 
-        if order_type not in [_MARKET, _LIMIT, _STOP]:
+        if order_type not in _ORDER_TYPES:
             raise ValueError('Order type must be market, limit, or stop')
         
-        if type(shares) != int:
+        if type(shares) is not int:
             raise TypeError('Shares must be int type.')
         
         if shares <= 0:
             raise ValueError('Shares must be positive')
 
-        if type(price) != float:
+        if type(price) is not float:
             raise TypeError('Price must be float type.')
 
         if price <= 0.00:
@@ -47,7 +53,37 @@ class Order:
         self._submitted = None
         self._processed = None
 
-    
+        # Set by the Account the order is submitted to
+        self._id = None
+
+    @classmethod
+    def trusted(cls, direction, order_type, shares:int, price:float, ticker:str=""):
+        '''
+        trusted(direction, order_type, shares, price, ticker)
+
+        Builds an Order without validating its arguments, for callers that create many orders
+        from values already known to be valid (e.g. a strategy's precomputed signals, or a
+        benchmark). The engine itself never calls it; use Order() for anything else.
+        '''
+        self = object.__new__(cls)
+        self._ticker = ticker
+        self._direction = direction
+        self._order_type = order_type
+        self._shares = shares
+        self._price = price
+        self._submitted = None
+        self._processed = None
+        self._id = None
+        return self
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, order_id:int):
+        self._id = order_id
+
     @property
     def ticker(self):
         return self._ticker
@@ -91,6 +127,7 @@ class Order:
         Returns a dictionary representation of the Order object.
         '''
         r = {}
+        r['id'] = self._id
         r['ticker'] = self._ticker
         r['order_type'] = self._order_type
         r['direction'] = self._direction
@@ -108,7 +145,7 @@ def buy(order_type=_MARKET, shares=1, price=1.00, ticker=""):
     '''
     Creates a BUY Order object
     '''
-    return Order(direction=_BUY, order_type=order_type, shares=shares, price=price, ticker=ticker)
+    return Order(_BUY, order_type, shares, price, ticker)
 
 def sell(order_type=_MARKET, shares=1, price=1.00, ticker=""):
     '''
@@ -116,16 +153,16 @@ def sell(order_type=_MARKET, shares=1, price=1.00, ticker=""):
 
     Meant to be used to sell an already-bought position
     '''
-    return Order(direction=_SELL, order_type=order_type, shares=shares, price=price, ticker=ticker)
+    return Order(_SELL, order_type, shares, price, ticker)
 
 def short(order_type=_MARKET, shares=1, price=1.00, ticker=""):
     '''
     Creates a SHORT Order object
     '''
-    return Order(direction=_SHORT, order_type=order_type, shares=shares, price=price, ticker=ticker)
+    return Order(_SHORT, order_type, shares, price, ticker)
 
 def cover(order_type=_MARKET, shares=1, price=1.00, ticker=""):
     '''
     Creates an Order object meant to buy from a shorted position.
     '''
-    return Order(direction=_COVER, order_type=order_type, shares=shares, price=price, ticker=ticker)
\ No newline at end of file
+    return Order(_COVER, order_type, shares, price, ticker)
\ No newline at end of file
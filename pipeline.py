@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from cache import IndicatorCache, fingerprint
+
+
+class IndicatorGraph:
+    '''
+    IndicatorGraph(indicators)
+
+    Dependency graph of indicators. An indicator declares its inputs by taking other indicators
+    as constructor arguments (see Indicator.inputs); it is evaluated with their results passed in
+    their place. Inputs need not be among 'indicators' themselves: they are computed as
+    intermediate nodes, but not returned.
+
+    Indicators of the same class constructed with the same arguments other than their name (and
+    the same inputs) are one node, computed once however many names they are added under.
+    '''
+    def __init__(self, indicators):
+        self._outputs = list(indicators)
+
+        # Node key -> first indicator seen with that key, and id of every indicator -> its key
+        self._nodes = {}
+        self._keys = {}
+        self._fingerprints = {}
+        # Node keys in an order where every node comes after its inputs
+        self._order = []
+
+        visiting = set()
+        for indicator in self._outputs:
+            self._visit(indicator, visiting)
+
+        # Fingerprints of the data were only needed to build the keys
+        self._fingerprints = None
+
+    def _arg_key(self, arg):
+        if id(arg) in self._keys:
+            # An input: every input is visited before the indicators taking it
+            return ('indicator', self._keys[id(arg)])
+        if isinstance(arg, (pd.Series, pd.DataFrame, np.ndarray)):
+            # The same Series is usually passed to many indicators: hash it once
+            if id(arg) not in self._fingerprints:
+                self._fingerprints[id(arg)] = (fingerprint(arg), arg)
+            return self._fingerprints[id(arg)][0]
+        return fingerprint(arg)
+
+    def _key(self, indicator):
+        # The name only labels the result, so it is left out of the key
+        args = getattr(indicator, '_args', ())
+        if len(args) > 0 and isinstance(args[0], str) and args[0] == indicator.name:
+            args = args[1:]
+        kwargs = {k: v for k, v in getattr(indicator, '_kwargs', {}).items() if k != 'name'}
+
+        args = tuple(self._arg_key(a) for a in args)
+        kwargs = tuple((k, self._arg_key(v)) for k, v in sorted(kwargs.items()))
+        if any(a is None for a in args) or any(v is None for _, v in kwargs):
+            # Unknown arguments: the indicator is a node of its own
+            return ('object', id(indicator))
+
+        cls = type(indicator)
+        return (cls.__module__, cls.__qualname__, ('tuple', args), ('dict', kwargs))
+
+    def _visit(self, indicator, visiting:set):
+        if id(indicator) in self._keys:
+            return
+        if id(indicator) in visiting:
+            raise ValueError(f"Indicator {indicator.name} depends on itself.")
+
+        visiting.add(id(indicator))
+        for i in indicator.inputs:
+            self._visit(i, visiting)
+        visiting.discard(id(indicator))
+
+        key = self._key(indicator)
+        self._keys[id(indicator)] = key
+        if key not in self._nodes:
+            self._nodes[key] = indicator
+            self._order.append(key)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    @property
+    def order(self) -> list:
+        '''
+        order
+
+        One indicator per node, in an order where every indicator comes after its inputs.
+        '''
+        return [self._nodes[key] for key in self._order]
+
+    def node(self, indicator):
+        '''
+        node(indicator)
+
+        The indicator computed for the node of 'indicator' (one of the graph's indicators or
+        their inputs). Two indicators share a result if and only if they have the same node.
+        '''
+        return self._nodes[self._keys[id(indicator)]]
+
+    def _needed(self, targets:list) -> list:
+        needed = set()
+        stack = [self._keys[id(i)] for i in targets]
+        while stack:
+            key = stack.pop()
+            if key not in needed:
+                needed.add(key)
+                stack.extend(self._keys[id(i)] for i in self._nodes[key].inputs)
+        return [key for key in self._order if key in needed]
+
+    def _compute(self, key, results:dict, cache:IndicatorCache):
+        indicator = self._nodes[key]
+        if indicator.inputs:
+            indicator = indicator._bind_inputs({id(i): results[self._keys[id(i)]] for i in indicator.inputs})
+        if cache is None or key[0] == 'object':
+            return indicator.f()
+        return cache.get(indicator, key=key)
+
+    def evaluate(self, names:list=None, cache:IndicatorCache=None, max_workers:int=None) -> dict:
+        '''
+        evaluate(names=None, cache=None, max_workers=None)
+
+        Computes the indicators named in 'names' (default: all of them) and the inputs they need,
+        and returns a dict of name -> result. Nodes whose inputs are ready run concurrently on
+        a thread pool of 'max_workers' threads (default: one per CPU); rolling and ewm reductions
+        release the GIL. With a single worker, the nodes are computed one after another.
+        '''
+        if names is None:
+            targets = self._outputs
+        else:
+            by_name = {i.name: i for i in self._outputs}
+            unknown = [name for name in names if name not in by_name]
+            if unknown:
+                raise ValueError(f"No indicator named {', '.join(unknown)}.")
+            targets = [by_name[name] for name in names]
+
+        needed = self._needed(targets)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        results = {}
+        if max_workers <= 1 or len(needed) <= 1:
+            for key in needed:
+                results[key] = self._compute(key, results, cache)
+        else:
+            self._evaluate_parallel(needed, results, cache, max_workers)
+
+        return {i.name: results[self._keys[id(i)]] for i in targets}
+
+    def _evaluate_parallel(self, needed:list, results:dict, cache:IndicatorCache, max_workers:int):
+        # Number of inputs still to compute per node, and the nodes waiting on each node
+        waiting = {}
+        dependents = {key: [] for key in needed}
+        for key in needed:
+            inputs = {self._keys[id(i)] for i in self._nodes[key].inputs}
+            waiting[key] = len(inputs)
+            for input_key in inputs:
+                dependents[input_key].append(key)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backtester-indicators") as executor:
+            running = {executor.submit(self._compute, key, results, cache): key
+                       for key in needed if waiting[key] == 0}
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    results[key] = future.result()
+                    for dependent in dependents[key]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            running[executor.submit(self._compute, dependent, results, cache)] = dependent
@@ -0,0 +1,187 @@
+from typing import Type
+import numpy as np
+import pandas as pd
+import stats
+from account import Account
+from backtest import Strategy
+from cache import IndicatorCache
+from log import logger, flush, SUMMARY, VERBOSE
+from pipeline import IndicatorGraph
+from orders import Order
+from utility.structures import Panel, PanelBar, PanelWindow
+
+
+class PortfolioStrategy(Strategy):
+    """
+    PortfolioStrategy Abstract Class
+
+    A Strategy run over every ticker of a Panel at once. Its data is the Panel, and its
+    indicators return one (bars x tickers) array or DataFrame each, computed over all the
+    tickers in a single call, e.g. pd.DataFrame(self.data['close']).rolling(10).mean().
+
+    apply(bar, lookback) is called once per timestep with a PanelBar and a PanelWindow, and
+    returns None, an Order or a list of Orders. Orders must name their ticker.
+    """
+    @property
+    def panel(self) -> Panel:
+        return self._data
+
+    @property
+    def tickers(self) -> list:
+        return self._data.tickers
+
+
+class PortfolioBacktest:
+    def __init__(self, panel:Panel, strategy:Type[PortfolioStrategy], max_positions:int=None,
+                 indicator_cache:IndicatorCache=None, verbosity:int=VERBOSE):
+        '''
+        PortfolioBacktest(panel, strategy, max_positions=None, indicator_cache=None, verbosity=VERBOSE)
+
+        panel: Panel of the tickers to trade (see Database.get_panel).
+        strategy: PortfolioStrategy to run across every ticker per timestep.
+        max_positions: Maximum number of open positions. Default = None for one per ticker.
+        indicator_cache: IndicatorCache used to reuse indicator results between runs, as for
+                         Backtest. Default = None to always recompute the indicators.
+        verbosity: Output written during the run, as for Backtest (see log.py).
+        '''
+        if len(panel) == 0:
+            raise ValueError("Empty panel passed to backtest.")
+
+        self._panel = panel
+        self._columns = {ticker: j for j, ticker in enumerate(panel.tickers)}
+        self._indicator_cache = indicator_cache
+        self._verbosity = verbosity
+
+        self._account = Account()
+        self._account.maxPositions = max_positions if max_positions is not None else len(panel.tickers)
+
+        self._strategy = strategy
+        self._strategy.data = panel
+        self._strategy.init()
+
+    @property
+    def account(self) -> Account:
+        return self._account
+
+    @property
+    def strategy(self) -> PortfolioStrategy:
+        return self._strategy
+
+    @property
+    def panel(self) -> Panel:
+        return self._panel
+
+    def final_equity(self) -> float:
+        '''
+        final_equity()
+
+        Account balance plus the open positions valued at each ticker's last known close.
+        '''
+        close = self._panel.frame('close').ffill().iloc[-1]
+        held = sum(shares * float(close[ticker]) for ticker, shares in self._account.positions.items())
+        return self._account.balance + held
+
+    def _holdings_value(self, prices:np.ndarray) -> float:
+        positions = self._account._positions
+        if not positions:
+            return 0.0
+        return float(sum(shares * prices[self._columns[ticker]] for ticker, shares in positions.items()))
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        '''
+        trades
+
+        The trade ledger of the run, one row per fill (see account.Recorder).
+        '''
+        return self._with_datetime(self._account.trades)
+
+    @property
+    def equity(self) -> pd.DataFrame:
+        '''
+        equity
+
+        The equity curve of the run, one row per timestep (see account.Recorder).
+        '''
+        return self._with_datetime(self._account.equity)
+
+    def stats(self, periods_per_year:int=252, risk_free:float=0.0) -> pd.Series:
+        '''
+        stats(periods_per_year=252, risk_free=0.0)
+
+        Performance statistics of the run. See stats.summary.
+        '''
+        equity = self._account.equity
+        table = stats.summary(equity['equity'], holdings=equity['holdings'], trades=self._account.trades,
+                              periods_per_year=periods_per_year, risk_free=risk_free)
+        return table.iloc[0].rename(self._strategy.name)
+
+    def _with_datetime(self, df:pd.DataFrame) -> pd.DataFrame:
+        df.insert(1, 'datetime', self._panel.index[df['bar'].to_numpy()])
+        return df
+
+    def _process_bar(self, bar:PanelBar):
+        high, low, bar_open = bar['high'], bar['low'], bar['open']
+        for ticker in self._account.pending_tickers():
+            j = self._columns[ticker]
+            for order, order_amount in self._account.process_bar(float(high[j]), float(low[j]), float(bar_open[j]), ticker):
+                if order_amount != 0 and self._verbosity >= VERBOSE:
+                    logger.info("%s %s", order.ticker, order_amount)
+
+    def run(self):
+        '''
+        run()
+
+        Runs the backtest: adds the indicator fields to the panel, then calls the Strategy's
+        apply() once per timestep and processes the returned orders in order.
+        '''
+        try:
+            self._run()
+        finally:
+            # Output is buffered during the run
+            flush()
+
+    def _summary(self, message:str, *args):
+        if self._verbosity >= SUMMARY:
+            logger.info(message, *args)
+
+    def _run(self):
+        self._summary("BACKTESTING STRATEGY: %s...", self._strategy.name)
+
+        indicators = self._strategy._required_indicators()
+        self._panel.add_fields(IndicatorGraph(indicators.values()).evaluate(cache=self._indicator_cache))
+        for name in indicators:
+            self._summary("     INDICATOR ADDED: %s", name)
+
+        # Views are taken once the fields are final, and moved along on every timestep
+        bar = PanelBar(self._panel)
+        window = PanelWindow(self._panel)
+        lookback = self._strategy.lookback
+
+        # Positions are valued at each ticker's last known close in the equity curve
+        close = self._panel['close']
+        last_close = np.full(len(self._columns), np.nan)
+        report = self._verbosity >= VERBOSE
+
+        for t in range(len(self._panel)):
+            bar._move(t)
+            window._move(max(0, t + 1 - lookback), t + 1)
+
+            # Fill the resting limit and stop orders reached by this bar
+            if self._account.has_pending:
+                self._process_bar(bar)
+
+            orders = self._strategy.apply(bar, window)
+            if orders is not None:
+                if isinstance(orders, Order):
+                    orders = [orders]
+
+                for order in orders:
+                    order_amount = self._account.process_order(order)
+                    if order_amount != 0 and report:
+                        logger.info("%s %s", order.ticker, order_amount)
+
+            np.copyto(last_close, close[t], where=~np.isnan(close[t]))
+            self._account.end_bar(holdings_value=self._holdings_value(last_close))
+
+        self._summary("%s", self._account.balance)
@@ -0,0 +1,84 @@
+import cProfile
+from time import perf_counter_ns
+import pandas as pd
+
+
+class PhaseTimer:
+    '''
+    PhaseTimer
+
+    Accumulates wall time (in nanoseconds, from perf_counter_ns) and call counts per named phase
+    of a backtest run, e.g. 'apply' or 'process_order'.
+    '''
+    def __init__(self):
+        # Phase -> [total nanoseconds, calls], in the order the phases were first seen
+        self._phases = {}
+
+    def add(self, phase:str, ns:int, calls:int=1):
+        entry = self._phases.get(phase)
+        if entry is None:
+            self._phases[phase] = [ns, calls]
+        else:
+            entry[0] += ns
+            entry[1] += calls
+
+    def time(self, phase:str, f, *args, **kwargs):
+        '''
+        time(phase, f, *args, **kwargs)
+
+        Calls f(*args, **kwargs), adds its wall time to 'phase' and returns its result.
+        '''
+        start = perf_counter_ns()
+        result = f(*args, **kwargs)
+        self.add(phase, perf_counter_ns() - start)
+        return result
+
+    def clear(self):
+        self._phases.clear()
+
+    @property
+    def total_ns(self) -> int:
+        return sum(ns for ns, _ in self._phases.values())
+
+    def report(self) -> pd.DataFrame:
+        '''
+        report
+
+        Returns a DataFrame with one row per phase: calls, total milliseconds, mean microseconds
+        per call and percentage of the total time of all phases.
+        '''
+        total = self.total_ns
+        rows = []
+        for phase, (ns, calls) in self._phases.items():
+            rows.append({
+                'phase': phase,
+                'calls': calls,
+                'total_ms': ns / 1e6,
+                'mean_us': ns / calls / 1e3 if calls > 0 else 0.0,
+                'percent': 100.0 * ns / total if total > 0 else 0.0,
+            })
+        return pd.DataFrame(rows, columns=['phase', 'calls', 'total_ms', 'mean_us', 'percent']).set_index('phase')
+
+    def __str__(self) -> str:
+        lines = [f"{'PHASE':<20}{'CALLS':>12}{'TOTAL (ms)':>14}{'MEAN (us)':>12}{'%':>8}"]
+        for phase, row in self.report().iterrows():
+            lines.append(f"{phase:<20}{int(row['calls']):>12}{row['total_ms']:>14.1f}{row['mean_us']:>12.2f}{row['percent']:>8.1f}")
+        lines.append(f"{'total':<20}{'':>12}{self.total_ns / 1e6:>14.1f}")
+        return "\n".join(lines)
+
+
+def apply_profiler(profiler):
+    '''
+    apply_profiler(profiler)
+
+    Returns the profiler to attach to Strategy.apply: a new cProfile.Profile for 'cprofile', or
+    'profiler' itself, which can be any object with enable() and disable() methods (e.g. a
+    wrapper around a sampling profiler).
+    '''
+    if profiler is None:
+        return None
+    if profiler == 'cprofile':
+        return cProfile.Profile()
+    if not (hasattr(profiler, 'enable') and hasattr(profiler, 'disable')):
+        raise TypeError("The apply profiler must be 'cprofile' or have enable() and disable() methods.")
+    return profiler
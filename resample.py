@@ -0,0 +1,305 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Day, Tick, Week, MonthBegin, MonthEnd
+from cache import _size_of
+
+# Default memory cap of a ResampleCache, in bytes
+_DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_DAY_NS = 86400 * 10**9
+
+# How each column is aggregated into a bar; any other column keeps its last value
+_AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def datetimes(df:pd.DataFrame) -> np.ndarray:
+    '''
+    datetimes(df)
+
+    Returns the datetimes of the rows of 'df' as a datetime64[ns] array, from its datetime index
+    or its 'datetime' column (strings, datetimes or epoch seconds).
+    '''
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.to_numpy(dtype='datetime64[ns]')
+    if 'datetime' in df.columns:
+        values = df['datetime']
+        if values.dtype.kind in 'iuf':
+            # Epoch seconds of the typed tables
+            return pd.to_datetime(values, unit='s').to_numpy(dtype='datetime64[ns]')
+        return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+    raise ValueError("Data needs a 'datetime' column or a datetime index to be resampled.")
+
+
+def bin_starts(values:np.ndarray, rule) -> np.ndarray:
+    '''
+    bin_starts(values, rule)
+
+    Returns, for every datetime in 'values', the start of the interval of 'rule' it falls in.
+    'rule' is a pandas frequency: a fixed width ('5min', '1h', '1D', ...), weeks ('W', ending on
+    Sunday, or 'W-FRI', ...) or months ('MS' / 'ME').
+    '''
+    offset = to_offset(rule)
+    ns = np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+
+    if isinstance(offset, (Tick, Day)):
+        # Days are calendar offsets rather than fixed widths in recent pandas
+        width = offset.n * _DAY_NS if isinstance(offset, Day) else offset.nanos
+        if width <= 0:
+            raise ValueError(f"Resampling rule {rule} has no width.")
+        # Intervals are aligned on the epoch, so e.g. hourly bars start on the hour
+        starts = ns - ns % width
+    elif isinstance(offset, Week) and offset.weekday is not None:
+        # Weeks end on the anchor weekday, so they start the day after it (1970-01-01 was a Thursday)
+        days = ns // _DAY_NS
+        first = (offset.weekday + 1) % 7
+        days = days - ((days + 3 - first) % (7 * offset.n))
+        starts = days * _DAY_NS
+    elif isinstance(offset, (MonthBegin, MonthEnd)):
+        months = ns.view('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+        months = months - months % offset.n
+        starts = months.astype('datetime64[M]').astype('datetime64[ns]').view(np.int64)
+    else:
+        raise ValueError(f"Unsupported resampling rule {rule}.")
+
+    return starts.view('datetime64[ns]')
+
+
+def _groups(starts:np.ndarray) -> np.ndarray:
+    # Positions of the first row of every bar; the rows are in datetime order
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+
+
+def _check_order(values:np.ndarray):
+    if len(values) > 1 and (values[1:] < values[:-1]).any():
+        raise ValueError("Data must be in datetime order to be resampled.")
+
+
+def _aggregate(df:pd.DataFrame, starts:np.ndarray, first:np.ndarray) -> pd.DataFrame:
+    last = np.append(first[1:], len(df)) - 1
+
+    columns = {}
+    for column in df.columns:
+        if column == 'datetime':
+            continue
+        x = df[column].to_numpy(dtype=np.float64)
+        how = _AGGREGATIONS.get(column, 'last')
+        if len(first) == 0:
+            columns[column] = x[:0]
+        elif how == 'first':
+            columns[column] = x[first]
+        elif how == 'last':
+            columns[column] = x[last]
+        elif how == 'max':
+            columns[column] = np.fmax.reduceat(x, first)
+        elif how == 'min':
+            columns[column] = np.fmin.reduceat(x, first)
+        else:
+            columns[column] = np.add.reduceat(np.nan_to_num(x), first)
+
+    index = pd.DatetimeIndex(starts[first], name='datetime')
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _completed(values:np.ndarray, first:np.ndarray) -> np.ndarray:
+    # Datetime of the last row of each bar; a row sees every bar ending at or before it
+    ends = values[np.append(first[1:], len(values)) - 1]
+    return np.searchsorted(ends, values, side='right').astype(np.int64) - 1
+
+
+def resample_ohlcv(df:pd.DataFrame, rule) -> pd.DataFrame:
+    '''
+    resample_ohlcv(df, rule)
+
+    Aggregates the rows of 'df' (in datetime order) into bars of 'rule' (see bin_starts): first
+    open, highest high, lowest low, last close and total volume, ignoring NaN. Other columns keep
+    their last value. Returns float64 columns indexed by the start of each bar, in a datetime64
+    'datetime' index; intervals without any rows are left out.
+
+    The bars are built with NumPy reductions over the group boundaries, with no per-bar Python work.
+    '''
+    values = datetimes(df)
+    _check_order(values)
+    starts = bin_starts(values, rule)
+    return _aggregate(df, starts, _groups(starts))
+
+
+def completed_bars(values:np.ndarray, rule) -> np.ndarray:
+    '''
+    completed_bars(values, rule)
+
+    Index map from rows to the bars resample_ohlcv() makes of them: for every datetime in 'values',
+    the position of the latest bar of 'rule' that is complete at that row, or -1 if there is none
+    yet. A bar is complete at its last row, so a row never sees a bar that still has rows to come.
+    '''
+    values = np.asarray(values, dtype='datetime64[ns]')
+    return _completed(values, _groups(bin_starts(values, rule)))
+
+
+def timeframe(df:pd.DataFrame, rule) -> 'Timeframe':
+    '''
+    timeframe(df, rule)
+
+    Returns the bars of 'rule' made of the rows of 'df' as a Timeframe aligned to those rows,
+    the same as resample_ohlcv() and completed_bars() but binning the rows only once.
+    '''
+    values = datetimes(df)
+    _check_order(values)
+    starts = bin_starts(values, rule)
+    first = _groups(starts)
+    return Timeframe(rule, _aggregate(df, starts, first), _completed(values, first))
+
+
+class ResampleCache:
+    '''
+    ResampleCache
+
+    Memoizes resample_ohlcv() results, keyed on the rule and a key identifying the data given by
+    the caller (e.g. a table and its row count), and evicts them least recently used first once
+    they take up more than 'max_bytes'. Cached bars are shared and must not be modified.
+
+    Data in memory is not fingerprinted: hashing it takes longer than resampling it.
+    '''
+    def __init__(self, max_bytes:int=_DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("Cache size cannot be less than zero.")
+
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, load, rule) -> pd.DataFrame:
+        '''
+        get(key, load, rule)
+
+        Returns resample_ohlcv(load(), rule), computing and storing it on a miss. 'load' returns
+        the data identified by 'key', so that it is only loaded on a miss.
+        '''
+        key = (key, to_offset(rule).freqstr)
+
+        if key in self._entries:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+        self._misses += 1
+        bars = resample_ohlcv(load(), rule)
+        size = _size_of(bars)
+
+        if size <= self._max_bytes:
+            self._entries[key] = (bars, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+        return bars
+
+
+# Cache shared by the databases of this process unless told otherwise
+default_resample_cache = ResampleCache()
+
+
+class Timeframe:
+    '''
+    Timeframe(rule, bars, positions)
+
+    Higher-timeframe bars aligned to the rows of a backtest. 'positions' maps every row to the
+    latest complete bar (see completed_bars), so the bar of the current row is found in O(1).
+    Strategies get one from Strategy.timeframe(rule) once Backtest.run has built it.
+    '''
+    __slots__ = ('_rule', '_bars', '_positions', '_arrays', '_data')
+
+    def __init__(self, rule, bars:pd.DataFrame, positions:np.ndarray):
+        self._rule = rule
+        self._bars = bars
+        self._positions = positions
+        self._arrays = {name: bars[name].to_numpy() for name in bars.columns}
+        # Object whose len() is the number of rows reached so far (a backtest's Data)
+        self._data = None
+
+    @property
+    def rule(self):
+        return self._rule
+
+    @property
+    def bars(self) -> pd.DataFrame:
+        return self._bars
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._positions
+
+    def _bind(self, data):
+        self._data = data
+
+    @property
+    def position(self) -> int:
+        '''
+        position
+
+        Position in 'bars' of the latest complete bar at the current row, -1 if there is none yet.
+        '''
+        return int(self._positions[len(self._data) - 1])
+
+    def __getitem__(self, field:str) -> float:
+        '''
+        Value of 'field' of the latest complete bar at the current row, NaN if there is none yet.
+        '''
+        i = self._positions[len(self._data) - 1]
+        return self._arrays[field][i] if i >= 0 else np.nan
+
+    def history(self, field:str, n:int) -> np.ndarray:
+        '''
+        history(field, n)
+
+        Read-only view of 'field' over the last 'n' complete bars at the current row (fewer at the start).
+        '''
+        end = self._positions[len(self._data) - 1] + 1
+        view = self._arrays[field][max(0, end - n):end]
+        view.flags.writeable = False
+        return view
+
+    def aligned(self, values) -> np.ndarray:
+        '''
+        aligned(values)
+
+        Value of the latest complete bar for every row at once, NaN where there is none. 'values' is
+        a field of the bars, or any array or Series with one value per bar, such as an indicator
+        computed on the bars. Use it to add higher-timeframe indicators as columns or in
+        Strategy.signals().
+        '''
+        if isinstance(values, str):
+            values = self._arrays[values]
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != len(self._bars):
+            raise ValueError("Values to align must have one value per bar.")
+        values = values[np.maximum(self._positions, 0)]
+        values[self._positions < 0] = np.nan
+        return values
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+# Bars per year of daily data
+_TRADING_DAYS = 252
+
+# Columns of the table returned by summary()
+STATISTICS = ['total_return', 'cagr', 'volatility', 'sharpe', 'sortino', 'max_drawdown',
+              'max_drawdown_duration', 'exposure', 'trades', 'win_rate', 'profit_factor']
+
+
+def _as_matrix(values) -> tuple:
+    '''
+    _as_matrix(values)
+
+    Returns 'values' as a float64 (bars x runs) matrix, along with the names of the runs.
+    '''
+    if isinstance(values, pd.DataFrame):
+        return values.to_numpy(dtype=np.float64), list(values.columns)
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=np.float64)[:, np.newaxis], [values.name if values.name is not None else 0]
+
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    if values.ndim != 2:
+        raise ValueError("Equity must be 1-D (bars) or 2-D (bars x runs).")
+    return values, list(range(values.shape[1]))
+
+
+def returns(equity) -> np.ndarray:
+    '''
+    returns(equity)
+
+    Simple returns from one bar to the next of a 1-D equity curve or a (bars x runs) matrix.
+    The result has one row less than the equity.
+    '''
+    equity, _ = _as_matrix(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return equity[1:] / equity[:-1] - 1.0
+
+
+def drawdown(equity, peak:np.ndarray=None) -> np.ndarray:
+    '''
+    drawdown(equity, peak=None)
+
+    Drawdown of every bar: the equity relative to its running peak, minus one (0 at a new peak).
+    The running peak is computed unless given.
+    '''
+    equity, _ = _as_matrix(equity)
+    if peak is None:
+        peak = np.fmax.accumulate(equity, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return equity / peak - 1.0
+
+
+def drawdown_duration(equity, peak:np.ndarray=None) -> np.ndarray:
+    '''
+    drawdown_duration(equity, peak=None)
+
+    Number of bars since the running peak of the equity, for every bar.
+    The running peak is computed unless given.
+    '''
+    equity, _ = _as_matrix(equity)
+    if peak is None:
+        peak = np.fmax.accumulate(equity, axis=0)
+    bars = np.arange(len(equity), dtype=np.int32)[:, np.newaxis]
+
+    # Position of the latest bar at the peak, carried forward
+    at_peak = np.where(equity >= peak, bars, np.int32(0))
+    np.maximum.accumulate(at_peak, axis=0, out=at_peak)
+    return bars - at_peak
+
+
+def trade_pnl(trades:pd.DataFrame) -> pd.DataFrame:
+    '''
+    trade_pnl(trades)
+
+    Pairs the entries (buy) and exits (short) of a trade ledger (see account.Recorder) first in,
+    first out per ticker, and returns one row per closed trade with its profit 'pnl'.
+    A 'run' column, if present, keeps the trades of several runs apart.
+    '''
+    keys = ['run', 'ticker'] if 'run' in trades.columns else ['ticker']
+    columns = keys + ['bar', 'amount']
+
+    entries = trades.loc[trades['amount'] < 0, columns]
+    exits = trades.loc[trades['amount'] > 0, columns]
+    entries = entries.assign(n=entries.groupby(keys, sort=False).cumcount())
+    exits = exits.assign(n=exits.groupby(keys, sort=False).cumcount())
+
+    closed = entries.merge(exits, on=keys + ['n'], suffixes=('_entry', '_exit'))
+    closed['pnl'] = closed['amount_exit'] + closed['amount_entry']
+    return closed.drop(columns='n')
+
+
+def _trade_statistics(trades, runs:list) -> pd.DataFrame:
+    if isinstance(trades, (list, tuple)):
+        trades = pd.concat([t.assign(run=run) for run, t in zip(runs, trades)], ignore_index=True)
+    elif 'run' not in trades.columns:
+        trades = trades.assign(run=runs[0])
+
+    closed = trade_pnl(trades)
+    pnl = closed['pnl']
+    grouped = pd.DataFrame({
+        'trades': 1,
+        'wins': (pnl > 0).astype(np.int64),
+        'gross_profit': pnl.clip(lower=0),
+        'gross_loss': -pnl.clip(upper=0),
+        'run': closed['run'],
+    }).groupby('run').sum().reindex(runs, fill_value=0)
+
+    table = pd.DataFrame(index=grouped.index)
+    table['trades'] = grouped['trades']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['win_rate'] = grouped['wins'] / grouped['trades']
+        table['profit_factor'] = grouped['gross_profit'] / grouped['gross_loss']
+    return table
+
+
+def summary(equity, holdings=None, trades=None, periods_per_year:int=_TRADING_DAYS,
+            risk_free:float=0.0) -> pd.DataFrame:
+    '''
+    summary(equity, holdings=None, trades=None, periods_per_year=252, risk_free=0.0)
+
+    Performance statistics of one equity curve, or of many at once. Returns a DataFrame with one
+    row per run and the STATISTICS columns.
+
+        equity: 1-D equity curve, or a (bars x runs) matrix / DataFrame, one column per run.
+        holdings: Value of the open positions per bar, same shape as 'equity'. Used for the
+                  exposure, the fraction of bars with an open position.
+        trades: Trade ledger (see account.Recorder) of a single run, a list of ledgers (one per
+                run), or one ledger with a 'run' column. Used for the trade statistics.
+        periods_per_year: Number of bars per year, to annualize. Default = 252 for daily bars.
+        risk_free: Annual risk-free rate, subtracted from the returns for Sharpe and Sortino.
+    '''
+    equity, runs = _as_matrix(equity)
+    n = len(equity)
+    if n < 2:
+        raise ValueError("At least two bars are needed for statistics.")
+
+    r = returns(equity)
+    excess = r - risk_free / periods_per_year
+    scale = np.sqrt(periods_per_year)
+
+    # The nan-aware reductions copy the data, so they are only used when needed
+    has_nan = np.isnan(r).any()
+    mean_of = np.nanmean if has_nan else np.mean
+    std_of = np.nanstd if has_nan else np.std
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = equity[-1] / equity[0]
+        mean = mean_of(excess, axis=0)
+        std = std_of(r, axis=0, ddof=1)
+        downside = np.sqrt(mean_of(np.minimum(excess, 0.0) ** 2, axis=0))
+
+        table = pd.DataFrame(index=pd.Index(runs, name='run'))
+        table['total_return'] = growth - 1.0
+        table['cagr'] = growth ** (periods_per_year / (n - 1)) - 1.0
+        table['volatility'] = std * scale
+        table['sharpe'] = mean / std * scale
+        table['sortino'] = mean / downside * scale
+
+    peak = np.fmax.accumulate(equity, axis=0)
+    table['max_drawdown'] = np.nanmin(drawdown(equity, peak), axis=0)
+    table['max_drawdown_duration'] = drawdown_duration(equity, peak).max(axis=0)
+
+    if holdings is not None:
+        holdings, _ = _as_matrix(holdings)
+        table['exposure'] = np.mean(holdings != 0, axis=0)
+    else:
+        table['exposure'] = np.nan
+
+    if trades is not None:
+        table = table.join(_trade_statistics(trades, runs))
+    else:
+        table['trades'] = np.nan
+        table['win_rate'] = np.nan
+        table['profit_factor'] = np.nan
+
+    return table[STATISTICS]
@@ -119,3 +119,128 @@ def test_execute_order_list_appending(order_submission_fixture):
     assert str(first_executed) == str(acnt.executed_orders_list[0])
 
     
+
+def test_limit_and_stop_orders_rest_until_reached():
+    from account import Account
+    from orders import buy, short, _LIMIT, _STOP
+
+    acnt = Account(initial_balance=1000.00)
+    acnt.maxPositions = 2
+
+    assert acnt.process_order(buy(_LIMIT, shares=1, price=95.0, ticker="SPY")) == 0
+    assert acnt.process_order(buy(_STOP, shares=1, price=110.0, ticker="SPY")) == 0
+    assert len(acnt.pending_orders()) == 2
+
+    # Neither price reached
+    assert acnt.process_bar(high=105.0, low=96.0, ticker="SPY") == []
+
+    fills = acnt.process_bar(high=106.0, low=94.0, ticker="SPY")
+    assert [(o.order_type, amount) for o, amount in fills] == [(_LIMIT, -95.0)]
+
+    # The stop gaps through: filled at the open
+    fills = acnt.process_bar(high=115.0, low=112.0, bar_open=112.0, ticker="SPY")
+    assert [amount for _, amount in fills] == [-112.0]
+    assert acnt.positions == {"SPY": 2}
+
+    acnt.process_order(short(_LIMIT, shares=1, price=120.0, ticker="SPY"))
+    acnt.process_order(short(_STOP, shares=1, price=100.0, ticker="SPY"))
+    fills = acnt.process_bar(high=121.0, low=99.0, ticker="SPY")
+    assert sorted(amount for _, amount in fills) == [100.0, 120.0]
+    assert acnt.pending_orders() == []
+    assert acnt.balance == 1000.00 - 95.0 - 112.0 + 120.0 + 100.0
+
+def test_order_book_matches_only_triggered_orders():
+    from account import OrderBook
+    from orders import buy, short, _LIMIT
+
+    book = OrderBook()
+    for price in range(1, 101):
+        book.add(buy(_LIMIT, shares=1, price=float(price)))
+        book.add(short(_LIMIT, shares=1, price=float(price + 100)))
+
+    fills = book.match(high=105.0, low=97.0)
+    assert sorted(price for _, price in fills) == [97.0, 98.0, 99.0, 100.0, 101.0, 102.0, 103.0, 104.0, 105.0]
+    assert len(book) == 200 - 9
+
+def test_sell_and_cover_orders_cannot_rest():
+    from account import Account
+    from orders import sell, cover, _LIMIT, _STOP
+
+    acnt = Account()
+    with pytest.raises(ValueError):
+        acnt.process_order(sell(_LIMIT, shares=1, price=100.0))
+    with pytest.raises(ValueError):
+        acnt.process_order(cover(_STOP, shares=1, price=100.0))
+    assert acnt.pending_orders() == []
+
+def test_unfilled_triggered_order_keeps_resting():
+    from account import Account
+    from orders import buy, short, _LIMIT, _MARKET
+
+    acnt = Account(initial_balance=1000.00)
+    acnt.process_order(buy(_MARKET, shares=1, price=100.0, ticker="SPY"))
+    first = buy(_LIMIT, shares=1, price=95.0, ticker="SPY")
+    second = buy(_LIMIT, shares=1, price=95.0, ticker="SPY")
+    acnt.process_order(first)
+    acnt.process_order(second)
+
+    # Already in a position: the limits trigger but cannot fill, so they stay in the book
+    fills = acnt.process_bar(high=101.0, low=94.0, ticker="SPY")
+    assert [amount for _, amount in fills] == [0, 0]
+    assert acnt.pending_orders() == [first, second]
+
+    acnt.process_order(short(_MARKET, shares=1, price=96.0, ticker="SPY"))
+    fills = acnt.process_bar(high=99.0, low=93.0, ticker="SPY")
+    assert [(order, amount) for order, amount in fills] == [(first, -95.0), (second, 0)]
+    assert acnt.pending_orders() == [second]
+    assert acnt.balance == 1000.00 - 100.0 + 96.0 - 95.0
+
+def test_order_queue_cancel_and_execute(order_submission_fixture):
+    acnt, orders, dates = order_submission_fixture
+
+    ids = [acnt.submit_order(order, dates[d]) for d, order in enumerate(orders)]
+    assert ids == [0, 1, 2, 3, 4]
+
+    assert acnt.cancel_order(ids[0])
+    assert acnt.cancel_order(ids[3])
+    assert not acnt.cancel_order(ids[3])
+    assert list(acnt.submission_order_list.keys()) == [1, 2, 4]
+
+    executed = acnt.execute_order()
+    assert executed['id'] == 1
+    assert acnt.execute_order(orders[4])['id'] == 4
+    assert acnt.num_submitted == 1
+    assert acnt.next_order() is orders[2]
+    assert acnt.execute_order() is None
+
+def test_executed_orders_are_bounded():
+    from account import Account
+    from orders import buy, _MARKET
+
+    acnt = Account(executed_orders_kept=3)
+    orders = [buy(_MARKET, shares=1, price=10.0) for _ in range(10)]
+    for order in orders:
+        acnt.submit_order(order)
+    while acnt.execute_order() is not None:
+        pass
+
+    assert acnt.executed_orders_list == orders[-3:]
+
+def test_submitted_limit_order_is_executed_once_filled():
+    from account import Account
+    from orders import buy, _LIMIT
+
+    acnt = Account(initial_balance=1000.00)
+    order = buy(_LIMIT, shares=1, price=95.0)
+    acnt.submit_order(order)
+
+    executed = acnt.execute_order()
+    assert executed['resting'] and executed['amount'] == 0
+    assert acnt.has_pending
+    assert acnt.executed_orders_list == []
+    assert order.processed is None
+
+    acnt.process_bar(high=101.0, low=94.0, bar_open=100.0)
+    assert not acnt.has_pending
+    assert acnt.executed_orders_list == [order]
+    assert order.processed is not None
@@ -0,0 +1,351 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import pandas as pd
+import backtest as bt
+from orders import buy, short, _MARKET
+from account import Account
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMA, SMACrossover, LimitEntry
+
+
+@pytest.fixture
+def ohlcv():
+    return generate_ohlcv(2000, seed=7)
+
+def test_vectorized_balance_matches_event_loop(ohlcv):
+    loop = bt.Backtest(ohlcv.copy(), SMACrossover())
+    loop.run()
+
+    vectorized = bt.Backtest(ohlcv.copy(), SMACrossover())
+    vectorized.run(vectorized=True)
+
+    assert vectorized._account.balance == loop._account.balance
+
+def test_process_signals_matches_process_order(ohlcv):
+    from account import Account
+
+    strategy = SMACrossover()
+    bt.Backtest(ohlcv, strategy).run(vectorized=True)
+    entries, exits, entry_prices, exit_prices = strategy.signals(strategy.data)
+
+    for max_positions in (1, 3):
+        loop_account = Account()
+        loop_account.maxPositions = max_positions
+        expected = []
+        for entry, exit_, entry_price, exit_price in zip(entries, exits, entry_prices, exit_prices):
+            order = None
+            if entry:
+                order = buy(_MARKET, shares=1, price=float(entry_price))
+            elif exit_:
+                order = short(_MARKET, shares=1, price=float(exit_price))
+            expected.append(loop_account.process_order(order))
+
+        account = Account()
+        account.maxPositions = max_positions
+        amounts, balances = account.process_signals(entries, exits, entry_prices, exit_prices)
+
+        assert amounts.tolist() == expected
+        assert balances[-1] == loop_account.balance == account.balance
+        assert account.numPositions == loop_account.numPositions
+
+@pytest.mark.parametrize('max_positions', [2, 3, 5])
+def test_process_signals_saturates_positions(max_positions):
+    import numpy as np
+    from account import Account
+
+    rng = np.random.default_rng(max_positions)
+    entries = rng.random(500) < 0.4
+    exits = rng.random(500) < 0.4
+    prices = rng.uniform(90.0, 110.0, 500)
+
+    loop_account = Account()
+    loop_account.maxPositions = max_positions
+    expected = []
+    for entry, exit_, price in zip(entries, exits, prices):
+        order = None
+        if entry:
+            order = buy(_MARKET, shares=1, price=float(price))
+        elif exit_:
+            order = short(_MARKET, shares=1, price=float(price))
+        expected.append(loop_account.process_order(order))
+
+    # Processed in two calls, so the second one starts from open positions
+    account = Account()
+    account.maxPositions = max_positions
+    first, _ = account.process_signals(entries[:250], exits[:250], prices[:250], prices[:250])
+    second, _ = account.process_signals(entries[250:], exits[250:], prices[250:], prices[250:])
+
+    assert first.tolist() + second.tolist() == expected
+    assert account.numPositions == loop_account.numPositions
+
+def test_signals_not_defined():
+    class NoSignals(bt.Strategy):
+        def init(self):
+            pass
+
+        def apply(self, current_data, lookback_data):
+            return None
+
+    with pytest.raises(NotImplementedError):
+        bt.Backtest(generate_ohlcv(10), NoSignals()).run(vectorized=True)
+
+def test_window_is_readonly_view(ohlcv):
+    data = bt.Data(ohlcv)
+    data._init()
+    for _ in range(50):
+        data._next()
+
+    window = data.window(lookback=20)
+    close = window['close']
+
+    assert len(window) == 20
+    assert close.tolist() == ohlcv['close'].iloc[30:50].tolist()
+    assert not close.flags.writeable
+    with pytest.raises(ValueError):
+        close[0] = 1.0
+
+def test_window_matches_data_slice(ohlcv):
+    data = bt.Data(ohlcv)
+    data._init()
+    data._next()
+    first = data.window(lookback=0)
+    data._next()
+    second = data.window(lookback=0)
+
+    assert first is second
+    for lookback in (0, 1, 2, 5):
+        assert data.window(lookback=lookback)['close'].tolist() == data.data(lookback=lookback)['close'].tolist()
+
+def test_lookback_view_backtest(ohlcv):
+    class WindowStrategy(SMACrossover):
+        def init(self):
+            super().init()
+            self.lookback = 5
+            self.windows = []
+
+        def apply(self, current_data, lookback_data):
+            self.windows.append(float(lookback_data['close'].mean()))
+            return super().apply(current_data, lookback_data)
+
+    strategy = WindowStrategy()
+    bt.Backtest(ohlcv, strategy, lookback_view=True).run()
+
+    assert strategy.windows[-1] == pytest.approx(ohlcv['close'].iloc[-5:].mean())
+
+def test_record_type_indexing():
+    from utility.structures import make_record_type
+    Bar = make_record_type(['datetime', 'close', '10-Period SMA'])
+    bar = Bar._make(('2020-01-02', 10.5, 9.75))
+
+    assert bar['close'] == bar.close == bar[1] == 10.5
+    assert bar['10-Period SMA'] == 9.75
+    assert 'close' in bar
+    assert bar.to_dict() == {'datetime': '2020-01-02', 'close': 10.5, '10-Period SMA': 9.75}
+    with pytest.raises(AttributeError):
+        bar.volume = 5
+
+def test_bar_records_backtest(ohlcv):
+    series_rows = bt.Backtest(ohlcv.copy(), SMACrossover())
+    series_rows.run()
+
+    records = bt.Backtest(ohlcv.copy(), SMACrossover(), bar_records=True)
+    records.run()
+
+    assert records._account.balance == series_rows._account.balance
+    assert records._data_test.record_type._fields[-1] == '100-Period SMA'
+
+def test_optimize_ranks_parameter_grid(ohlcv):
+    backtest = bt.Backtest(ohlcv, SMACrossover())
+    grid = {'fast': [5, 10], 'slow': [50, 100]}
+
+    serial = backtest.optimize(grid, n_jobs=1, vectorized=True)
+    parallel = backtest.optimize(grid, n_jobs=2, vectorized=True)
+
+    assert list(serial.columns) == ['fast', 'slow', 'balance']
+    assert len(serial) == 4
+    assert serial['balance'].is_monotonic_decreasing
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    single = bt.Backtest(ohlcv.copy(), SMACrossover())
+    single.run(vectorized=True)
+    row = serial[(serial['fast'] == 10) & (serial['slow'] == 100)]
+    assert row['balance'].iloc[0] == single.account.balance
+
+def test_optimize_unknown_parameter(ohlcv):
+    with pytest.raises(AttributeError):
+        bt.Backtest(ohlcv, SMACrossover()).optimize({'period': [1, 2]}, n_jobs=1)
+
+def test_ring_buffer_keeps_last_rows(ohlcv):
+    from utility.structures import RingBuffer
+    ring = RingBuffer(50)
+    for start in range(0, 1000, 40):
+        ring.extend(ohlcv.iloc[start:start + 40])
+
+    kept = ring.to_frame()
+    assert len(kept) == 50
+    assert kept['close'].tolist() == ohlcv['close'].iloc[950:1000].tolist()
+    assert kept['datetime'].tolist() == ohlcv['datetime'].iloc[950:1000].tolist()
+
+def test_streamed_backtest_matches_full_backtest(ohlcv):
+    full = bt.Backtest(ohlcv.copy(), SMACrossover())
+    full.run()
+
+    chunks = (ohlcv.iloc[i:i + 300] for i in range(0, len(ohlcv), 300))
+    streamed = bt.Backtest(chunks, SMACrossover(), bar_records=True, warmup=99)
+    streamed.run()
+
+    assert streamed.account.balance == full.account.balance
+
+def test_streamed_warmup_from_indicators(ohlcv):
+    import indicators as ind
+
+    class BuiltinCrossover(SMACrossover):
+        def init(self):
+            self._name = "Built-in SMA Crossover"
+            self._fast_name = "fast"
+            self._slow_name = "slow"
+            self.add_indicator(ind.SMA("fast", 10, self.data['close']))
+            self.add_indicator(ind.SMA("slow", 100, self.data['close']))
+
+    full = bt.Backtest(ohlcv.copy(), BuiltinCrossover())
+    full.run()
+
+    chunks = (ohlcv.iloc[i:i + 300] for i in range(0, len(ohlcv), 300))
+    streamed = bt.Backtest(chunks, BuiltinCrossover())
+    streamed.run()
+    assert streamed.account.balance == full.account.balance
+
+    # Indicators that do not know their warmup cannot silently restart at every chunk
+    with pytest.raises(ValueError):
+        bt.Backtest((ohlcv.iloc[i:i + 300] for i in range(0, len(ohlcv), 300)), SMACrossover())
+
+def test_streamed_lookback_spans_chunks(ohlcv):
+    class LookbackStrategy(SMACrossover):
+        def init(self):
+            super().init()
+            self.lookback = 3
+            self.windows = []
+
+        def apply(self, current_data, lookback_data):
+            self.windows.append(lookback_data['close'].tolist())
+            return None
+
+    strategy = LookbackStrategy()
+    chunks = (ohlcv.iloc[i:i + 100] for i in range(0, 300, 100))
+    bt.Backtest(chunks, strategy, lookback_view=True, warmup=99).run()
+
+    assert len(strategy.windows) == 300
+    assert strategy.windows[100] == ohlcv['close'].iloc[98:101].tolist()
+
+@pytest.mark.parametrize('series', [lambda data: data['close'].diff(), lambda data: (data['high'] + data['low']) / 2])
+def test_streamed_indicators_need_data_columns(ohlcv, series):
+    class DerivedSeries(SMACrossover):
+        def init(self):
+            super().init()
+            self.add_indicator(SMA("derived", 10, series(self.data)))
+
+    # A Series computed from the columns cannot be rebuilt for the next chunks
+    chunks = (ohlcv.iloc[i:i + 300] for i in range(0, len(ohlcv), 300))
+    with pytest.raises(ValueError):
+        bt.Backtest(chunks, DerivedSeries(), warmup=99)
+
+def test_resting_limit_order_filled_by_later_bar(ohlcv):
+    backtest = bt.Backtest(ohlcv.copy(), LimitEntry(), bar_records=True)
+    backtest.run()
+
+    limit = float(ohlcv['close'].iloc[0]) * 0.95
+    hit = (ohlcv['low'].iloc[1:] <= limit).idxmax()
+    expected = min(limit, float(ohlcv['open'].loc[hit]))
+
+    assert backtest.account.pending_orders() == []
+    assert backtest.account.balance == Account().balance - expected
+
+def test_trade_ledger_and_equity_curve(ohlcv):
+    loop = bt.Backtest(ohlcv.copy(), SMACrossover(), bar_records=True)
+    loop.run()
+    vectorized = bt.Backtest(ohlcv.copy(), SMACrossover())
+    vectorized.run(vectorized=True)
+
+    trades = loop.trades
+    assert len(trades) > 0
+    assert trades['amount'].sum() == pytest.approx(loop.account.balance - Account().balance)
+    assert trades['balance'].iloc[-1] == loop.account.balance
+    assert trades['datetime'].tolist() == ohlcv['datetime'].iloc[trades['bar']].tolist()
+
+    equity = loop.equity
+    assert len(equity) == len(ohlcv)
+    assert equity['balance'].iloc[-1] == loop.account.balance
+
+    pd.testing.assert_frame_equal(vectorized.trades.drop(columns='id'), trades.drop(columns='id'))
+    pd.testing.assert_frame_equal(vectorized.equity, equity)
+
+def test_verbosity_levels(ohlcv, capsys):
+    from log import QUIET, SUMMARY
+
+    bt.Backtest(ohlcv.copy(), SMACrossover()).run()
+    verbose = capsys.readouterr().out.splitlines()
+    bt.Backtest(ohlcv.copy(), SMACrossover(), verbosity=SUMMARY).run()
+    summary = capsys.readouterr().out.splitlines()
+    backtest = bt.Backtest(ohlcv.copy(), SMACrossover(), verbosity=QUIET)
+    backtest.run()
+    quiet = capsys.readouterr().out
+
+    assert verbose[0] == "BACKTESTING STRATEGY: SMA Crossover Strategy..."
+    assert verbose[1:3] == ["     INDICATOR ADDED: 10-Period SMA", "     INDICATOR ADDED: 100-Period SMA"]
+    assert verbose[-1] == str(backtest.account.balance)
+    amounts = backtest.trades['amount'].tolist()
+    assert [float(line) for line in verbose[3:-1]] == amounts
+    assert summary == verbose[:3] + verbose[-1:]
+    assert quiet == ""
+
+def test_profiled_run_reports_phases(ohlcv, capsys):
+    import pstats
+    from log import SUMMARY
+
+    backtest = bt.Backtest(ohlcv.copy(), SMACrossover(), indicator_cache=None, verbosity=SUMMARY,
+                           profile_apply='cprofile')
+    backtest.run()
+
+    report = backtest.profile.report()
+    assert report.loc['indicators', 'calls'] == 2
+    for phase in ('next', 'lookback', 'apply', 'process_order', 'record'):
+        assert report.loc[phase, 'calls'] == len(ohlcv)
+    assert report['percent'].sum() == pytest.approx(100.0)
+    assert "PHASE" in capsys.readouterr().out
+
+    stats = pstats.Stats(backtest.apply_profiler)
+    assert any(name == 'apply' for _, _, name in stats.stats)
+
+    plain = bt.Backtest(ohlcv.copy(), SMACrossover(), indicator_cache=None)
+    plain.run()
+    assert plain.profile is None
+    assert plain.account.balance == backtest.account.balance
+
+@pytest.mark.parametrize('options', [{}, {'bar_records': True, 'lookback_view': True}, {'incremental': True}])
+@pytest.mark.parametrize('strategy', [SMACrossover, LimitEntry])
+def test_profiled_loop_matches_plain_loop(ohlcv, options, strategy):
+    from log import QUIET
+
+    # _run_rows_profiled is a copy of _run_rows, so both must give the same results
+    plain = bt.Backtest(ohlcv.copy(), strategy(), verbosity=QUIET, **options)
+    plain.run()
+    profiled = bt.Backtest(ohlcv.copy(), strategy(), verbosity=QUIET, profile=True, **options)
+    profiled.run()
+
+    pd.testing.assert_frame_equal(profiled.trades, plain.trades)
+    pd.testing.assert_frame_equal(profiled.equity, plain.equity)
+
+def test_profiler_removed_when_apply_raises(ohlcv):
+    class Failing(SMACrossover):
+        def apply(self, current_data, lookback_data):
+            raise RuntimeError("apply failed")
+
+    backtest = bt.Backtest(ohlcv.copy(), Failing(), profile_apply='cprofile')
+    with pytest.raises(RuntimeError):
+        backtest.run()
+    assert sys.getprofile() is None
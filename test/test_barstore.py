@@ -0,0 +1,98 @@
+import sys
+import os
+import sqlite3
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+from barstore import BarStore
+from database import Database
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+@pytest.fixture
+def stores(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'stock_database.db')
+    write_sqlite_table(conn, 'SPY', 'DAY', generate_ohlcv(300))
+    conn.close()
+
+    db = Database(db_name='stock_database.db', db_path=tmp_path, cache_path=tmp_path / 'cache')
+    store = BarStore(tmp_path / 'bars')
+    db.connect()
+    store.connect()
+    yield db, store
+    store.disconnect()
+    db.disconnect()
+
+def test_convert_matches_database(stores):
+    db, store = stores
+    report = store.convert(db, 'SPY', 'DAY', chunksize=64)
+    assert report['table'] == 'SPY_1DAY' and report['rows'] == 300
+    assert store.tables() == ['SPY_1DAY']
+
+    expected = db.get_dataframe(ticker='SPY', timeframe='DAY', cache=True)
+    df = store.get_dataframe(ticker='SPY', timeframe='DAY')
+    pd.testing.assert_frame_equal(df, expected, check_freq=False)
+
+    # Zero-copy: the index and columns are read-only views of the mapped files
+    again = store.get_dataframe(ticker='SPY', timeframe='DAY', start='2000-02-01')
+    assert np.shares_memory(df['close'].to_numpy(), again['close'].to_numpy())
+    assert np.shares_memory(df.index.to_numpy(), again.index.to_numpy())
+    assert not df['close'].to_numpy().flags.writeable
+
+def test_convert_drops_duplicate_datetimes(stores):
+    db, store = stores
+    conn = db.get_connection()
+    # Without a primary key a TEXT table can repeat a datetime
+    conn.execute("CREATE TABLE QQQ_1DAY (datetime TEXT, open TEXT, high TEXT, low TEXT, close TEXT, volume TEXT)")
+    days = ['2000-01-03', '2000-01-04', '2000-01-04', '2000-01-05', '2000-01-06', '2000-01-06', '2000-01-07']
+    conn.executemany("INSERT INTO QQQ_1DAY VALUES (?, '1', '1', '1', ?, '1')",
+                     [(day, str(float(i))) for i, day in enumerate(days)])
+    conn.commit()
+
+    # The result does not depend on where the chunks split the duplicates
+    frames = []
+    for chunksize in (1, 2, 3, 1000):
+        assert store.convert(db, 'QQQ', 'DAY', chunksize=chunksize)['rows'] == 5
+        frames.append(store.get_dataframe(ticker='QQQ', timeframe='DAY').copy())
+    for df in frames:
+        pd.testing.assert_frame_equal(df, frames[0])
+    assert frames[0].index.is_unique and frames[0].index.is_monotonic_increasing
+
+def test_date_range_and_columns(stores):
+    db, store = stores
+    store.convert(db, 'SPY', 'DAY')
+
+    expected = db.get_dataframe(ticker='SPY', timeframe='DAY', columns=['datetime', 'close'], cache=True,
+                                start='2000-03-01', end='2000-06-30')
+    df = store.get_dataframe(ticker='SPY', timeframe='DAY', columns=['datetime', 'close'],
+                             start='2000-03-01', end='2000-06-30')
+    pd.testing.assert_frame_equal(df, expected, check_freq=False)
+    assert len(store.get_dataframe(ticker='SPY', timeframe='DAY', start='2000-03-01', limit=5)) == 5
+    assert sum(len(c) for c in store.iter_dataframes(ticker='SPY', timeframe='DAY', chunksize=70)) == 300
+
+    with pytest.raises(ValueError):
+        store.get_dataframe(ticker='SPY', timeframe='DAY', columns=['nope'])
+    with pytest.raises(ValueError):
+        store.get_dataframe(ticker='QQQ', timeframe='DAY')
+
+def test_write_sorts_and_replaces(stores):
+    _, store = stores
+    bars = generate_ohlcv(50, seed=3)
+    store.write('QQQ', 'DAY', bars.iloc[::-1])
+    first = store.get_dataframe(ticker='QQQ', timeframe='DAY')
+    assert first.index.is_monotonic_increasing
+    assert np.allclose(first['close'].to_numpy(), bars['close'].to_numpy())
+
+    # Rewriting leaves dataframes of the previous version intact
+    store.write('QQQ', 'DAY', bars.iloc[:10])
+    assert len(first) == 50 and np.allclose(first['close'].to_numpy(), bars['close'].to_numpy())
+    assert store.header('QQQ', 'DAY')['rows'] == 10
+    assert len(store.get_dataframe(ticker='QQQ', timeframe='DAY')) == 10
+
+    panel = store.get_dataframes(['QQQ', 'QQQ'], 'DAY', columns=['close'], panel=True)
+    assert panel.shape == (10, 1, 1)
+    assert store.get_dataframes(['QQQ'], 'DAY', columns=['close'], limit=4, panel=True).shape == (4, 1, 1)
@@ -0,0 +1,81 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+from cache import IndicatorCache, fingerprint
+from utility.strategies import SMA, SMACrossover
+
+
+@pytest.fixture
+def close():
+    return pd.Series(np.linspace(1.0, 100.0, 500), name='close')
+
+def test_cache_hit_on_equal_data(close):
+    cache = IndicatorCache()
+    first = cache.get(SMA("10-Period SMA", 10, close))
+    second = cache.get(SMA("10-Period SMA", 10, close.copy()))
+
+    assert second is first
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_cache_miss_on_different_arguments(close):
+    cache = IndicatorCache()
+    cache.get(SMA("SMA", 10, close))
+    cache.get(SMA("SMA", 20, close))
+    cache.get(SMA("SMA", 10, close * 2))
+
+    assert cache.hits == 0
+    assert cache.misses == 3
+    assert len(cache) == 3
+
+def test_cache_lru_eviction(close):
+    one_result = int(SMA("SMA", 10, close).f().memory_usage(index=True))
+    cache = IndicatorCache(max_bytes=2 * one_result)
+
+    cache.get(SMA("SMA", 10, close))
+    cache.get(SMA("SMA", 20, close))
+    cache.get(SMA("SMA", 10, close))  # 10 is now the most recently used
+    cache.get(SMA("SMA", 30, close))  # evicts 20
+
+    assert cache.evictions == 1
+    assert cache.nbytes <= cache.max_bytes
+    cache.get(SMA("SMA", 10, close))
+    assert cache.hits == 2
+
+def test_unfingerprintable_arguments_are_not_cached(close):
+    cache = IndicatorCache()
+    cache.get(SMA("SMA", 10, close, object()))
+
+    assert fingerprint(object()) is None
+    assert len(cache) == 0
+    assert cache.misses == 1
+
+def test_backtests_share_indicator_results():
+    import backtest as bt
+    from utility.synthetic import generate_ohlcv
+
+    cache = IndicatorCache()
+    data = generate_ohlcv(1000)
+    for fast in (5, 10, 20):
+        strategy = SMACrossover()
+        strategy.fast = fast
+        bt.Backtest(data.copy(), strategy, indicator_cache=cache).run(vectorized=True)
+
+    # The 100-period SMA is only computed once
+    assert cache.misses == 4
+    assert cache.hits == 2
+
+def test_caching_is_opt_in():
+    import backtest as bt
+    from cache import default_cache
+    from utility.synthetic import generate_ohlcv
+
+    default_cache.clear()
+    bt.Backtest(generate_ohlcv(300), SMACrossover()).run(vectorized=True)
+    assert len(default_cache) == 0
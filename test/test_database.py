@@ -0,0 +1,215 @@
+import sys
+import os
+import sqlite3
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+from database import Database
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+@pytest.fixture
+def database(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'stock_database.db')
+    write_sqlite_table(conn, 'SPY', 'DAY', generate_ohlcv(300))
+    conn.close()
+
+    db = Database(db_name='stock_database.db', db_path=tmp_path, cache_path=tmp_path / 'cache')
+    db.connect()
+    yield db
+    db.disconnect()
+
+def test_cached_dataframe_is_typed(database):
+    df = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True)
+
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert (df.dtypes == np.float64).all()
+    assert len(df) == 300
+
+def test_cached_dataframe_matches_database(database):
+    uncached = database.get_dataframe(ticker='SPY', timeframe='DAY', columns=['datetime', 'close'])
+    cached = database.get_dataframe(params={'ticker': 'SPY', 'timeframe': 'DAY',
+                                            'columns': ['datetime', 'close'], 'cache': True})
+
+    assert cached['close'].tolist() == uncached['close'].astype(float).tolist()
+    assert cached.index.strftime('%Y-%m-%d').tolist() == uncached['datetime'].tolist()
+
+def test_cache_invalidated_by_new_rows(database):
+    database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True)
+    assert database.cache.is_valid(database.get_connection(), 'SPY_1DAY')
+
+    conn = database.get_connection()
+    conn.execute("INSERT INTO SPY_1DAY VALUES ('2030-01-02', '1', '1', '1', '1', '1')")
+    conn.commit()
+    assert not database.cache.is_valid(conn, 'SPY_1DAY')
+
+    df = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True)
+    assert len(df) == 301
+    assert df.index[-1] == pd.Timestamp('2030-01-02')
+
+def test_ingest_csv_into_typed_table(database, tmp_path):
+    df = generate_ohlcv(500, freq='min')
+    df.rename(columns={'close': 'Close'}).to_csv(tmp_path / 'spy.csv', index=False)
+
+    report = database.ingest_csv(tmp_path / 'spy.csv', 'SPY', 'MIN', batch_size=128)
+
+    assert report['rows'] == 500
+    assert report['rows_per_second'] > 0
+    types = {row[1]: row[2] for row in database.run_select_query("PRAGMA table_info(SPY_1MIN)")}
+    assert types == {'datetime': 'INTEGER', 'open': 'REAL', 'high': 'REAL', 'low': 'REAL',
+                     'close': 'REAL', 'volume': 'INTEGER'}
+
+    # The journal mode is only switched for the load
+    assert database.run_select_query("PRAGMA journal_mode")[0][0] == 'delete'
+
+    loaded = database.get_dataframe(ticker='SPY', timeframe='MIN', cache=True)
+    assert loaded.index.equals(pd.DatetimeIndex(df['datetime'], name='datetime'))
+    assert np.allclose(loaded['close'].to_numpy(), df['close'].to_numpy())
+
+def test_ingest_and_migrate_quote_table_names(database, tmp_path):
+    generate_ohlcv(50).to_csv(tmp_path / 'brk.csv', index=False)
+
+    assert database.ingest_csv(tmp_path / 'brk.csv', 'BRK.B', 'DAY')['rows'] == 50
+    assert database.ingest_csv(tmp_path / 'brk.csv', 'BRK.B', 'DAY', replace=True)['rows'] == 50
+    assert database.migrate_table('BRK.B', 'DAY')['rows'] == 50
+    assert len(database.get_dataframe(ticker='BRK.B', timeframe='DAY')) == 50
+    assert len(database.get_dataframe(ticker='BRK.B', timeframe='DAY', cache=True)) == 50
+    assert len(database.get_resampled('BRK.B', 'DAY', rule='W', resample_cache=None)) > 0
+    assert len(database.get_resampled('BRK.B', 'DAY', rule='W')) > 0
+
+def test_failed_migration_keeps_table(database):
+    conn = database.get_connection()
+    # A view over a table that does not exist makes SQLite refuse the rename
+    conn.execute("CREATE VIEW broken AS SELECT * FROM missing")
+    conn.commit()
+
+    with pytest.raises(sqlite3.Error):
+        database.migrate_table('SPY', 'DAY')
+    assert len(database.get_dataframe(ticker='SPY', timeframe='DAY')) == 300
+
+def test_migrate_text_table(database):
+    before = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True).copy()
+
+    report = database.migrate_table('SPY', 'DAY', batch_size=64)
+
+    assert report == {**report, 'table': 'SPY_1DAY', 'rows': 300}
+    raw = database.get_dataframe(ticker='SPY', timeframe='DAY')
+    assert raw['datetime'].dtype.kind == 'i'
+    assert raw['close'].dtype == np.float64
+    pd.testing.assert_frame_equal(database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True), before)
+
+def test_command_line_ingest(tmp_path, capsys):
+    import database as db
+    generate_ohlcv(50).to_csv(tmp_path / 'qqq.csv', index=False)
+
+    db.main(['--db-path', str(tmp_path), 'ingest', str(tmp_path / 'qqq.csv'), 'QQQ', 'day'])
+
+    assert "QQQ_1DAY: 50 rows" in capsys.readouterr().out
+
+def test_date_range_pushdown(database):
+    df = database.get_dataframe(ticker='SPY', timeframe='DAY', columns=['datetime', 'close'],
+                                start='2000-02-01', end='2000-02-29')
+
+    assert df['datetime'].iloc[0] == '2000-02-01'
+    assert df['datetime'].iloc[-1] == '2000-02-29'
+    assert len(df) == 21
+
+def test_date_range_pushdown_typed_table(database):
+    database.migrate_table('SPY', 'DAY')
+    df = database.get_dataframe(params={'ticker': 'SPY', 'timeframe': 'DAY', 'columns': [],
+                                        'start': '2000-02-01', 'limit': 5})
+    cached = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True, start='2000-02-01', limit=5)
+
+    assert len(df) == 5
+    assert df['datetime'].iloc[0] == int(pd.Timestamp('2000-02-01').timestamp())
+    assert cached['close'].tolist() == df['close'].tolist()
+
+def test_bounds_and_limit_match_with_and_without_cache(database):
+    for typed in (False, True):
+        if typed:
+            database.migrate_table('SPY', 'DAY')
+        # Bounds are taken at the resolution of the table: whole days here
+        for cache in (False, True):
+            df = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=cache,
+                                        start='2000-01-04 10:00', end='2000-01-07 10:00')
+            assert len(df) == 4
+            with pytest.raises(ValueError):
+                database.get_dataframe(ticker='SPY', timeframe='DAY', cache=cache, limit=-1)
+            with pytest.raises(ValueError):
+                database.iter_dataframes(ticker='SPY', timeframe='DAY', cache=cache, limit=-1)
+
+def test_unknown_table_or_column_rejected(database):
+    with pytest.raises(ValueError):
+        database.get_dataframe(ticker='SPY_1DAY; DROP TABLE SPY_1DAY; --', timeframe='DAY')
+    with pytest.raises(ValueError):
+        database.get_dataframe(ticker='QQQ', timeframe='DAY')
+    with pytest.raises(ValueError):
+        database.get_dataframe(ticker='SPY', timeframe='DAY', columns=['close, (SELECT 1)'])
+
+def test_iter_dataframes_in_chunks(database):
+    chunks = list(database.iter_dataframes(ticker='SPY', timeframe='DAY', columns=['datetime', 'close'], chunksize=128))
+    cached = list(database.iter_dataframes(ticker='SPY', timeframe='DAY', cache=True, chunksize=128))
+
+    assert [len(c) for c in chunks] == [128, 128, 44]
+    assert [len(c) for c in cached] == [128, 128, 44]
+    assert pd.concat(chunks)['datetime'].is_monotonic_increasing
+
+def test_get_panel_aligns_tickers(database):
+    conn = database.get_connection()
+    # Fewer rows, with gaps, and stored as a typed table
+    qqq = generate_ohlcv(300, seed=7).iloc[::2].reset_index(drop=True)
+    write_sqlite_table(conn, 'QQQ', 'DAY', qqq)
+    database.migrate_table('QQQ', 'DAY')
+
+    for cache in (False, True):
+        panel = database.get_panel(['SPY', 'QQQ'], 'DAY', fields=['close', 'volume'], cache=cache)
+
+        assert panel.shape == (300, 2, 2)
+        assert panel.tickers == ['SPY', 'QQQ']
+        spy = database.get_dataframe(ticker='SPY', timeframe='DAY', cache=True)
+        assert np.array_equal(panel['close'][:, 0], spy['close'].to_numpy())
+        assert np.allclose(panel['close'][::2, 1], qqq['close'].to_numpy())
+        assert np.isnan(panel['close'][1::2, 1]).all()
+
+def test_get_dataframes_loads_concurrently(database):
+    conn = database.get_connection()
+    for seed, ticker in enumerate(['QQQ', 'IWM', 'DIA']):
+        write_sqlite_table(conn, ticker, 'DAY', generate_ohlcv(200, seed=seed))
+
+    tickers = ['SPY', 'QQQ', 'IWM', 'DIA', 'QQQ']
+    for cache in (False, True):
+        frames = database.get_dataframes(tickers, 'DAY', cache=cache, max_workers=4)
+
+        assert list(frames.keys()) == ['SPY', 'QQQ', 'IWM', 'DIA']
+        for ticker, df in frames.items():
+            expected = database.get_dataframe(ticker=ticker, timeframe='DAY', cache=cache)
+            pd.testing.assert_frame_equal(df, expected)
+
+    # The pooled connections are reused across calls, and read-only
+    assert 1 <= len(database.pool) <= 4
+    with database.pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM SPY_1DAY")
+
+    panel = database.get_dataframes(['SPY', 'QQQ'], 'DAY', columns=['datetime', 'close'], panel=True)
+    assert panel.fields == ['close']
+    assert panel.tickers == ['SPY', 'QQQ']
+
+    # The limit applies to each ticker
+    panel = database.get_dataframes(['SPY', 'QQQ'], 'DAY', columns=['datetime', 'close'], limit=20, panel=True)
+    assert panel.shape == (20, 2, 1)
+    assert not np.isnan(panel['close']).any()
+
+def test_get_dataframes_unknown_table(database):
+    with pytest.raises(ValueError):
+        database.get_dataframes(['SPY', 'NOPE'], 'DAY')
+
+def test_connect_raises(tmp_path):
+    db = Database(db_name='stock_database.db', db_path=tmp_path / 'missing')
+    with pytest.raises(sqlite3.Error):
+        db.connect()
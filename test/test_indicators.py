@@ -0,0 +1,166 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+import backtest as bt
+import indicators as ind
+import kernels
+from utility.synthetic import generate_ohlcv
+from utility.strategies import EMACrossover
+
+
+@pytest.fixture
+def ohlcv():
+    df = generate_ohlcv(1500, seed=3)
+    df.loc[700:703, 'close'] = df.loc[699, 'close']  # flat stretch: zero gains and losses
+    return df
+
+def incremental_values(indicator, df):
+    indicator.reset()
+    return np.array([indicator.update(row) for row in df.to_dict('records')])
+
+@pytest.mark.parametrize('make', [
+    lambda s: ind.SMA("SMA", 20, s),
+    lambda s: ind.EMA("EMA", 20, s),
+    lambda s: ind.RollingStd("STD", 20, s),
+    lambda s: ind.RollingStd("STD", 20, s, ddof=0),
+    lambda s: ind.RSI("RSI", 14, s),
+    lambda s: ind.RollingMax("MAX", 20, s),
+    lambda s: ind.RollingMin("MIN", 20, s),
+    lambda s: ind.Bollinger("BB", 20, s, band='upper'),
+    lambda s: ind.Bollinger("BB", 20, s, band='lower'),
+])
+@pytest.mark.parametrize('gaps', [False, True])
+def test_incremental_matches_batch(ohlcv, make, gaps):
+    if gaps:
+        # Missing prices during the warmup, a run of them, and a single one
+        ohlcv.loc[[5, 300, 301, 302, 900], 'close'] = np.nan
+    indicator = make(ohlcv['close'])
+
+    assert indicator.incremental
+    np.testing.assert_allclose(incremental_values(indicator, ohlcv), indicator.f().to_numpy(), rtol=1e-9, equal_nan=True)
+
+def test_incremental_sma_skips_nan_windows(ohlcv):
+    ohlcv.loc[100, 'close'] = np.nan
+    indicator = ind.SMA("SMA", 10, ohlcv['close'])
+
+    np.testing.assert_allclose(incremental_values(indicator, ohlcv), indicator.f().to_numpy(), rtol=1e-9, equal_nan=True)
+
+def test_incremental_atr_matches_batch(ohlcv):
+    indicator = ind.ATR("ATR", 14, ohlcv['high'], ohlcv['low'], ohlcv['close'])
+
+    np.testing.assert_allclose(incremental_values(indicator, ohlcv), indicator.f().to_numpy(), rtol=1e-9, equal_nan=True)
+
+def test_incremental_extremes_skip_nan_windows(ohlcv):
+    ohlcv.loc[100, 'close'] = np.nan
+    for indicator in (ind.RollingMax("MAX", 10, ohlcv['close']), ind.RollingMin("MIN", 10, ohlcv['close'])):
+        np.testing.assert_allclose(incremental_values(indicator, ohlcv), indicator.f().to_numpy(), rtol=1e-9, equal_nan=True)
+
+def test_user_indicators_are_not_incremental():
+    from utility.strategies import SMA
+    assert not SMA("SMA", 10, pd.Series([1.0])).incremental
+
+@pytest.mark.parametrize('options', [{}, {'bar_records': True, 'lookback_view': True}])
+def test_incremental_backtest_matches_batch(ohlcv, options):
+    batch = bt.Backtest(ohlcv.copy(), EMACrossover(), **options)
+    batch.run()
+
+    incremental = bt.Backtest(ohlcv.copy(), EMACrossover(), incremental=True, **options)
+    incremental.run()
+
+    assert incremental.account.balance == pytest.approx(batch.account.balance, rel=1e-12)
+    np.testing.assert_allclose(incremental.strategy.data['slow'], batch.strategy.data['slow'], rtol=1e-9)
+
+def test_incremental_state_carries_across_chunks(ohlcv):
+    full = bt.Backtest(ohlcv.copy(), EMACrossover())
+    full.run()
+
+    chunks = (ohlcv.iloc[i:i + 200] for i in range(0, len(ohlcv), 200))
+    streamed = bt.Backtest(chunks, EMACrossover(), incremental=True, bar_records=True)
+    streamed.run()
+
+    assert streamed.account.balance == pytest.approx(full.account.balance, rel=1e-12)
+
+
+@pytest.fixture
+def prices():
+    # Bars x tickers, with NaN before one ticker lists and a gap in another
+    rng = np.random.default_rng(7)
+    x = 100.0 + rng.standard_normal((2000, 4)).cumsum(axis=0)
+    x[:30, 1] = np.nan
+    x[500:505, 2] = np.nan
+    return pd.DataFrame(x, columns=['A', 'B', 'C', 'D'])
+
+@pytest.mark.parametrize('k', [1, 2, 14, 100])
+def test_kernels_match_pandas(prices, k):
+    rolling = prices.rolling(k)
+    x = prices.to_numpy()
+
+    np.testing.assert_array_equal(kernels.rolling_max(x, k), rolling.max().to_numpy())
+    np.testing.assert_array_equal(kernels.rolling_min(x, k), rolling.min().to_numpy())
+    np.testing.assert_allclose(kernels.rolling_mean(x, k), rolling.mean().to_numpy(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(kernels.rolling_std(x, k, ddof=0), rolling.std(ddof=0).to_numpy(),
+                               rtol=1e-8, atol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(kernels.ema(x, 2.0 / (k + 1)),
+                               prices.ewm(span=k, adjust=False, ignore_na=True).mean().to_numpy(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(kernels.wilder(x, k),
+                               prices.ewm(alpha=1.0 / k, adjust=False, ignore_na=True, min_periods=k).mean().to_numpy(),
+                               rtol=1e-12, equal_nan=True)
+
+def test_kernels_take_columns_one_at_a_time(prices):
+    x = prices.to_numpy()
+    for column in range(x.shape[1]):
+        np.testing.assert_array_equal(kernels.rolling_max(x, 20)[:, column], kernels.rolling_max(x[:, column], 20))
+        np.testing.assert_allclose(kernels.ema(x, 0.1)[:, column], kernels.ema(x[:, column], 0.1), rtol=1e-12, equal_nan=True)
+        np.testing.assert_allclose(kernels.rsi(x, 14)[:, column], kernels.rsi(x[:, column], 14), rtol=1e-12, equal_nan=True)
+
+def test_kernel_edge_cases():
+    x = np.arange(5, dtype=np.float64)
+
+    assert np.isnan(kernels.rolling_max(x, 6)).all()
+    assert np.isnan(kernels.rolling_mean(x, 6)).all()
+    assert kernels.ema(np.zeros(0), 0.5).shape == (0,)
+    np.testing.assert_array_equal(kernels.ema(x, 1.0), x)
+    # Constant prices have no variance, not a tiny negative one
+    np.testing.assert_array_equal(kernels.rolling_std(np.full(50, 1e6 + 0.1), 7)[6:], 0.0)
+    with pytest.raises(ValueError):
+        kernels.rolling_max(np.zeros((2, 2, 2)), 2)
+    with pytest.raises(ValueError):
+        kernels.ema(x, 0.0)
+
+def test_long_ema_is_stable():
+    # Windows far beyond the kernel's block length
+    x = np.random.default_rng(1).standard_normal(200000).cumsum()
+    expected = pd.Series(x).ewm(alpha=1e-4, adjust=False).mean().to_numpy()
+
+    np.testing.assert_allclose(kernels.ema(x, 1e-4), expected, rtol=1e-9, atol=1e-9)
+
+def test_indicators_compute_every_ticker(prices, ohlcv):
+    sma = ind.SMA("SMA", 20, prices).f()
+
+    assert isinstance(sma, pd.DataFrame)
+    assert list(sma.columns) == list(prices.columns)
+    pd.testing.assert_series_equal(sma['D'], ind.SMA("SMA", 20, prices['D']).f())
+
+    high = pd.concat([ohlcv['high']] * 2, axis=1, keys=['A', 'B'])
+    low = pd.concat([ohlcv['low']] * 2, axis=1, keys=['A', 'B'])
+    close = pd.concat([ohlcv['close']] * 2, axis=1, keys=['A', 'B'])
+    atr = ind.ATR("ATR", 14, high, low, close).f()
+    np.testing.assert_allclose(atr['B'], ind.ATR("ATR", 14, ohlcv['high'], ohlcv['low'], ohlcv['close']).f(),
+                               rtol=1e-12, equal_nan=True)
+
+def test_bollinger_bands(ohlcv):
+    close = ohlcv['close']
+    mean = close.rolling(20).mean()
+    std = close.rolling(20).std(ddof=0)
+
+    np.testing.assert_allclose(ind.Bollinger("BB", 20, close).f(), mean, rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(ind.Bollinger("BB", 20, close, width=2.5, band='upper').f(), mean + 2.5 * std,
+                               rtol=1e-9, equal_nan=True)
+    with pytest.raises(ValueError):
+        ind.Bollinger("BB", 20, close, band='outer')
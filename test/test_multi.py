@@ -0,0 +1,86 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import pandas as pd
+import backtest as bt
+import indicators as ind
+from log import QUIET
+from multi import MultiBacktest
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover, LimitEntry, EMACrossover, CountingSMA
+
+
+@pytest.fixture
+def ohlcv():
+    return generate_ohlcv(1200, seed=5)
+
+def crossover(fast, slow):
+    strategy = SMACrossover()
+    strategy.fast = fast
+    strategy.slow = slow
+    return strategy
+
+def make_strategies():
+    return [crossover(10, 100), crossover(10, 50), crossover(20, 100), EMACrossover(), LimitEntry()]
+
+@pytest.mark.parametrize('options', [{}, {'bar_records': True, 'lookback_view': True}, {'incremental': True}])
+def test_matches_separate_backtests(ohlcv, options):
+    multi = MultiBacktest(ohlcv.copy(), make_strategies(), indicator_cache=None, verbosity=QUIET, **options)
+    multi.run()
+
+    for i, strategy in enumerate(make_strategies()):
+        single = bt.Backtest(ohlcv.copy(), strategy, indicator_cache=None, verbosity=QUIET, **options)
+        single.run()
+
+        assert multi.accounts[i].balance == pytest.approx(single.account.balance, rel=1e-12)
+        pd.testing.assert_frame_equal(multi.trades(i), single.trades)
+        pd.testing.assert_frame_equal(multi.equity(i), single.equity)
+
+    stats = multi.stats()
+    assert list(stats.index) == [s.name for s in multi.strategies]
+
+def test_shared_indicators_computed_once(ohlcv):
+    class CountingCrossover(bt.Strategy):
+        def __init__(self, fast):
+            super().__init__()
+            self._fast = fast
+
+        def init(self):
+            self._name = f"{self._fast} over 50"
+            self.add_indicator(CountingSMA(f"SMA {self._fast}", self._fast, self.data['close']))
+            self.add_indicator(CountingSMA("SMA 50", 50, self.data['close']))
+
+        def apply(self, current_data, lookback_data):
+            return None
+
+    CountingSMA.calls = 0
+    multi = MultiBacktest(ohlcv, [CountingCrossover(fast) for fast in (5, 10, 20)], indicator_cache=None, verbosity=QUIET)
+    multi.run()
+
+    assert CountingSMA.calls == 4
+    assert [s.data is multi.strategies[0].data for s in multi.strategies] == [True] * 3
+
+def test_conflicting_indicator_names(ohlcv):
+    class Named(bt.Strategy):
+        def __init__(self, period):
+            super().__init__()
+            self._period = period
+
+        def init(self):
+            self.add_indicator(ind.SMA("trend", self._period, self.data['close']))
+
+        def apply(self, current_data, lookback_data):
+            return None
+
+    with pytest.raises(ValueError):
+        MultiBacktest(ohlcv, [Named(10), Named(20)], verbosity=QUIET).run()
+    # The same indicator under the same name is shared
+    MultiBacktest(ohlcv, [Named(10), Named(10)], verbosity=QUIET).run()
+
+    strategy = crossover(10, 50)
+    with pytest.raises(ValueError):
+        MultiBacktest(ohlcv, [strategy, strategy])
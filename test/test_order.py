@@ -127,4 +127,12 @@ def test_create_short_market_order_direction(create_short_market_order):
     assert create_short_market_order.direction == 'short'
 
 def test_create_cover_market_order_direction(create_cover_market_order):
-    assert create_cover_market_order.direction == 'cover'
\ No newline at end of file
+    assert create_cover_market_order.direction == 'cover'
+
+
+def test_trusted_order_matches_validated_order(basic_buy_order):
+    import orders as o
+    trusted = o.Order.trusted(o._BUY, o._MARKET, 1, 10.00, "SPY")
+
+    assert trusted.order_dict() == basic_buy_order.order_dict()
+    assert not hasattr(trusted, '__dict__')
@@ -0,0 +1,102 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import backtest as bt
+import indicators as ind
+from cache import IndicatorCache
+from log import QUIET
+from orders import buy, short, _MARKET
+from pipeline import IndicatorGraph
+from utility.synthetic import generate_ohlcv
+from utility.strategies import CountingSMA
+
+
+@pytest.fixture
+def ohlcv():
+    return generate_ohlcv(1500, seed=11)
+
+def test_indicators_consume_other_indicators(ohlcv):
+    rsi = ind.RSI("rsi", 14, ohlcv['close'])
+    smooth = ind.SMA("smooth rsi", 5, rsi)
+    signal = ind.EMA("signal", 3, smooth)
+    assert smooth.inputs == [rsi] and signal.inputs == [smooth]
+
+    graph = IndicatorGraph([signal, smooth])
+    assert [i.name for i in graph.order] == ["rsi", "smooth rsi", "signal"]
+
+    for workers in (1, 4):
+        results = graph.evaluate(max_workers=workers)
+        # Intermediate nodes are computed but only the outputs are returned
+        assert list(results) == ["signal", "smooth rsi"]
+        expected = rsi.f().rolling(5).mean()
+        np.testing.assert_allclose(results["smooth rsi"], expected, equal_nan=True)
+        np.testing.assert_allclose(results["signal"], expected.ewm(span=3, adjust=False).mean(), equal_nan=True)
+
+def test_shared_subexpressions_computed_once(ohlcv):
+    CountingSMA.calls = 0
+    a = CountingSMA("a", 20, ohlcv['close'])
+    b = CountingSMA("b", 20, ohlcv['close'])
+    graph = IndicatorGraph([a, b, ind.EMA("ema of a", 10, a), ind.EMA("ema of b", 10, b)])
+
+    assert len(graph) == 2
+    results = graph.evaluate(max_workers=2)
+    assert CountingSMA.calls == 1
+    assert results["a"] is results["b"]
+    assert results["ema of a"] is results["ema of b"]
+
+    # The nodes share keys with IndicatorCache, and only the named outputs are computed
+    cache = IndicatorCache()
+    graph.evaluate(names=["a"], cache=cache)
+    assert CountingSMA.calls == 2 and cache.misses == 1 and len(cache) == 1
+    graph.evaluate(names=["ema of b"], cache=cache)
+    assert CountingSMA.calls == 2 and cache.hits == 1
+    with pytest.raises(ValueError):
+        graph.evaluate(names=["nope"])
+
+class MACDStrategy(bt.Strategy):
+    def init(self):
+        self._name = "MACD"
+        fast = ind.EMA("fast", 12, self.data['close'])
+        slow = ind.EMA("slow", 26, self.data['close'])
+        self.add_indicator(fast)
+        self.add_indicator(slow)
+        self.add_indicator(ind.EMA("signal", 9, fast))
+        self.add_indicator(CountingSMA("unused", 50, self.data['close']))
+        self.requires = ["fast", "slow", "signal"]
+
+    def apply(self, current_data, lookback_data):
+        if current_data['fast'] > current_data['slow'] and current_data['fast'] > current_data['signal']:
+            return buy(_MARKET, shares=1, price=float(current_data['close']))
+        elif current_data['fast'] < current_data['slow']:
+            return short(_MARKET, shares=1, price=float(current_data['close']))
+        return None
+
+@pytest.mark.parametrize('options', [{}, {'incremental': True}, {'indicator_workers': 1}])
+def test_backtest_evaluates_required_indicators(ohlcv, options):
+    CountingSMA.calls = 0
+    backtest = bt.Backtest(ohlcv.copy(), MACDStrategy(), indicator_cache=None, verbosity=QUIET, **options)
+    backtest.run()
+
+    data = backtest.strategy.data
+    assert CountingSMA.calls == 0
+    assert list(data.columns[-3:]) == ["fast", "slow", "signal"]
+    expected = ohlcv['close'].ewm(span=12, adjust=False).mean().ewm(span=9, adjust=False).mean()
+    np.testing.assert_allclose(data['signal'], expected)
+
+    reference = bt.Backtest(ohlcv.copy(), MACDStrategy(), indicator_cache=None, verbosity=QUIET)
+    reference.run()
+    assert backtest.account.balance == pytest.approx(reference.account.balance)
+
+def test_streamed_backtest_rebinds_inputs(ohlcv):
+    full = bt.Backtest(ohlcv.copy(), MACDStrategy(), indicator_cache=None, verbosity=QUIET)
+    full.run()
+
+    chunks = (ohlcv.iloc[i:i + 500] for i in range(0, len(ohlcv), 500))
+    streamed = bt.Backtest(chunks, MACDStrategy(), verbosity=QUIET, warmup=len(ohlcv))
+    streamed.run()
+    assert streamed.account.balance == pytest.approx(full.account.balance)
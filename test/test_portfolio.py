@@ -0,0 +1,104 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import backtest as bt
+from account import Account
+from orders import buy, short, _MARKET
+from portfolio import PortfolioBacktest, PortfolioStrategy
+from utility.structures import Panel
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover, PortfolioCrossover
+
+
+@pytest.fixture
+def frames():
+    frames = {f"T{i}": generate_ohlcv(600, seed=i) for i in range(4)}
+    # One ticker only starts trading later
+    frames['T3'] = frames['T3'].iloc[200:].reset_index(drop=True)
+    return frames
+
+def test_panel_from_frames(frames):
+    panel = Panel.from_frames(frames, fields=['close', 'volume'])
+
+    assert panel.shape == (600, 4, 2)
+    assert np.isnan(panel['close'][:200, 3]).all()
+    assert np.array_equal(panel['close'][200:, 3], frames['T3']['close'].to_numpy())
+    assert panel.ticker_frame('T1')['volume'].tolist() == frames['T1']['volume'].astype(float).tolist()
+
+    panel.add_field('double', panel['close'] * 2)
+    assert panel.fields == ['close', 'volume', 'double']
+    with pytest.raises(ValueError):
+        panel['close'][0, 0] = 1.0
+
+def test_portfolio_matches_single_ticker_backtests(frames):
+    panel = Panel.from_frames(frames)
+    backtest = PortfolioBacktest(panel, PortfolioCrossover())
+    backtest.run()
+
+    expected = 0.0
+    for ticker, df in frames.items():
+        single = bt.Backtest(df.copy(), SMACrossover(), indicator_cache=None)
+        single.run()
+        expected += single.account.balance - Account().balance
+
+    assert backtest.account.balance - Account().balance == pytest.approx(expected)
+    for ticker, shares in backtest.account.positions.items():
+        assert shares == 1 and backtest.strategy._held[panel.tickers.index(ticker)]
+    assert backtest.final_equity() == pytest.approx(backtest.equity['equity'].iloc[-1])
+
+class ShortUnheld(PortfolioStrategy):
+    def init(self):
+        self._name = "Short Unheld Strategy"
+
+    def apply(self, bar, lookback):
+        tickers = self.tickers
+        if bar.position == 0:
+            return buy(_MARKET, shares=1, price=10.0, ticker=tickers[0])
+        if bar.position == 1:
+            return short(_MARKET, shares=1, price=50.0, ticker=tickers[1])
+        return None
+
+def test_single_position_short_needs_the_ticker_held(frames):
+    backtest = PortfolioBacktest(Panel.from_frames(frames), ShortUnheld(), max_positions=1)
+    backtest.run()
+
+    # Nothing held in the second ticker, so the short is not filled
+    assert backtest.account.balance == Account().balance - 10.0
+    assert backtest.account.positions == {'T0': 1}
+    assert backtest.account._inPosition
+
+def test_account_tracks_positions_per_ticker():
+    account = Account()
+    account.maxPositions = 3
+
+    account.process_order(buy(_MARKET, shares=5, price=10.0, ticker='AAA'))
+    account.process_order(buy(_MARKET, shares=2, price=10.0, ticker='BBB'))
+    # Nothing held in CCC, so this short is not filled
+    assert account.process_order(short(_MARKET, shares=2, price=10.0, ticker='CCC')) == 0
+    assert account.positions == {'AAA': 5, 'BBB': 2}
+
+    account.process_order(short(_MARKET, shares=5, price=11.0, ticker='AAA'))
+    assert account.positions == {'BBB': 2}
+    assert account.numPositions == 1
+
+@pytest.mark.parametrize('lookback', [0, 3])
+def test_lookback_window_like_backtest(frames, lookback):
+    class Lengths(PortfolioStrategy):
+        def init(self):
+            self.lookback = lookback
+            self.lengths = []
+
+        def apply(self, bar, window):
+            self.lengths.append(len(window))
+            return None
+
+    strategy = Lengths()
+    PortfolioBacktest(Panel.from_frames(frames), strategy).run()
+
+    # As for Data.window, a lookback of 0 is an empty window
+    assert strategy.lengths[:5] == [min(t + 1, lookback) for t in range(5)]
@@ -0,0 +1,92 @@
+import sys
+import os
+import sqlite3
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+import backtest as bt
+from log import QUIET
+from orders import buy, _MARKET
+from database import Database
+from resample import ResampleCache, completed_bars, resample_ohlcv
+from utility.synthetic import generate_ohlcv, write_sqlite_table
+
+
+@pytest.fixture
+def minutes():
+    # Minute bars with a gap, so some intervals have no rows
+    df = generate_ohlcv(5000, start="2021-03-01 09:30", freq='min', seed=5)
+    return df.drop(index=range(1000, 1300)).reset_index(drop=True)
+
+@pytest.mark.parametrize('rule', ['5min', '1h', '1D', 'W', 'W-FRI', 'MS'])
+def test_resample_matches_pandas(minutes, rule):
+    bars = resample_ohlcv(minutes, rule)
+
+    closed = 'right' if rule.startswith('W') else 'left'
+    expected = minutes.set_index('datetime').resample(rule, closed=closed, label='left').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+    if rule.startswith('W'):
+        # pandas labels weeks by the day before they start
+        expected.index = expected.index + pd.Timedelta(days=1)
+
+    assert np.array_equal(bars.index.to_numpy(), expected.index.to_numpy())
+    for column in expected.columns:
+        assert np.allclose(bars[column].to_numpy(), expected[column].to_numpy()), column
+
+def test_completed_bars_never_look_ahead(minutes):
+    values = minutes['datetime'].to_numpy()
+    positions = completed_bars(values, '1h')
+    bars = resample_ohlcv(minutes, '1h')
+
+    # Datetime of the last row of every bar
+    ends = minutes.groupby(minutes['datetime'].dt.floor('h'))['datetime'].max().to_numpy()
+    assert len(ends) == len(bars)
+    for i in range(0, len(values), 37):
+        # The latest bar whose rows are all at or before row i
+        expected = max((j for j, end in enumerate(ends) if end <= values[i]), default=-1)
+        assert positions[i] == expected
+
+class HourlyBreakout(bt.Strategy):
+    def init(self):
+        self._name = "Hourly Breakout"
+        self.hourly = self.add_timeframe('1h')
+        self.seen = []
+
+    def apply(self, current_data, lookback_data):
+        self.seen.append(self.timeframe('1h')['close'])
+        if self.hourly.position >= 0 and float(current_data['close']) > self.hourly['high']:
+            return buy(_MARKET, shares=1, price=float(current_data['close']))
+        return None
+
+def test_backtest_gives_completed_higher_timeframe_bars(minutes):
+    strategy = HourlyBreakout()
+    backtest = bt.Backtest(minutes.copy(), strategy, verbosity=QUIET, bar_records=True)
+    backtest.run()
+
+    aligned = strategy.timeframe('1h').aligned('close')
+    assert np.array_equal(np.array(strategy.seen), aligned, equal_nan=True)
+    assert np.isnan(aligned[0])
+    assert strategy.timeframes == ['1h']
+
+def test_resample_cache_and_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'stock_database.db')
+    write_sqlite_table(conn, 'SPY', 'MIN', generate_ohlcv(3000, start="2021-03-01 09:30", freq='min'))
+    conn.close()
+
+    db = Database(db_name='stock_database.db', db_path=tmp_path, cache_path=tmp_path / 'cache')
+    db.connect()
+    cache = ResampleCache()
+
+    bars = db.get_resampled('SPY', 'MIN', '15min', resample_cache=cache)
+    again = db.get_resampled('SPY', 'MIN', '15min', resample_cache=cache)
+    assert again is bars
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(bars) == 200
+
+    typed = db.get_dataframe(ticker='SPY', timeframe='MIN', cache=True)
+    pd.testing.assert_frame_equal(bars, resample_ohlcv(typed, '15min'))
+    db.disconnect()
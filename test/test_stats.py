@@ -0,0 +1,65 @@
+import sys
+import os
+import pytest
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+
+import numpy as np
+import pandas as pd
+import backtest as bt
+import stats
+from utility.synthetic import generate_ohlcv
+from utility.strategies import SMACrossover
+
+
+@pytest.fixture
+def equity():
+    rng = np.random.default_rng(3)
+    return 1000.0 * np.cumprod(1.0 + rng.normal(0.0005, 0.01, (500, 4)), axis=0)
+
+def test_summary_of_one_curve():
+    curve = np.array([100.0, 110.0, 99.0, 120.0, 108.0, 90.0, 130.0])
+    table = stats.summary(curve, periods_per_year=6)
+
+    assert list(table.columns) == stats.STATISTICS
+    row = table.iloc[0]
+    assert row['total_return'] == pytest.approx(0.3)
+    assert row['cagr'] == pytest.approx(0.3)
+    assert row['max_drawdown'] == pytest.approx(90.0 / 120.0 - 1.0)
+    assert row['max_drawdown_duration'] == 2
+
+    r = curve[1:] / curve[:-1] - 1.0
+    assert row['volatility'] == pytest.approx(r.std(ddof=1) * np.sqrt(6))
+    assert row['sharpe'] == pytest.approx(r.mean() / r.std(ddof=1) * np.sqrt(6))
+
+def test_matrix_matches_columns(equity):
+    table = stats.summary(pd.DataFrame(equity, columns=list('abcd')))
+
+    assert list(table.index) == list('abcd')
+    for j, name in enumerate('abcd'):
+        single = stats.summary(equity[:, j]).iloc[0]
+        pd.testing.assert_series_equal(table.loc[name], single.rename(name))
+
+def test_trade_statistics():
+    trades = pd.DataFrame({'bar': [1, 2, 3, 4, 5, 6], 'ticker': ['A', 'B', 'A', 'B', 'A', 'A'],
+                           'amount': [-10.0, -20.0, 12.0, 15.0, -10.0, 13.0]})
+    closed = stats.trade_pnl(trades)
+
+    assert sorted(closed['pnl'].tolist()) == [-5.0, 2.0, 3.0]
+    row = stats.summary(np.linspace(100.0, 110.0, 7), trades=trades).iloc[0]
+    assert row['trades'] == 3
+    assert row['win_rate'] == pytest.approx(2 / 3)
+    assert row['profit_factor'] == pytest.approx(5.0 / 5.0)
+
+def test_backtest_stats_and_optimize_metric():
+    backtest = bt.Backtest(generate_ohlcv(1000, seed=7), SMACrossover())
+    backtest.run()
+
+    row = backtest.stats()
+    assert row['trades'] == len(stats.trade_pnl(backtest.trades))
+    assert 0.0 < row['exposure'] < 1.0
+    assert row['max_drawdown'] <= 0.0
+
+    results = backtest.optimize({'fast': [5, 10], 'slow': [50, 100]}, metric='sharpe', n_jobs=1)
+    assert results['sharpe'].is_monotonic_decreasing
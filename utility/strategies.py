@@ -0,0 +1,156 @@
+'''
+Reference indicators and strategies shared by the tests and the benchmarks.
+'''
+import numpy as np
+import pandas as pd
+import backtest as bt
+import indicators as ind
+from orders import buy, short, _MARKET, _LIMIT
+from portfolio import PortfolioStrategy
+
+
+class SMA(bt.Indicator):
+    '''
+    SMA(name, period, series)
+
+    Simple moving average computed with pandas' rolling mean.
+    '''
+    def __init__(self, name:str, *args, **kwargs):
+        super().__init__(name)
+        self._k = args[0]
+        self._series = args[1]
+
+    def f(self) -> pd.Series:
+        return pd.Series(self._series).rolling(self._k).mean()
+
+
+class SMACrossover(bt.Strategy):
+    '''
+    SMACrossover
+
+    Buys one share when the close is above the fast SMA and the fast SMA is above the slow one,
+    and shorts one share when the fast SMA is not above the slow one. Implements both apply()
+    and signals(), so it runs in every mode of Backtest.run.
+    '''
+    fast = 10
+    slow = 100
+
+    def init(self):
+        self._name = "SMA Crossover Strategy"
+        self._fast_name = f"{self.fast}-Period SMA"
+        self._slow_name = f"{self.slow}-Period SMA"
+        self.add_indicator(SMA(self._fast_name, self.fast, self.data['close']))
+        self.add_indicator(SMA(self._slow_name, self.slow, self.data['close']))
+
+    def apply(self, current_data, lookback_data):
+        above_fast = float(current_data['close']) > current_data[self._fast_name]
+        fast_above_slow = current_data[self._fast_name] > current_data[self._slow_name]
+
+        if above_fast and fast_above_slow:
+            return buy(_MARKET, shares=1, price=float(current_data['open']))
+        elif fast_above_slow == False:
+            return short(_MARKET, shares=1, price=float(current_data['close']))
+        return None
+
+    def signals(self, data):
+        above_fast = data['close'] > data[self._fast_name]
+        fast_above_slow = data[self._fast_name] > data[self._slow_name]
+        return above_fast & fast_above_slow, ~fast_above_slow, data['open'], data['close']
+
+
+class CountingSMA(ind.SMA):
+    '''
+    CountingSMA(name, period, series)
+
+    indicators.SMA counting the calls to f() in CountingSMA.calls, across all instances.
+    '''
+    calls = 0
+
+    def f(self) -> pd.Series:
+        CountingSMA.calls += 1
+        return super().f()
+
+
+class EMACrossover(bt.Strategy):
+    '''
+    EMACrossover
+
+    Crossover of the built-in EMA and SMA, filtered by the RSI. All three indicators implement
+    update(), so it runs in incremental mode as well.
+    '''
+    def init(self):
+        self._name = "EMA Crossover"
+        self.add_indicator(ind.EMA("fast", 10, self.data['close']))
+        self.add_indicator(ind.SMA("slow", 50, self.data['close']))
+        self.add_indicator(ind.RSI("rsi", 14, self.data['close']))
+
+    def apply(self, current_data, lookback_data):
+        if current_data['fast'] > current_data['slow'] and current_data['rsi'] < 70:
+            return buy(_MARKET, shares=1, price=float(current_data['open']))
+        elif current_data['fast'] < current_data['slow']:
+            return short(_MARKET, shares=1, price=float(current_data['close']))
+        return None
+
+
+class LimitEntry(bt.Strategy):
+    '''
+    LimitEntry
+
+    Places a single BUY LIMIT order 5% below the first close, and nothing after that.
+    '''
+    def init(self):
+        self._name = "Limit Entry Strategy"
+        self._placed = False
+
+    def apply(self, current_data, lookback_data):
+        if not self._placed:
+            self._placed = True
+            return buy(_LIMIT, shares=1, price=float(current_data['close']) * 0.95)
+        return None
+
+
+class PanelSMA(bt.Indicator):
+    '''
+    PanelSMA(name, period, values)
+
+    Simple moving average of every column of a 2-D array (one column per ticker).
+    '''
+    def __init__(self, name:str, period:int, values:np.ndarray):
+        super().__init__(name)
+        self._k = period
+        self._values = values
+
+    def f(self) -> np.ndarray:
+        return pd.DataFrame(self._values).rolling(self._k).mean().to_numpy()
+
+
+class PortfolioCrossover(PortfolioStrategy):
+    '''
+    PortfolioCrossover
+
+    SMACrossover applied to every ticker of a PortfolioBacktest, holding at most one position
+    per ticker.
+    '''
+    fast = 10
+    slow = 100
+
+    def init(self):
+        self._name = "Portfolio SMA Crossover Strategy"
+        self.add_indicator(PanelSMA('fast', self.fast, self.data['close']))
+        self.add_indicator(PanelSMA('slow', self.slow, self.data['close']))
+        self._held = np.zeros(len(self.tickers), dtype=bool)
+
+    def apply(self, bar, lookback):
+        fast_above_slow = bar['fast'] > bar['slow']
+        entries = (bar['close'] > bar['fast']) & fast_above_slow
+        exits = ~fast_above_slow & ~entries
+
+        # One position per ticker, like a single-ticker Backtest
+        buys = entries & ~self._held
+        sells = exits & self._held
+        self._held = (self._held | buys) & ~sells
+
+        tickers = self.tickers
+        orders = [buy(_MARKET, shares=1, price=float(bar['open'][j]), ticker=tickers[j]) for j in np.flatnonzero(buys)]
+        orders += [short(_MARKET, shares=1, price=float(bar['close'][j]), ticker=tickers[j]) for j in np.flatnonzero(sells)]
+        return orders
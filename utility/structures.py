@@ -0,0 +1,490 @@
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+def readonly(array) -> np.ndarray:
+    '''
+    readonly(array)
+
+    Returns a read-only view of 'array'. The original array is left untouched.
+    '''
+    view = np.asarray(array).view()
+    view.flags.writeable = False
+    return view
+
+
+class LookbackWindow:
+    '''
+    LookbackWindow
+
+    A sliding window over a set of column arrays. Indexing by column name, e.g. window['close'],
+    returns a read-only NumPy view of the rows currently inside the window; no data is copied.
+
+    The same window object is moved along the data by its owner, so keep the arrays you need
+    rather than the window itself if you want to hold on to past values.
+    '''
+    __slots__ = ('_columns', '_start', '_end')
+
+    def __init__(self, columns:dict):
+        self._columns = columns
+        self._start = 0
+        self._end = 0
+
+    def _move(self, start:int, end:int):
+        self._start = start
+        self._end = end
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns.keys())
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        return self._columns[name][self._start:self._end]
+
+    def __contains__(self, name:str) -> bool:
+        return name in self._columns
+
+    def __len__(self):
+        return self._end - self._start
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        to_frame
+
+        Copies the rows inside the window into a new DataFrame.
+        '''
+        return pd.DataFrame({k: v[self._start:self._end] for k, v in self._columns.items()})
+
+    def __repr__(self):
+        return f"<LookbackWindow: rows {self._start}-{self._end}>"
+
+
+class BarRecord(tuple):
+    '''
+    BarRecord
+
+    Base class of the compact row records built by make_record_type(). A record is a plain
+    tuple underneath, so it has no per-instance __dict__, but it can still be indexed by
+    column name like a pandas Series row: bar['close'], or by attribute: bar.close.
+    '''
+    __slots__ = ()
+
+    _fields = ()
+    _dtypes = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        if i is None:
+            return default
+        return tuple.__getitem__(self, i)
+
+    def keys(self) -> tuple:
+        return self._fields
+
+    def to_dict(self) -> dict:
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        values = ", ".join(f"{k}={v!r}" for k, v in zip(self._fields, self))
+        return f"{self.__class__.__name__}({values})"
+
+
+def make_record_type(columns, dtypes=None, name:str="Bar"):
+    '''
+    make_record_type(columns, dtypes, name)
+
+    Builds a BarRecord subclass for the given column names (and, optionally, their dtypes).
+    Columns whose names are valid identifiers are also exposed as read-only attributes.
+    Create records with RecordType._make(values).
+    '''
+    columns = tuple(columns)
+    if len(set(columns)) != len(columns):
+        raise ValueError("Record columns must be unique.")
+
+    namespace = {
+        '__slots__': (),
+        '_fields': columns,
+        '_dtypes': tuple(dtypes) if dtypes is not None else (),
+        '_index': {column: i for i, column in enumerate(columns)},
+        '_make': classmethod(tuple.__new__),
+    }
+    for i, column in enumerate(columns):
+        if type(column) is str and column.isidentifier() and not hasattr(BarRecord, column):
+            namespace[column] = property(itemgetter(i))
+
+    return type(name, (BarRecord,), namespace)
+
+
+class RingBuffer:
+    '''
+    RingBuffer
+
+    Keeps the last 'capacity' rows of a stream of DataFrames in fixed-size NumPy column
+    arrays. Older rows are overwritten in place, so memory stays bounded by 'capacity'
+    no matter how many rows pass through.
+    '''
+    def __init__(self, capacity:int):
+        if capacity < 0:
+            raise ValueError("Capacity cannot be less than zero.")
+
+        self._capacity = capacity
+        self._columns = None
+        self._pos = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, frame:pd.DataFrame):
+        '''
+        extend(frame)
+
+        Appends the rows of 'frame', keeping only the last 'capacity' rows overall.
+        '''
+        if self._columns is None:
+            self._columns = {name: np.empty(self._capacity, dtype=frame[name].to_numpy().dtype)
+                             for name in frame.columns}
+
+        cap = self._capacity
+        n = len(frame)
+        if cap == 0 or n == 0:
+            return
+
+        for name, buffer in self._columns.items():
+            values = frame[name].to_numpy()
+            if n >= cap:
+                buffer[:] = values[n - cap:]
+                continue
+
+            first = min(n, cap - self._pos)
+            buffer[self._pos:self._pos + first] = values[:first]
+            buffer[:n - first] = values[first:]
+
+        if n >= cap:
+            self._pos = 0
+            self._size = cap
+        else:
+            self._pos = (self._pos + n) % cap
+            self._size = min(cap, self._size + n)
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        to_frame
+
+        Returns the buffered rows, oldest first, as a new DataFrame.
+        '''
+        if self._columns is None:
+            return pd.DataFrame()
+
+        columns = {}
+        for name, buffer in self._columns.items():
+            if self._size < self._capacity:
+                columns[name] = buffer[:self._size].copy()
+            else:
+                columns[name] = np.concatenate((buffer[self._pos:], buffer[:self._pos]))
+
+        return pd.DataFrame(columns)
+
+
+class Panel:
+    '''
+    Panel
+
+    Price data of several tickers aligned on one shared datetime index, held in a single
+    3-D NumPy array of shape (bars, tickers, fields). Bars where a ticker has no data are NaN.
+
+    panel['close'] returns a read-only (bars x tickers) view of one field.
+    '''
+    def __init__(self, index, tickers:list, fields:list, values:np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(index), len(tickers), len(fields)):
+            raise ValueError("Panel values must have shape (bars, tickers, fields).")
+        if len(set(fields)) != len(fields) or len(set(tickers)) != len(tickers):
+            raise ValueError("Panel tickers and fields must be unique.")
+
+        self._index = np.asarray(index)
+        self._tickers = list(tickers)
+        self._fields = list(fields)
+        self._field_index = {name: i for i, name in enumerate(self._fields)}
+        self._values = values
+
+    @classmethod
+    def from_frames(cls, frames:dict, fields:list=None):
+        '''
+        from_frames(frames, fields)
+
+        Builds a Panel from a dict of ticker -> DataFrame. Each DataFrame is indexed by datetime
+        (or has a 'datetime' column). The rows are aligned on the union of all datetimes.
+            fields: list = Columns to include. Default = None for the columns of the first DataFrame.
+        '''
+        if len(frames) == 0:
+            raise ValueError("No data passed to panel.")
+
+        def datetimes(df):
+            values = df['datetime'] if 'datetime' in df.columns else df.index
+            return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[ns]')
+
+        tickers = list(frames.keys())
+        if fields is None:
+            fields = [c for c in next(iter(frames.values())).columns if c != 'datetime']
+
+        stamps = [datetimes(frames[t]) for t in tickers]
+        index = np.unique(np.concatenate(stamps))
+
+        values = np.full((len(index), len(tickers), len(fields)), np.nan)
+        for j, ticker in enumerate(tickers):
+            rows = np.searchsorted(index, stamps[j])
+            df = frames[ticker]
+            for k, field in enumerate(fields):
+                try:
+                    column = df[field].to_numpy(dtype=np.float64)
+                except (TypeError, ValueError):
+                    column = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)
+                values[rows, j, k] = column
+
+        return cls(index, tickers, fields, values)
+
+    @property
+    def index(self) -> np.ndarray:
+        return self._index
+
+    @property
+    def tickers(self) -> list:
+        return list(self._tickers)
+
+    @property
+    def fields(self) -> list:
+        return list(self._fields)
+
+    @property
+    def values(self) -> np.ndarray:
+        return readonly(self._values)
+
+    @property
+    def shape(self) -> tuple:
+        return self._values.shape
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, field:str) -> bool:
+        return field in self._field_index
+
+    def __getitem__(self, field:str) -> np.ndarray:
+        return readonly(self._values[:, :, self._field_index[field]])
+
+    def field_position(self, field:str) -> int:
+        return self._field_index[field]
+
+    def add_field(self, name:str, values):
+        '''
+        add_field(name, values)
+
+        Adds (or replaces) a field from a (bars x tickers) array or DataFrame, e.g. an indicator
+        computed over every ticker at once.
+        '''
+        self.add_fields({name: values})
+
+    def add_fields(self, fields:dict):
+        '''
+        add_fields(fields)
+
+        Adds (or replaces) every field of the dict {name: (bars x tickers) array or DataFrame},
+        growing the array once for all of the new fields.
+        '''
+        new = []
+        for name, values in fields.items():
+            values = np.asarray(values, dtype=np.float64)
+            if values.shape != self._values.shape[:2]:
+                raise ValueError("Field values must have shape (bars, tickers).")
+
+            if name in self._field_index:
+                self._values[:, :, self._field_index[name]] = values
+            else:
+                new.append((name, values))
+
+        if not new:
+            return
+        self._values = np.concatenate([self._values] + [values[:, :, np.newaxis] for _, values in new], axis=2)
+        for name, _ in new:
+            self._fields.append(name)
+            self._field_index[name] = len(self._fields) - 1
+
+    def frame(self, field:str) -> pd.DataFrame:
+        '''
+        frame(field)
+
+        Returns one field as a DataFrame indexed by datetime, with one column per ticker.
+        '''
+        return pd.DataFrame(self[field], index=pd.DatetimeIndex(self._index, name='datetime'), columns=self._tickers)
+
+    def ticker_frame(self, ticker:str) -> pd.DataFrame:
+        '''
+        ticker_frame(ticker)
+
+        Returns one ticker's data as a DataFrame indexed by datetime, with one column per field.
+        '''
+        j = self._tickers.index(ticker)
+        return pd.DataFrame(self._values[:, j, :], index=pd.DatetimeIndex(self._index, name='datetime'), columns=self._fields)
+
+    def __repr__(self):
+        return f"<Panel: {len(self._index)} bars x {len(self._tickers)} tickers x {len(self._fields)} fields>"
+
+
+class PanelWindow:
+    '''
+    PanelWindow
+
+    A sliding window of rows over a Panel, moved along by its owner like LookbackWindow.
+    window['close'] returns a read-only (rows x tickers) view; window.last('close') returns
+    the most recent row as a (tickers,) view.
+    '''
+    __slots__ = ('_values', '_field_index', '_start', '_end')
+
+    def __init__(self, panel:Panel):
+        self._values = readonly(panel._values)
+        self._field_index = panel._field_index
+        self._start = 0
+        self._end = 0
+
+    def _move(self, start:int, end:int):
+        self._start = start
+        self._end = end
+
+    def __getitem__(self, field:str) -> np.ndarray:
+        return self._values[self._start:self._end, :, self._field_index[field]]
+
+    def last(self, field:str) -> np.ndarray:
+        return self._values[self._end - 1, :, self._field_index[field]]
+
+    def __contains__(self, field:str) -> bool:
+        return field in self._field_index
+
+    def __len__(self):
+        return self._end - self._start
+
+
+class PanelBar:
+    '''
+    PanelBar
+
+    One row (bar) of a Panel across every ticker, moved along by its owner like PanelWindow.
+    bar['close'] returns a read-only (tickers,) view of that field on the current bar.
+    '''
+    __slots__ = ('_values', '_field_index', '_index', '_i')
+
+    def __init__(self, panel:Panel):
+        self._values = readonly(panel._values)
+        self._field_index = panel._field_index
+        self._index = panel._index
+        self._i = 0
+
+    def _move(self, i:int):
+        self._i = i
+
+    @property
+    def position(self) -> int:
+        return self._i
+
+    @property
+    def datetime(self):
+        return self._index[self._i]
+
+    def __getitem__(self, field:str) -> np.ndarray:
+        return self._values[self._i, :, self._field_index[field]]
+
+    def __contains__(self, field:str) -> bool:
+        return field in self._field_index
+
+
+class GrowableRecords:
+    '''
+    GrowableRecords
+
+    An append-only NumPy structured array. Capacity is allocated up front and doubled when it
+    runs out, so appending a row is a single tuple assignment into the array.
+    '''
+    __slots__ = ('_data', '_n', '_capacity')
+
+    def __init__(self, dtype, capacity:int=1024):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive.")
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._n = 0
+        self._capacity = capacity
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self):
+        return self._n
+
+    def reserve(self, capacity:int):
+        '''
+        reserve(capacity)
+
+        Grows the array to hold at least 'capacity' rows.
+        '''
+        if capacity > self._capacity:
+            data = np.zeros(max(capacity, 2 * self._capacity), dtype=self._data.dtype)
+            data[:self._n] = self._data[:self._n]
+            self._data = data
+            self._capacity = len(data)
+
+    def append(self, row:tuple):
+        n = self._n
+        if n == self._capacity:
+            self.reserve(n + 1)
+        self._data[n] = row
+        self._n = n + 1
+
+    def extend(self, **columns):
+        '''
+        extend(**columns)
+
+        Appends several rows at once from one array (or a single value) per field.
+        Fields left out are zero.
+        '''
+        k = max(np.size(values) for values in columns.values())
+        n = self._n
+        self.reserve(n + k)
+        for name, values in columns.items():
+            self._data[name][n:n + k] = values
+        self._n = n + k
+
+    def clear(self):
+        self._n = 0
+
+    def to_array(self) -> np.ndarray:
+        '''
+        to_array
+
+        Returns a read-only view of the rows appended so far.
+        '''
+        return readonly(self._data[:self._n])
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        to_frame
+
+        Returns a copy of the rows appended so far as a DataFrame, one column per field.
+        '''
+        return pd.DataFrame({name: self._data[name][:self._n].copy() for name in self._data.dtype.names})
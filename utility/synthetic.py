@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+def generate_ohlcv(n:int, start:str="2000-01-03", freq:str="B", seed:int=0, price:float=100.0) -> pd.DataFrame:
+    '''
+    generate_ohlcv(n, start, freq, seed, price)
+
+    Generates 'n' rows of synthetic OHLCV data from a geometric random walk, in the same
+    column layout as the database tables: datetime, open, high, low, close, volume.
+        n: int = Number of rows.
+        start: str = First datetime.
+        freq: str = Pandas frequency string between rows ('B' business days, 'min' minutes).
+        seed: int = Random seed, so the same arguments always give the same data.
+        price: float = Starting price.
+    '''
+    rng = np.random.default_rng(seed)
+
+    close = price * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    open_ = np.empty(n)
+    open_[0] = price
+    open_[1:] = close[:-1] * np.exp(rng.normal(0.0, 0.002, n - 1))
+
+    wick = np.abs(rng.normal(0.0, 0.005, (2, n)))
+    high = np.maximum(open_, close) * (1.0 + wick[0])
+    low = np.minimum(open_, close) * (1.0 - wick[1])
+    volume = rng.integers(1000, 1000000, n).astype(np.float64)
+
+    return pd.DataFrame({
+        'datetime': pd.date_range(start, periods=n, freq=freq),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
+
+
+def write_sqlite_table(conn, ticker:str, timeframe:str, df:pd.DataFrame):
+    '''
+    write_sqlite_table(conn, ticker, timeframe, df)
+
+    Writes an OHLCV dataframe (as made by generate_ohlcv) to the table '<ticker>_1<timeframe>'
+    using the layout described in the README: every column TEXT, keyed by the datetime string.
+    An existing table of the same name is replaced.
+    '''
+    table = f"{ticker}_1{timeframe.upper()}"
+    datetime_format = '%Y-%m-%d' if timeframe.upper() == 'DAY' else '%Y-%m-%d %H:%M'
+
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(f"CREATE TABLE {table} (datetime TEXT PRIMARY KEY, open TEXT, high TEXT, low TEXT, close TEXT, volume TEXT)")
+
+    rows = zip(
+        pd.to_datetime(df['datetime']).dt.strftime(datetime_format).tolist(),
+        *[df[column].astype(str).tolist() for column in ('open', 'high', 'low', 'close', 'volume')]
+    )
+    conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()